@@ -0,0 +1,448 @@
+# core/async_engine.py
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import aiohttp
+
+from core import http_client, http_cache, rate_limiter
+from core.proxy_pool import pick_proxy, get_proxy_pool, NoLiveProxiesError
+from core.retry_policy import (
+    CircuitOpenError, get_breaker, retry_policy, backoff_delay, is_transient, is_host_failure, is_connection_error
+)
+from core.content_hash import hash_results
+from core.parse_pool import get_parse_pool, shutdown_parse_pool, inline_limit, use_pool
+from core.scraper import (
+    normalize_url, build_headers, parse_field_spec, cached_results, MULTI_METHOD,
+    StreamingPage, finish_page, cached_parse, store_parse, check_response_headers, content_charset,
+    CHUNK_SIZE, DEFAULT_MAX_BODY_SIZE
+)
+from core.storage import load_settings
+
+# Лимиты по умолчанию (переопределяются в user_settings.json)
+DEFAULT_MAX_CONCURRENCY = 20   # одновременных запросов на весь процесс
+DEFAULT_PER_HOST_LIMIT = 4     # одновременных запросов к одному хосту
+
+# Разбор по мере загрузки идёт вне event loop: куски копятся до FEED_BATCH байт
+# и уходят в поток разбора, закреплённый за страницей (парсер lxml не переходит между потоками)
+FEED_BATCH = 256 * 1024
+FEED_THREADS = 4
+
+STATUS_SUCCESS = "✅ Success"
+STATUS_ERROR = "❌ ERROR"
+STATUS_UNCHANGED = "✅ Unchanged"   # 304: страница не менялась с прошлого запуска
+STATUS_CIRCUIT_OPEN = "⛔ Circuit open"   # хост выключен breaker'ом, запрос не отправлялся
+STATUS_NO_PROXIES = "⛔ No live proxies"   # ротация включена, а живых прокси нет — напрямую не идём
+
+
+def describe_results(results):
+    """Сообщение для колонки статуса"""
+    if results:
+        return f"Elements finded: {len(results)}"
+    return "Elements not find"
+
+
+class ScrapeEngine:
+    """
+    Асинхронный движок парсинга на aiohttp.
+    Один фоновый поток с event loop, общий лимит конкурентности и лимит на хост.
+    Qt здесь не используется — результаты отдаются через callback.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT, use_cache=True,
+                 max_body_size=DEFAULT_MAX_BODY_SIZE, parse_pool=None, settings=None):
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.use_cache = use_cache
+        self.max_body_size = max_body_size
+        self.parse_pool = parse_pool   # None — разбор в потоках этого процесса
+        # Настройки читаются один раз, а не на каждый запрос и повтор; после правки — reload_settings()
+        self.settings = load_settings() if settings is None else settings
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._global_sem = None
+        self._host_sems = {}
+        self._feed_executors = []
+        self._feed_turn = itertools.count()
+        self._started = threading.Event()
+
+    # ========= Жизненный цикл =========
+
+    def reload_settings(self):
+        """Перечитывает user_settings.json (ротация прокси, повторы) для следующих задач"""
+        self.settings = load_settings()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="ScrapeEngine", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._global_sem = asyncio.Semaphore(self.max_concurrency)
+        self._feed_executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"page-feed-{i}") for i in range(FEED_THREADS)
+        ]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def stop(self):
+        """Закрывает HTTP-сессию и останавливает event loop"""
+        if not self._loop or not self._loop.is_running():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._close_session(), self._loop)
+        try:
+            future.result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        for executor in self._feed_executors:
+            executor.shutdown(wait=False)
+        self._feed_executors = []
+
+    async def _close_session(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ========= Запуск задач =========
+
+    def submit(self, job, callback=None):
+        """
+        Ставит задачу в очередь движка. Потокобезопасно.
+        :param job: словарь с ключами row, url, selector, method, params, cookies
+        :param callback: вызывается в потоке движка со словарём результата
+        :return: concurrent.futures.Future с тем же словарём
+        """
+        return self.run_coroutine(self._run_job(job, callback))
+
+    def run_coroutine(self, coro):
+        """
+        Выполняет корутину в event loop движка (проверка прокси и т.п.). Потокобезопасно.
+        :return: concurrent.futures.Future; ждать его из потока движка нельзя — loop встанет
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def in_engine_thread(self):
+        """True, если вызвано из потока event loop движка"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    async def _run_job(self, job, callback):
+        host = urlparse(normalize_url(job["url"])).hostname or ""
+        attempts = 0
+        started = time.monotonic()
+        try:
+            results, cookies, unchanged, size, attempts = await self._scrape_with_retries(job, host, self.settings)
+            message = describe_results(results)
+            results_hash = await asyncio.get_running_loop().run_in_executor(None, hash_results, results)
+            outcome = {
+                "row": job["row"],
+                "status": STATUS_UNCHANGED if unchanged else STATUS_SUCCESS,
+                "message": f"Not modified: {message}" if unchanged else message,
+                "results": results,
+                "results_hash": results_hash,
+                "bytes": size,
+                "cookies": cookies,
+                "cookies_changed": cookies != (job.get("cookies") or {}),
+            }
+        except (CircuitOpenError, NoLiveProxiesError) as e:
+            attempts = e.attempts
+            # ⛔ Хост выключен или некуда проксировать — падаем сразу, без запроса и таймаута
+            outcome = {
+                "row": job["row"],
+                "status": STATUS_CIRCUIT_OPEN if isinstance(e, CircuitOpenError) else STATUS_NO_PROXIES,
+                "message": str(e),
+                "results": [],
+                "results_hash": None,
+                "bytes": 0,
+                "cookies": job.get("cookies") or {},
+                "cookies_changed": False,
+            }
+        except Exception as e:
+            attempts = getattr(e, "attempts", 1)
+            # ⛔ В случае ошибки — пустые результаты, куки не обновляем
+            outcome = {
+                "row": job["row"],
+                "status": STATUS_ERROR,
+                "message": _with_attempts(str(e) or type(e).__name__, attempts),
+                "results": [],
+                "results_hash": None,
+                "bytes": 0,
+                "cookies": job.get("cookies") or {},
+                "cookies_changed": False,
+            }
+
+        outcome["host"] = host
+        outcome["attempts"] = attempts
+        outcome["duration"] = time.monotonic() - started   # с повторами и ожиданием лимитов
+        outcome["breaker"] = get_breaker().state(host)
+        if callback:
+            callback(outcome)
+        return outcome
+
+    async def _scrape_with_retries(self, job, host, settings):
+        """
+        scrape() с повторами временных ошибок (обрыв, таймаут, 429, 5xx) и
+        breaker'ом хоста. Пауза между попытками — экспонента с джиттером.
+        :return: (results, cookies, unchanged, size, attempts)
+        """
+        policy = retry_policy(job.get("params"), settings)
+        breaker = get_breaker()
+        attempt = 0
+        while True:
+            try:
+                breaker.before_request(host)
+            except CircuitOpenError as e:
+                e.attempts = attempt
+                raise
+            attempt += 1
+            try:
+                results, cookies, unchanged, size = await self.scrape(job, settings)
+            except NoLiveProxiesError as e:
+                breaker.release_probe(host)   # запрос не отправлялся — хост не оцениваем
+                e.attempts = attempt
+                raise
+            except Exception as e:
+                if is_host_failure(e):
+                    breaker.record_failure(host)
+                else:
+                    breaker.record_success(host)   # хост ответил, ошибка в самой задаче
+                if not is_transient(e) or attempt > policy["retries"]:
+                    e.attempts = attempt
+                    raise
+                await asyncio.sleep(backoff_delay(policy, attempt))
+                continue
+            breaker.record_success(host)
+            return results, cookies, unchanged, size, attempt
+
+    async def scrape(self, job, settings=None):
+        """
+        Асинхронный аналог scrape_website.
+        :return: (results, cookies, unchanged, size) — unchanged=True, если сервер ответил 304;
+                 size — байт тела ответа (0 при 304)
+        """
+        params = job.get("params") or {}
+        url = normalize_url(job["url"])
+        headers = build_headers(params.get("headers"), params.get("user_agent"))
+        timeout = aiohttp.ClientTimeout(total=params.get("timeout", 10))
+        cookies = dict(job.get("cookies") or {})
+        method = job.get("method") or "CSS"
+        output = params.get("output") or "html"
+        max_size = params.get("max_body_size")
+        max_size = int(self.max_body_size if max_size is None else max_size or 0)
+        if method.lower() == MULTI_METHOD:
+            parse_field_spec(job["selector"])  # битый JSON — ошибка ещё до запроса
+
+        host = urlparse(url).hostname or ""
+        session = self._get_session()
+        loop = asyncio.get_running_loop()
+
+        # 🗄 Условный GET: сервер вернёт 304, если страница не менялась
+        if self.use_cache:
+            validators = await loop.run_in_executor(None, http_cache.conditional_headers, url)
+            headers.update(validators)
+        not_modified = False
+
+        # 🧦 Прокси задачи или лучший из пула (при proxy_rotation); verdict=None — запрос не завершился
+        proxy, pooled = pick_proxy(params.get("proxy"), self.settings if settings is None else settings)
+        verdict, error, latency = None, "", None
+        try:
+            # ⏱ Слот в расписании хоста: ждём до захвата семафоров, чтобы не держать их зря
+            limiter = rate_limiter.get_limiter()
+            delay = limiter.reserve(host, proxy)
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = limiter.blocked_for(host, proxy)
+
+            async with self._global_sem, self._host_semaphore(host):
+                started = loop.time()
+                async with session.get(
+                    url,
+                    headers=headers,
+                    proxy=proxy,
+                    timeout=timeout,
+                    cookies=cookies,
+                    trace_request_ctx={"host": host, "proxy": proxy},
+                ) as response:
+                    latency = loop.time() - started
+                    limiter.observe(host, response.status, response.headers.get("Retry-After"), proxy)
+                    for name, morsel in response.cookies.items():
+                        cookies[name] = morsel.value
+                    if response.status == 304:
+                        not_modified = True
+                    else:
+                        response.raise_for_status()
+                        check_response_headers(response.headers, max_size)
+                        page = StreamingPage(
+                            max_size, content_charset(response.headers.get("Content-Type")),
+                            keep_body=self.use_cache, parse_limit=inline_limit(self.parse_pool, response.headers)
+                        )
+                        await self._read_page(page, response, loop)
+                        response_headers = response.headers
+            verdict = True
+        except Exception as e:
+            verdict, error = not is_connection_error(e), str(e) or type(e).__name__
+            raise
+        finally:
+            if pooled:
+                get_proxy_pool().release(proxy, verdict, latency, error)
+
+        # Селекторы и работа с диском — вне event loop, чтобы не блокировать остальные запросы
+        if not_modified:
+            results = await loop.run_in_executor(
+                None, cached_results, url, job["selector"], method, output
+            )
+            return results, cookies, True, 0
+
+        if use_pool(self.parse_pool, page):
+            results = await self._parse_in_pool(page, response_headers, url, job["selector"], method, output)
+        else:
+            results = await loop.run_in_executor(
+                None, finish_page, page, response_headers,
+                url, job["selector"], method, output, self.use_cache
+            )
+        return results, cookies, False, page.size
+
+    async def _read_page(self, page, response, loop):
+        """
+        Читает тело в page. Event loop только копит куски: feed() и close() идут пачками
+        по FEED_BATCH байт в потоке разбора этой страницы — тело целиком не буферизуется.
+        """
+        executor = self._feed_executors[next(self._feed_turn) % len(self._feed_executors)]
+        batch, batch_size = [], 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            batch.append(chunk)
+            batch_size += len(chunk)
+            if batch_size >= FEED_BATCH:
+                await loop.run_in_executor(executor, _feed_page, page, batch)
+                batch, batch_size = [], 0
+        await loop.run_in_executor(executor, _feed_page, page, batch, True)
+
+    async def _parse_in_pool(self, page, response_headers, url, selector, method, output):
+        """Большое тело: кэш проверяется здесь, а разбор идёт в отдельном процессе"""
+        loop = asyncio.get_running_loop()
+        if self.use_cache:
+            results = await loop.run_in_executor(
+                None, cached_parse, page, response_headers, url, selector, method, output
+            )
+            if results is not None:
+                return results
+
+        future = self.parse_pool.submit(page.body, page.encoding, url, selector, method, output)
+        results = await asyncio.wrap_future(future)
+        if self.use_cache:
+            await loop.run_in_executor(
+                None, store_parse, page, response_headers, url, selector, method, output, results
+            )
+        return results
+
+    # ========= Внутреннее =========
+
+    def _host_semaphore(self, host):
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host_limit)
+            self._host_sems[host] = sem
+        return sem
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.DummyCookieJar(),  # куки передаём явно в каждую задачу
+                trace_configs=[_connection_trace()],
+            )
+        return self._session
+
+
+def _feed_page(page, chunks, close=False):
+    """Отдаёт пачку кусков парсеру страницы; с close=True завершает разбор (в том же потоке)"""
+    for chunk in chunks:
+        page.feed(chunk)
+    if close:
+        page.close()
+
+def _with_attempts(message, attempts):
+    return f"{message} (after {attempts} attempts)" if attempts > 1 else message
+
+
+def _connection_trace():
+    """Считает новые и переиспользованные соединения в общих счётчиках http_client"""
+    trace = aiohttp.TraceConfig()
+
+    async def on_create(session, ctx, params):
+        info = ctx.trace_request_ctx or {}
+        http_client.record_connection(info.get("host", ""), False, info.get("proxy"))
+
+    async def on_reuse(session, ctx, params):
+        info = ctx.trace_request_ctx or {}
+        http_client.record_connection(info.get("host", ""), True, info.get("proxy"))
+
+    trace.on_connection_create_end.append(on_create)
+    trace.on_connection_reuseconn.append(on_reuse)
+    return trace
+
+
+# ========= Общий движок процесса =========
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Возвращает общий движок, создавая его по настройкам пользователя"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = engine_from_settings()
+        return _engine
+
+
+def engine_from_settings(max_concurrency=None, per_host_limit=None, use_cache=None):
+    """Новый движок с лимитами из user_settings.json; переданные аргументы важнее настроек"""
+    settings = load_settings()
+    return ScrapeEngine(
+        settings=settings,
+        max_concurrency=max_concurrency or settings.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+        per_host_limit=per_host_limit or settings.get("per_host_concurrency", DEFAULT_PER_HOST_LIMIT),
+        use_cache=settings.get("http_cache", True) if use_cache is None else use_cache,
+        max_body_size=settings.get("max_body_size", DEFAULT_MAX_BODY_SIZE),
+        parse_pool=get_parse_pool(),
+    )
+
+
+def reload_engine_settings():
+    """Настройки изменились (диалог, файл): общий движок, если он уже есть, перечитывает их"""
+    with _engine_lock:
+        engine = _engine
+    if engine is not None:
+        engine.reload_settings()
+
+
+def shutdown_engine():
+    """Останавливает общий движок и пул процессов разбора"""
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        engine.stop()
+    shutdown_parse_pool()
@@ -0,0 +1,330 @@
+# core/batch_runner.py
+#
+# Запуск сохранённой сессии без GUI (cron, сервер без дисплея):
+#     python batch.py session_2024-05-01_12-00                  # по имени из data/sessions.db
+#     python batch.py session_2024-05-01_12-00 --jsonl - > results.jsonl
+#     python batch.py sessions/session_2024-05-01_12-00.json    # старая JSON-сессия
+# PyQt5 здесь не импортируется ни прямо, ни через зависимости.
+
+import argparse
+import json
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+
+from core import cookie_manager
+from core.async_engine import (
+    engine_from_settings, STATUS_ERROR, STATUS_UNCHANGED, STATUS_CIRCUIT_OPEN, STATUS_NO_PROXIES
+)
+from core.parse_pool import shutdown_parse_pool
+from core.session_service import SESSIONS_DIR, load_session, write_task_results, write_session_file
+from core.session_store import get_session_store
+
+STATUS_SKIPPED = "⏭ Skipped"
+FAILED_STATUSES = (STATUS_ERROR, STATUS_CIRCUIT_OPEN, STATUS_NO_PROXIES)
+
+# Сколько задач держим отправленными в движок сверх лимита конкурентности
+WINDOW_FACTOR = 2
+
+# Сессия из хранилища: готовые задачи (с результатами) пишутся пачками такого размера,
+# поэтому в памяти не копятся результаты всей сессии
+STORE_FLUSH_TASKS = 100
+
+
+class SessionSource:
+    """
+    Сессия для батч-режима и кластера: из хранилища по имени (path=None)
+    или старый JSON-файл с результатами в results/<session>/task_N.json.
+    """
+
+    def __init__(self, name, path=None):
+        self.name = name
+        self.path = path
+
+    def __str__(self):
+        return self.path or self.name
+
+    def load(self):
+        """Данные сессии; из хранилища — без результатов (только хэши)"""
+        if self.path:
+            return load_session(self.path)
+        session_data = get_session_store().load_session(self.name, lazy=True)
+        if session_data is None:
+            raise FileNotFoundError(f"Session not found: {self.name}")
+        return session_data
+
+    def writer(self, session_data):
+        return _SessionWriter(self, session_data)
+
+
+class _SessionWriter:
+    """
+    Запись итогов задач обратно в сессию. JSON — результаты в файлы сразу, сама
+    сессия одним файлом в конце; хранилище — save_changes пачками по STORE_FLUSH_TASKS.
+    """
+
+    def __init__(self, source, session_data):
+        self.source = source
+        self.session_data = session_data
+        self.session_name = session_data.get("session_name") or source.name
+        self.previous_hashes = {
+            task["results_path"]: task["results_hash"]
+            for task in session_data.get("tasks", []) if task.get("results_path") and task.get("results_hash")
+        }
+        self._changed = []
+
+    def task_done(self, index, task, status, last_run, results=None, results_hash=None):
+        if results_hash:
+            if self.source.path:
+                task["results_path"], task["results_hash"] = write_task_results(
+                    self.session_name, index, results, results_hash, self.previous_hashes
+                )
+            else:
+                task["results"], task["results_hash"] = results, results_hash
+        task["status"] = status
+        task["last_run"] = last_run
+        if not self.source.path:
+            self._changed.append(task)
+            if len(self._changed) >= STORE_FLUSH_TASKS:
+                self.flush()
+
+    def flush(self):
+        if not self._changed:
+            return
+        get_session_store().save_changes(self.source.name, self._changed)
+        for task in self._changed:
+            task.pop("results", None)   # записаны — в памяти остаётся только хэш
+        self._changed = []
+
+    def close(self):
+        if self.source.path:
+            self.session_data["datetime"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            write_session_file(self.source.path, self.session_data)
+        else:
+            self.flush()
+
+
+def resolve_session(name_or_path):
+    """
+    Сессия по аргументу командной строки: путь к существующему JSON-файлу,
+    иначе имя в хранилище сессий, иначе старый sessions/<имя>.json.
+    """
+    if os.path.isfile(name_or_path):
+        return SessionSource(os.path.splitext(os.path.basename(name_or_path))[0], name_or_path)
+    name = name_or_path[:-len(".json")] if name_or_path.endswith(".json") else name_or_path
+    if get_session_store().has_session(name):
+        return SessionSource(name)
+    path = os.path.join(SESSIONS_DIR, f"{name}.json")
+    if os.path.isfile(path):
+        return SessionSource(name, path)
+    raise FileNotFoundError(f"Session not found: {name_or_path}")
+
+
+def run_tasks(tasks, engine, window=None):
+    """
+    Прогоняет задачи через движок и отдаёт результаты по мере готовности.
+    В движке одновременно не больше window задач, поэтому память не растёт
+    с размером сессии.
+    :return: генератор (index, task, outcome, latency_seconds)
+    """
+    window = window or engine.max_concurrency * WINDOW_FACTOR
+    done = queue.Queue()
+    started = {}
+    pending = 0
+
+    def collect():
+        outcome = done.get()
+        index = outcome["row"]
+        return index, tasks[index], outcome, time.monotonic() - started.pop(index)
+
+    for index, task in enumerate(tasks):
+        if not task.get("url") or not task.get("selector"):
+            yield index, task, {
+                "row": index,
+                "status": STATUS_SKIPPED,
+                "message": "Empty URL or selector",
+                "results": [],
+                "results_hash": None,
+                "cookies": {},
+                "cookies_changed": False,
+            }, 0.0
+            continue
+
+        while pending >= window:
+            yield collect()
+            pending -= 1
+
+        url = task["url"]
+        started[index] = time.monotonic()
+        engine.submit({
+            "row": index,
+            "url": url,
+            "selector": task["selector"],
+            "method": task.get("method") or "CSS",
+            "params": task.get("params") or {},
+            "cookies": cookie_manager.load_cookies(url) or {},
+        }, done.put)
+        pending += 1
+
+    while pending:
+        yield collect()
+        pending -= 1
+
+
+def summarize(latencies, statuses, elapsed):
+    """Сводка прогона: счётчики статусов, пропускная способность и задержки"""
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+    return {
+        "tasks": len(statuses),
+        "success": sum(1 for s in statuses if s not in FAILED_STATUSES and s != STATUS_SKIPPED),
+        "unchanged": statuses.count(STATUS_UNCHANGED),
+        "errors": sum(1 for s in statuses if s in FAILED_STATUSES),
+        "skipped": statuses.count(STATUS_SKIPPED),
+        "elapsed": elapsed,
+        "throughput": len(ordered) / elapsed if elapsed > 0 else 0.0,
+        "latency_avg": sum(ordered) / len(ordered) if ordered else 0.0,
+        "latency_p50": percentile(0.50),
+        "latency_p95": percentile(0.95),
+        "latency_max": ordered[-1] if ordered else 0.0,
+    }
+
+
+def format_summary(summary):
+    return (
+        f"Tasks: {summary['tasks']}  success: {summary['success']} "
+        f"(unchanged: {summary['unchanged']})  errors: {summary['errors']}  skipped: {summary['skipped']}\n"
+        f"Elapsed: {summary['elapsed']:.2f}s  throughput: {summary['throughput']:.2f} tasks/s\n"
+        f"Latency: avg {summary['latency_avg'] * 1000:.0f} ms  p50 {summary['latency_p50'] * 1000:.0f} ms  "
+        f"p95 {summary['latency_p95'] * 1000:.0f} ms  max {summary['latency_max'] * 1000:.0f} ms"
+    )
+
+
+def run_session(session, jsonl=None, engine=None, update_session=True, log=None):
+    """
+    Выполняет все задачи сессии.
+    :param session: SessionSource, имя сессии или путь к JSON-файлу
+    :param jsonl: файловый объект — результаты пишутся в него построчно (JSONL)
+                  вместо сессии
+    :param update_session: записать статусы, last_run и результаты в сессию
+    :return: сводка summarize()
+    """
+    source = session if isinstance(session, SessionSource) else resolve_session(session)
+    session_data = source.load()
+    tasks = session_data.get("tasks", [])
+    writer = source.writer(session_data) if update_session and jsonl is None else None
+
+    own_engine = engine is None
+    if own_engine:
+        engine = engine_from_settings()
+
+    latencies = []
+    statuses = []
+    started = time.monotonic()
+    try:
+        for index, task, outcome, latency in run_tasks(tasks, engine):
+            status = outcome["status"]
+            statuses.append(status)
+            if status == STATUS_SKIPPED:
+                continue
+            latencies.append(latency)
+            last_run = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            if outcome.get("cookies_changed"):
+                cookie_manager.save_cookies(task["url"], outcome["cookies"])
+
+            if jsonl is not None:
+                jsonl.write(json.dumps({
+                    "index": index,
+                    "url": task["url"],
+                    "status": status,
+                    "message": outcome["message"],
+                    "results": outcome["results"],
+                    "results_hash": outcome["results_hash"],
+                    "last_run": last_run,
+                    "latency": round(latency, 4),
+                }, ensure_ascii=False) + "\n")
+                jsonl.flush()
+            if writer:
+                ok = status not in FAILED_STATUSES
+                writer.task_done(index, task, status, last_run,
+                                 outcome["results"] if ok else None, outcome["results_hash"] if ok else None)
+            else:
+                task["status"] = status
+                task["last_run"] = last_run
+            if log:
+                log(f"[{index}] {status} {task['url']} — {outcome['message']} ({latency * 1000:.0f} ms)")
+    finally:
+        if own_engine:
+            engine.stop()
+
+    summary = summarize(latencies, statuses, time.monotonic() - started)
+    if writer:
+        writer.close()
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a saved scraper session without the GUI")
+    parser.add_argument("session", help="session name (data/sessions.db or legacy sessions/) or JSON file")
+    parser.add_argument("--jsonl", metavar="PATH",
+                        help="write results as JSON Lines to PATH ('-' for stdout) instead of results/<session>/")
+    parser.add_argument("--concurrency", type=int, help="max concurrent requests (default: settings)")
+    parser.add_argument("--per-host", type=int, help="max concurrent requests per host (default: settings)")
+    parser.add_argument("--no-cache", action="store_true", help="disable conditional GET cache")
+    parser.add_argument("--no-update", action="store_true", help="do not write statuses back to the session file")
+    parser.add_argument("-q", "--quiet", action="store_true", help="print only the summary")
+    return parser
+
+
+def main(argv=None):
+    """
+    Точка входа CLI.
+    :return: код выхода — 0, 1 если были ошибки задач, 2 если сессию не загрузить
+    """
+    args = build_parser().parse_args(argv)
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    try:
+        session = resolve_session(args.session)
+        session.load()
+    except (OSError, ValueError) as e:
+        log(f"❌ {e}")
+        return 2
+
+    engine = engine_from_settings(args.concurrency, args.per_host, False if args.no_cache else None)
+    jsonl = None
+    try:
+        if args.jsonl == "-":
+            jsonl = sys.stdout
+        elif args.jsonl:
+            jsonl = open(args.jsonl, "w", encoding="utf-8")
+
+        summary = run_session(
+            session,
+            jsonl=jsonl,
+            engine=engine,
+            update_session=not args.no_update,
+            log=None if args.quiet else log,
+        )
+    finally:
+        engine.stop()
+        shutdown_parse_pool()
+        if jsonl is not None and jsonl is not sys.stdout:
+            jsonl.close()
+
+    log(format_summary(summary))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# core/cluster.py
+#
+# Распределённый режим: координатор ставит задачи сессии в общую очередь,
+# воркеры на разных машинах забирают их, парсят и сдают результаты.
+#     python cluster.py submit session_2024-05-01_12-00     # -> id пачки
+#     python cluster.py work --concurrency 50               # на каждом узле
+#     python cluster.py status
+#     python cluster.py collect <batch> session_2024-05-01_12-00
+# Как и batch_runner, PyQt5 не импортирует.
+
+import argparse
+import queue
+import sys
+import time
+from datetime import datetime
+
+from core import cookie_manager
+from core.async_engine import engine_from_settings
+from core.parse_pool import shutdown_parse_pool
+from core.batch_runner import SessionSource, resolve_session
+from core.storage import load_settings
+from core.work_queue import (
+    WorkQueue, DEFAULT_QUEUE_PATH, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS,
+    DONE, new_batch_id, new_worker_id
+)
+
+POLL_INTERVAL = 0.5   # как часто воркер без работы заглядывает в очередь
+
+
+def queue_path_from_settings():
+    return load_settings().get("work_queue_path") or DEFAULT_QUEUE_PATH
+
+
+def submit_session(work_queue, session, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Ставит все задачи сессии в очередь новой пачкой; возвращает (batch, count)
+    :param session: SessionSource, имя сессии или путь к JSON-файлу
+    """
+    source = session if isinstance(session, SessionSource) else resolve_session(session)
+    session_data = source.load()
+    name = session_data.get("session_name") or source.name
+    batch = new_batch_id(name)
+    return batch, work_queue.submit(batch, session_data.get("tasks", []), max_attempts)
+
+
+def run_worker(work_queue, engine, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+               idle_exit=None, should_stop=None, log=None):
+    """
+    Цикл воркера: аренда заданий -> движок -> сдача результатов.
+    Аренда продлевается каждые lease_seconds / 3; при остановке невыполненные
+    задания возвращаются в очередь.
+    :param idle_exit: выйти, если работы нет столько секунд (None — работать всегда)
+    :return: число сданных заданий
+    """
+    worker_id = worker_id or new_worker_id()
+    work_queue.register_worker(worker_id)
+    capacity = engine.max_concurrency
+    done = queue.Queue()
+    in_flight = {}   # job id -> задание
+    processed = 0
+    last_beat = time.monotonic()
+    idle_since = time.monotonic()
+
+    if log:
+        log(f"Worker {worker_id} started, concurrency {capacity}")
+    try:
+        while not (should_stop and should_stop()):
+            # Берём задания пачкой, когда освободилась заметная часть слотов
+            free = capacity - len(in_flight)
+            if free and (not in_flight or free >= max(1, capacity // 4)):
+                for job in work_queue.lease(worker_id, free, lease_seconds):
+                    in_flight[job["id"]] = job
+                    engine.submit({
+                        "row": job["id"],
+                        "url": job["url"],
+                        "selector": job["selector"],
+                        "method": job["method"],
+                        "params": job["params"],
+                        "cookies": cookie_manager.load_cookies(job["url"]) or {},
+                    }, done.put)
+
+            if not in_flight:
+                if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+            idle_since = time.monotonic()
+
+            try:
+                outcome = done.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                outcome = None
+            while outcome is not None:
+                job = in_flight.pop(outcome["row"])
+                if outcome.get("cookies_changed"):
+                    cookie_manager.save_cookies(job["url"], outcome["cookies"])
+                if work_queue.complete(job["id"], worker_id, outcome):
+                    processed += 1
+                elif log:
+                    log(f"[{job['id']}] lease lost, result dropped: {job['url']}")
+                if log:
+                    log(f"[{job['id']}] {outcome['status']} {job['url']} — {outcome['message']}")
+                try:
+                    outcome = done.get_nowait()
+                except queue.Empty:
+                    outcome = None
+
+            if time.monotonic() - last_beat > lease_seconds / 3:
+                work_queue.heartbeat(worker_id, list(in_flight), lease_seconds)
+                last_beat = time.monotonic()
+    finally:
+        for job_id in in_flight:
+            work_queue.release(job_id, worker_id, "Worker stopped")
+    return processed
+
+
+def collect_results(work_queue, batch, session):
+    """
+    Переносит результаты и статусы пачки в сессию: в хранилище или, для старой
+    JSON-сессии, в results/<session>/task_N.json и файл сессии.
+    :param session: SessionSource, имя сессии или путь к JSON-файлу
+    :return: число перенесённых заданий
+    """
+    source = session if isinstance(session, SessionSource) else resolve_session(session)
+    session_data = source.load()
+    tasks = session_data.get("tasks", [])
+    writer = source.writer(session_data)
+
+    count = 0
+    for job in work_queue.results(batch):
+        if job["task_index"] >= len(tasks):
+            continue
+        done = job["state"] == DONE and job["results_hash"]
+        writer.task_done(
+            job["task_index"], tasks[job["task_index"]], job["status"] or "❌ ERROR",
+            datetime.fromtimestamp(job["finished_at"] or time.time()).strftime("%Y-%m-%d %H:%M:%S"),
+            job["results"] if done else None, job["results_hash"] if done else None,
+        )
+        count += 1
+
+    writer.close()
+    return count
+
+
+def format_status(work_queue):
+    lines = ["Batches:"]
+    for row in work_queue.batches():
+        finished = (row["done"] or 0) + (row["failed"] or 0)
+        lines.append(
+            f"  {row['batch']}: {finished}/{row['total']} finished  "
+            f"pending {row['pending'] or 0}  leased {row['leased'] or 0}  failed {row['failed'] or 0}"
+        )
+    lines.append("Workers:")
+    for worker in work_queue.worker_stats():
+        state = "alive" if worker["alive"] else "gone"
+        lines.append(
+            f"  {worker['worker_id']} [{state}]: done {worker['jobs_done']}  failed {worker['jobs_failed']}  "
+            f"leased {worker['leased']}  {worker['throughput']:.2f} jobs/s"
+        )
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Distributed scraping: shared queue, coordinator and workers")
+    parser.add_argument("--queue", help="queue database path (default: settings work_queue_path)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="enqueue all tasks of a session")
+    submit.add_argument("session")
+    submit.add_argument("--attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="max attempts per task")
+
+    work = commands.add_parser("work", help="run a worker on this node")
+    work.add_argument("--concurrency", type=int)
+    work.add_argument("--per-host", type=int)
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="lease length, seconds")
+    work.add_argument("--exit-when-idle", type=float, metavar="SECONDS", help="stop after SECONDS without work")
+    work.add_argument("-q", "--quiet", action="store_true")
+
+    commands.add_parser("status", help="show batches and workers")
+
+    collect = commands.add_parser("collect", help="write batch results into the session")
+    collect.add_argument("batch")
+    collect.add_argument("session")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    work_queue = WorkQueue(args.queue or queue_path_from_settings())
+    try:
+        if args.command == "submit":
+            batch, count = submit_session(work_queue, resolve_session(args.session), args.attempts)
+            print(batch)
+            log(f"Submitted {count} tasks")
+        elif args.command == "work":
+            engine = engine_from_settings(args.concurrency, args.per_host)
+            started = time.monotonic()
+            try:
+                processed = run_worker(
+                    work_queue, engine, lease_seconds=args.lease,
+                    idle_exit=args.exit_when_idle, log=None if args.quiet else log
+                )
+            except KeyboardInterrupt:
+                processed = None
+            finally:
+                engine.stop()
+                shutdown_parse_pool()
+            if processed is not None:
+                elapsed = time.monotonic() - started
+                log(f"Processed {processed} jobs in {elapsed:.1f}s ({processed / elapsed:.2f} jobs/s)")
+        elif args.command == "status":
+            print(format_status(work_queue))
+        elif args.command == "collect":
+            count = collect_results(work_queue, args.batch, resolve_session(args.session))
+            log(f"Collected {count} results")
+    except (OSError, ValueError) as e:
+        log(f"❌ {e}")
+        return 2
+    finally:
+        work_queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
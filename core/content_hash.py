@@ -0,0 +1,24 @@
+# core/content_hash.py
+
+import hashlib
+import json
+
+
+def new_hasher():
+    """Хэшер для тела, которое приходит частями: update(chunk), затем hexdigest()"""
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_bytes(data):
+    """Быстрый хэш тела ответа (blake2b, 128 бит)"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def hash_results(results):
+    """Хэш извлечённых результатов — не зависит от порядка ключей в словарях"""
+    payload = json.dumps(results, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hash_bytes(payload)
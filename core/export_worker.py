@@ -0,0 +1,41 @@
+# core/export_worker.py
+
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+from core.exporter import export_results
+
+# Прогресс в GUI — не чаще, чем раз в столько секунд
+PROGRESS_INTERVAL = 0.2
+
+
+class ExportWorker(QThread):
+    """
+    Экспорт в отдельном потоке: задачи и их результаты читаются генератором
+    по мере записи, GUI получает только прогресс и итог.
+    """
+    progress = pyqtSignal(int, int)          # сделано задач, всего
+    export_finished = pyqtSignal(str, int)   # путь, записано строк / элементов
+    export_failed = pyqtSignal(str, str)     # путь, текст ошибки
+
+    def __init__(self, tasks, file_path, is_flat=False, total=None, parent=None):
+        super().__init__(parent)
+        self.tasks = tasks
+        self.file_path = file_path
+        self.is_flat = is_flat
+        self.total = total
+        self._last_progress = 0.0
+
+    def run(self):
+        try:
+            count = export_results(self.tasks, self.file_path, is_flat=self.is_flat,
+                                   progress=self._report, total=self.total)
+        except Exception as e:
+            self.export_failed.emit(self.file_path, str(e))
+            return
+        self.export_finished.emit(self.file_path, count)
+
+    def _report(self, done, total):
+        now = time.monotonic()
+        if done == total or now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress.emit(done, total or 0)
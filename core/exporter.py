@@ -1,90 +1,179 @@
+# core/exporter.py
+
+import csv
 import json
-import pandas as pd
 
-def save_to_json(parsed_data, file_path):
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(parsed_data, f, ensure_ascii=False, indent=2)
-
-def save_to_csv(parsed_data, file_path):
-    rows = []
-    for url, data in parsed_data.items():
-        for item in data:
-            if isinstance(item, dict):
-                rows.append({
-                    "URL": url,
-                    "Title": item.get("title") or item.get("text"),
-                    "Link": item.get("link"),
-                    "Description": item.get("description", "")
-                })
-            elif isinstance(item, str):
-                rows.append({
-                    "URL": url,
-                    "Title": item,
-                    "Link": "",
-                    "Description": ""
-                })
-    df = pd.DataFrame(rows)
-    df.to_csv(file_path, index=False, encoding='utf-8-sig')
-
-def save_to_excel(parsed_data, file_path):
-    rows = []
-    for url, data in parsed_data.items():
-        for item in data:
-            if isinstance(item, dict):
-                rows.append({
-                    "URL": url,
-                    "Title": item.get("title") or item.get("text"),
-                    "Link": item.get("link"),
-                    "Description": item.get("description", "")
-                })
-            elif isinstance(item, str):
-                rows.append({
-                    "URL": url,
-                    "Title": item,
-                    "Link": "",
-                    "Description": ""
-                })
-    df = pd.DataFrame(rows)
-    df.to_excel(file_path, index=False, engine='openpyxl')
-
-def save_flat_table(parsed_data, file_path, filetype="csv"):
-    rows = []
-    for row_id, task in parsed_data.items():
-        row = {
-            "Row": row_id,
-            "URL": task.get("url", ""),
-            "Status": task.get("status", ""),
-            "Last Run": task.get("last_run", ""),
-            "Message": task.get("message", "")
-        }
-        results = task.get("results", [])
-        if isinstance(results, list) and results:
-            preview = results[0] if isinstance(results[0], str) else json.dumps(results[0], ensure_ascii=False)
-        else:
-            preview = "No results"
-        row["Results"] = preview
-        rows.append(row)
+# Экспорт потоковый: задачи и их результаты читаются генераторами и пишутся построчно,
+# в памяти одновременно — результаты одной задачи, а не весь экспорт
 
-    df = pd.DataFrame(rows)
-    if filetype == "csv":
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-    elif filetype == "xlsx":
-        df.to_excel(file_path, index=False, engine='openpyxl')
+ITEM_HEADERS = ["URL", "Title", "Link", "Description"]
+FLAT_HEADERS = ["Row", "URL", "Status", "Last Run", "Message", "Results"]
 
-def export_results(parsed_data, file_path, is_flat=False):
-    if is_flat:
-        if file_path.endswith(".csv"):
-            save_flat_table(parsed_data, file_path, filetype="csv")
-        elif file_path.endswith(".xlsx"):
-            save_flat_table(parsed_data, file_path, filetype="xlsx")
+# Предел строк листа Excel: дальше строки переходят на следующий лист
+XLSX_MAX_ROWS = 1048576
+
+
+# ========= Источник данных =========
+
+def iter_tasks(parsed_data):
+    """
+    Задачи экспорта как (ключ, задача). Принимает словарь {ключ: задача} или {url: [результаты]}
+    либо уже готовый итератор пар (ключ, задача) — тогда задачи можно подгружать по одной.
+    У задачи results — список или любой итерируемый источник.
+    """
+    pairs = parsed_data.items() if isinstance(parsed_data, dict) else parsed_data
+    for key, task in pairs:
+        if isinstance(task, dict):
+            yield key, task
         else:
-            raise ValueError("Flat export supports only CSV and XLSX formats")
-    else:
-        if file_path.endswith(".json"):
-            save_to_json(parsed_data, file_path)
-        elif file_path.endswith(".csv"):
-            save_to_csv(parsed_data, file_path)
-        elif file_path.endswith(".xlsx"):
-            save_to_excel(parsed_data, file_path)
+            yield key, {"url": key, "results": task}
+
+def _with_progress(tasks, progress, total):
+    """Сообщает progress(сделано задач, всего) после каждой задачи"""
+    done = 0
+    for task in tasks:
+        yield task
+        done += 1
+        if progress:
+            progress(done, total)
+
+def item_row(url, item):
+    """Строка плоского списка результатов: URL, Title, Link, Description"""
+    if isinstance(item, dict):
+        return [url, item.get("title") or item.get("text") or "", item.get("link") or "",
+                item.get("description", "")]
+    return [url, str(item), "", ""]
+
+def iter_item_rows(tasks):
+    for _, task in tasks:
+        url = task.get("url", "")
+        for item in task.get("results") or ():
+            yield item_row(url, item)
+
+def iter_flat_rows(tasks):
+    """
+    Одна строка на задачу; в Results — первый элемент результатов целиком.
+    Результаты задачи читаются по ходу записи (ленивый источник из хранилища);
+    урезанное превью из сводки — только для таблицы, в файл оно не идёт.
+    """
+    for key, task in tasks:
+        first = next(iter(task.get("results") or ()), None)
+        if first is None:
+            cell = "No results"
         else:
-            raise ValueError("Unsupported file extension")
+            cell = first if isinstance(first, str) else json.dumps(first, ensure_ascii=False)
+        yield [task.get("row", key), task.get("url", ""), task.get("status", ""), task.get("last_run", ""),
+               task.get("message", ""), cell]
+
+
+# ========= Писатели =========
+
+def write_csv(rows, file_path, headers):
+    """:return: число записанных строк"""
+    count = 0
+    with open(file_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def write_xlsx(rows, file_path, headers, sheet_title="Results"):
+    """
+    openpyxl в режиме write_only: строки уходят в файл по мере добавления.
+    :return: число записанных строк
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheets = 0
+    sheet_rows = XLSX_MAX_ROWS
+    count = 0
+    for row in rows:
+        if sheet_rows >= XLSX_MAX_ROWS:
+            sheets += 1
+            sheet = workbook.create_sheet(sheet_title if sheets == 1 else f"{sheet_title} {sheets}")
+            sheet.append(headers)
+            sheet_rows = 1
+        sheet.append(row)
+        sheet_rows += 1
+        count += 1
+    if not sheets:
+        workbook.create_sheet(sheet_title).append(headers)
+    workbook.save(file_path)
+    return count
+
+def write_jsonl(tasks, file_path):
+    """JSON Lines: строка на элемент результатов {"task", "url", "item"}. :return: число строк"""
+    count = 0
+    with open(file_path, "w", encoding="utf-8") as f:
+        for key, task in tasks:
+            url = task.get("url", "")
+            for item in task.get("results") or ():
+                f.write(json.dumps({"task": key, "url": url, "item": item}, ensure_ascii=False))
+                f.write("\n")
+                count += 1
+    return count
+
+def write_json_array(tasks, file_path):
+    """
+    JSON-массив задач, записываемый по частям: [{"task", "url", "status", "last_run",
+    "message", "results": [...]}, ...]. Результаты тоже пишутся поэлементно.
+    :return: число записанных элементов результатов
+    """
+    count = 0
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for index, (key, task) in enumerate(tasks):
+            header = {
+                "task": key,
+                "url": task.get("url", ""),
+                "status": task.get("status", ""),
+                "last_run": task.get("last_run", ""),
+                "message": task.get("message", ""),
+            }
+            # Объект задачи без закрывающей скобки, затем элементы результатов
+            f.write(",\n" if index else "\n")
+            f.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "results": [')
+            for position, item in enumerate(task.get("results") or ()):
+                f.write(", " if position else "")
+                f.write(json.dumps(item, ensure_ascii=False))
+                count += 1
+            f.write("]}")
+        f.write("\n]\n")
+    return count
+
+
+# ========= Точка входа =========
+
+def export_results(parsed_data, file_path, is_flat=False, progress=None, total=None):
+    """
+    Экспортирует задачи в CSV / XLSX / JSON / JSONL по расширению файла.
+    :param parsed_data: см. iter_tasks
+    :param is_flat: строка на задачу (CSV и XLSX), иначе — строка на элемент результатов
+    :param progress: progress(сделано задач, всего) — вызывается из потока экспорта
+    :param total: число задач для progress (если parsed_data — генератор)
+    :return: число записанных строк / элементов
+    """
+    if total is None and isinstance(parsed_data, dict):
+        total = len(parsed_data)
+    tasks = _with_progress(iter_tasks(parsed_data), progress, total)
+    path = file_path.lower()
+
+    if is_flat:
+        if path.endswith(".csv"):
+            return write_csv(iter_flat_rows(tasks), file_path, FLAT_HEADERS)
+        if path.endswith(".xlsx"):
+            return write_xlsx(iter_flat_rows(tasks), file_path, FLAT_HEADERS)
+        raise ValueError("Flat export supports only CSV and XLSX formats")
+
+    if path.endswith(".json"):
+        return write_json_array(tasks, file_path)
+    if path.endswith(".jsonl"):
+        return write_jsonl(tasks, file_path)
+    if path.endswith(".csv"):
+        return write_csv(iter_item_rows(tasks), file_path, ITEM_HEADERS)
+    if path.endswith(".xlsx"):
+        return write_xlsx(iter_item_rows(tasks), file_path, ITEM_HEADERS)
+    raise ValueError("Unsupported file extension")
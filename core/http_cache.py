@@ -0,0 +1,243 @@
+# core/http_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from core.storage import load_settings
+
+# Кэш ответов для условных GET (ETag / Last-Modified) и хэшей тела
+CACHE_DIR = os.path.join("data", "http_cache")
+
+# Пределы кэша по умолчанию (переопределяются в user_settings.json)
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_MB = 512
+
+_lock = threading.RLock()
+
+# LRU-индекс записей: ключ -> байт на диске (тело + meta), в порядке последнего обращения.
+# Строится по времени изменения meta при первом обращении; обращение к URL обновляет это время
+_index = None
+_index_bytes = 0
+_limits = None
+
+
+def _key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _meta_path(url):
+    return os.path.join(CACHE_DIR, f"{_key(url)}.json")
+
+
+def _body_path(url):
+    return os.path.join(CACHE_DIR, f"{_key(url)}.body")
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _cache_limits():
+    """(предел записей, предел байт); 0 — без предела"""
+    global _limits
+    if _limits is None:
+        settings = load_settings()
+        max_entries = settings.get("http_cache_max_entries", DEFAULT_MAX_ENTRIES)
+        max_mb = settings.get("http_cache_max_mb", DEFAULT_MAX_MB)
+        _limits = (int(max_entries or 0), int((max_mb or 0) * 1024 * 1024))
+    return _limits
+
+
+def _load_index():
+    """LRU-индекс по файлам кэша (под _lock)"""
+    global _index, _index_bytes
+    if _index is not None:
+        return _index
+    entries = []
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            meta_path = os.path.join(CACHE_DIR, name)
+            try:
+                used_at = os.path.getmtime(meta_path)
+            except OSError:
+                continue
+            size = _file_size(meta_path) + _file_size(os.path.join(CACHE_DIR, f"{key}.body"))
+            entries.append((used_at, key, size))
+    entries.sort()
+    _index = OrderedDict((key, size) for _, key, size in entries)
+    _index_bytes = sum(_index.values())
+    return _index
+
+
+def _touch(url):
+    """Обращение к URL: запись становится самой свежей и для LRU после перезапуска"""
+    key = _key(url)
+    with _lock:
+        index = _load_index()
+        if key not in index:
+            return
+        index.move_to_end(key)
+        try:
+            os.utime(_meta_path(url))
+        except OSError:
+            pass
+
+
+def _account(url):
+    """Обновляет размер записи URL в индексе и вытесняет старые записи сверх пределов (под _lock)"""
+    global _index_bytes
+    key = _key(url)
+    index = _load_index()
+    size = _file_size(_meta_path(url)) + _file_size(_body_path(url))
+    _index_bytes += size - index.pop(key, 0)
+    index[key] = size
+
+    max_entries, max_bytes = _cache_limits()
+    while len(index) > 1 and ((max_entries and len(index) > max_entries) or (max_bytes and _index_bytes > max_bytes)):
+        old_key, old_size = index.popitem(last=False)
+        _index_bytes -= old_size
+        for suffix in (".json", ".body"):
+            try:
+                os.remove(os.path.join(CACHE_DIR, old_key + suffix))
+            except OSError:
+                pass
+
+
+def _write_atomic(path, data, mode="w"):
+    tmp_path = f"{path}.tmp{threading.get_ident()}"
+    if "b" in mode:
+        with open(tmp_path, mode) as f:
+            f.write(data)
+    else:
+        with open(tmp_path, mode, encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_meta(url):
+    """Возвращает сохранённые валидаторы и разобранные результаты для URL"""
+    path = _meta_path(url)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def conditional_headers(url):
+    """
+    Заголовки If-None-Match / If-Modified-Since для повторного запроса.
+    Пустой словарь, если в кэше нет тела или валидаторов.
+    """
+    meta = load_meta(url)
+    if not meta or not os.path.exists(_body_path(url)):
+        return {}
+    _touch(url)
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def store_response(url, response_headers, body, encoding=None, body_hash=None):
+    """
+    Сохраняет тело ответа, его валидаторы и хэш.
+    Если хэш тела не изменился, тело не перезаписывается и разобранные
+    результаты остаются в силе; иначе они сбрасываются — содержимое новое.
+    """
+    headers = {name.lower(): value for name, value in response_headers.items()}
+
+    with _lock:
+        meta = load_meta(url)
+        same_body = bool(meta and body_hash and meta.get("body_hash") == body_hash)
+        if not same_body:
+            meta = {"url": url, "parsed": {}}
+        meta.update({
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "encoding": encoding,
+            "body_hash": body_hash,
+            "stored_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        if not same_body or not os.path.exists(_body_path(url)):
+            _write_atomic(_body_path(url), body, mode="wb")
+        _write_atomic(_meta_path(url), meta)
+        _account(url)
+    return not same_body
+
+
+def load_body(url):
+    """Возвращает (body_bytes, encoding) из кэша или (None, None)"""
+    meta = load_meta(url)
+    path = _body_path(url)
+    if not meta or not os.path.exists(path):
+        return None, None
+    try:
+        with open(path, "rb") as f:
+            return f.read(), meta.get("encoding")
+    except OSError:   # запись вытеснена из кэша между проверкой и чтением
+        return None, None
+
+
+def parse_key(selector, method, output="html"):
+    """Ключ разобранного результата: один URL могут парсить разные задачи"""
+    return f"{(method or 'css').lower()}|{output or 'html'}|{selector}"
+
+
+def get_parsed(url, key, body_hash=None):
+    """
+    Результаты разбора кэшированного тела или None.
+    С body_hash — только если тело с тех пор не изменилось.
+    """
+    meta = load_meta(url)
+    if not meta:
+        return None
+    if body_hash and meta.get("body_hash") != body_hash:
+        return None
+    return meta.get("parsed", {}).get(key)
+
+
+def put_parsed(url, key, results):
+    """Запоминает результат разбора для текущего кэшированного тела"""
+    with _lock:
+        meta = load_meta(url)
+        if not meta or meta.get("parsed", {}).get(key) == results:
+            return
+        meta.setdefault("parsed", {})[key] = results
+        _write_atomic(_meta_path(url), meta)
+        _account(url)
+
+
+def cache_stats():
+    """Размер кэша ответов: записей, байт и пределы"""
+    with _lock:
+        index = _load_index()
+        max_entries, max_bytes = _cache_limits()
+        return {"entries": len(index), "bytes": _index_bytes, "max_entries": max_entries, "max_bytes": max_bytes}
+
+
+def clear_cache():
+    global _index, _index_bytes
+    with _lock:
+        _index, _index_bytes = None, 0
+        if not os.path.isdir(CACHE_DIR):
+            return
+        for name in os.listdir(CACHE_DIR):
+            os.remove(os.path.join(CACHE_DIR, name))
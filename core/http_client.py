@@ -0,0 +1,159 @@
+# core/http_client.py
+
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import select_proxy
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from core import rate_limiter
+from core.storage import load_settings
+
+# Размеры пулов по умолчанию (переопределяются в user_settings.json)
+DEFAULT_POOL_CONNECTIONS = 10   # сколько хостов держим в пуле
+DEFAULT_POOL_MAXSIZE = 20       # сколько keep-alive сокетов на один хост
+
+_lock = threading.Lock()
+_adapter = None
+_host_stats = {}  # (host, proxy) -> {"requests": n, "new_connections": n, "reused": n}
+
+
+# ========= Счётчики переиспользования соединений =========
+
+def record_connection(host, reused, proxy=None):
+    """Учитывает выдачу соединения для хоста: новое или взятое из пула."""
+    key = (host, proxy or "")
+    with _lock:
+        stats = _host_stats.setdefault(key, {"requests": 0, "new_connections": 0, "reused": 0})
+        stats["requests"] += 1
+        if reused:
+            stats["reused"] += 1
+        else:
+            stats["new_connections"] += 1
+
+
+def connection_stats():
+    """
+    Возвращает счётчики по хостам:
+    {"example.com": {"requests": 10, "new_connections": 1, "reused": 9}, ...}
+    Запросы через прокси помечаются как "host via proxy".
+    """
+    with _lock:
+        items = list(_host_stats.items())
+
+    result = {}
+    for (host, proxy), stats in items:
+        label = f"{host} via {proxy}" if proxy else host
+        result[label] = dict(stats)
+    return result
+
+
+def reset_connection_stats():
+    with _lock:
+        _host_stats.clear()
+
+
+class _CountingPoolMixin:
+    """Пул urllib3, который сообщает, был ли сокет переиспользован."""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        # У живого keep-alive соединения уже есть сокет, у нового — ещё нет
+        reused = getattr(conn, "sock", None) is not None
+        proxy = self.proxy.url if self.proxy else None
+        record_connection(self.host, reused, proxy)
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+_POOL_CLASSES = {
+    "http": _CountingHTTPConnectionPool,
+    "https": _CountingHTTPSConnectionPool,
+}
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter с общими keep-alive пулами на хост и на прокси.
+    Каждый запрос (и каждый редирект) проходит через лимит частоты своего хоста.
+    """
+
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).hostname or ""
+        proxy = select_proxy(request.url, kwargs.get("proxies"))
+        limiter = rate_limiter.get_limiter()
+
+        limiter.acquire(host, proxy)
+        response = super().send(request, **kwargs)
+        limiter.observe(host, response.status_code, response.headers.get("Retry-After"), proxy)
+        return response
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _POOL_CLASSES
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        # SOCKS-прокси используют свои классы пулов — их не трогаем
+        if not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = _POOL_CLASSES
+        return manager
+
+
+# ========= Общий адаптер и сессии =========
+
+def get_adapter():
+    """Возвращает общий на весь процесс адаптер с пулами соединений."""
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            settings = load_settings()
+            _adapter = PooledAdapter(
+                pool_connections=settings.get("http_pool_connections", DEFAULT_POOL_CONNECTIONS),
+                pool_maxsize=settings.get("http_pool_maxsize", DEFAULT_POOL_MAXSIZE),
+            )
+        return _adapter
+
+
+def configure(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """Пересоздаёт общий адаптер с новыми размерами пулов."""
+    global _adapter
+    with _lock:
+        old = _adapter
+        _adapter = PooledAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    if old is not None:
+        old.close()
+
+
+def new_session(cookies=None):
+    """
+    Создаёт лёгкую requests.Session поверх общего адаптера.
+    Куки у каждой сессии свои, а TCP/TLS соединения — общие.
+    Закрывать такую сессию не нужно: close() закрыл бы общие пулы.
+    """
+    session = requests.Session()
+    adapter = get_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if cookies:
+        session.cookies.update(cookies)
+    return session
+
+
+def get(url, **kwargs):
+    """requests.get через общие пулы соединений."""
+    return new_session().get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    """requests.head через общие пулы соединений."""
+    return new_session().head(url, **kwargs)
@@ -0,0 +1,137 @@
+# core/job_queue.py
+
+import heapq
+import itertools
+import time
+from collections import deque
+
+# Приоритеты: чем меньше число, тем раньше задача уйдёт в работу
+PRIORITY_MANUAL = 0       # запуск кнопкой / из меню
+PRIORITY_SCHEDULED = 10   # запуск по таймеру
+
+# Результаты постановки в очередь
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+FULL = "full"
+
+DEFAULT_CAPACITY = 500
+DEFAULT_HISTORY_SIZE = 200
+
+
+class JobQueue:
+    """
+    Ограниченная очередь задач с приоритетами.
+    Одна и та же задача (key) не может стоять в очереди или выполняться дважды.
+    Хранит время ожидания и выполнения последних задач.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_running=20, history_size=DEFAULT_HISTORY_SIZE):
+        self.capacity = capacity
+        self.max_running = max_running
+        self._heap = []                 # (priority, seq, key); seq совпадает с job["seq"] живой записи
+        self._seq = itertools.count()
+        self._queued = {}               # key -> job
+        self._running = {}              # key -> job
+        self._history = deque(maxlen=history_size)
+        self.rejected = {DUPLICATE: 0, FULL: 0}
+
+    # ========= Постановка и выдача =========
+
+    def push(self, key, payload, priority=PRIORITY_MANUAL):
+        """
+        Ставит задачу в очередь.
+        :return: QUEUED, DUPLICATE (уже в очереди / выполняется) или FULL
+        """
+        if key in self._queued or key in self._running:
+            self.rejected[DUPLICATE] += 1
+            return DUPLICATE
+        if len(self._queued) >= self.capacity:
+            self.rejected[FULL] += 1
+            return FULL
+
+        seq = next(self._seq)
+        job = {
+            "key": key,
+            "seq": seq,
+            "payload": payload,
+            "priority": priority,
+            "enqueued_at": time.monotonic(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._queued[key] = job
+        heapq.heappush(self._heap, (priority, seq, key))
+        return QUEUED
+
+    def pop(self):
+        """Выдаёт следующую задачу, если не превышен лимит одновременных запусков"""
+        if len(self._running) >= self.max_running or not self._heap:
+            return None
+
+        while self._heap:
+            _, seq, key = heapq.heappop(self._heap)
+            job = self._queued.get(key)
+            # Записи кучи, снятые через remove(), пропускаем — даже если key с тех пор поставлен заново
+            if job is not None and job["seq"] == seq:
+                del self._queued[key]
+                job["started_at"] = time.monotonic()
+                self._running[key] = job
+                return job
+        return None
+
+    def remove(self, key):
+        """Снимает задачу, ещё стоящую в очереди (например, удалённую из таблицы)"""
+        if self._queued.pop(key, None) is None:
+            return False
+        # Мёртвых записей в куче больше половины — пересобираем её из живых
+        if len(self._heap) > 2 * len(self._queued):
+            self._heap = [entry for entry in self._heap if self._queued.get(entry[2], {}).get("seq") == entry[1]]
+            heapq.heapify(self._heap)
+        return True
+
+    def finish(self, key):
+        """Отмечает задачу завершённой и возвращает её запись со временем"""
+        job = self._running.pop(key, None)
+        if job is None:
+            return None
+
+        job["finished_at"] = time.monotonic()
+        record = {
+            "key": key,
+            "priority": job["priority"],
+            "wait_time": job["started_at"] - job["enqueued_at"],
+            "run_time": job["finished_at"] - job["started_at"],
+        }
+        self._history.append(record)
+        return record
+
+    def is_pending(self, key):
+        return key in self._queued or key in self._running
+
+    # ========= Метрики =========
+
+    @property
+    def depth(self):
+        return len(self._queued)
+
+    @property
+    def running(self):
+        return len(self._running)
+
+    def history(self):
+        """Последние завершённые задачи: key, priority, wait_time, run_time"""
+        return list(self._history)
+
+    def stats(self):
+        history = self._history
+        count = len(history)
+        return {
+            "depth": self.depth,
+            "running": self.running,
+            "capacity": self.capacity,
+            "rejected_duplicate": self.rejected[DUPLICATE],
+            "rejected_full": self.rejected[FULL],
+            "avg_wait": sum(r["wait_time"] for r in history) / count if count else 0.0,
+            "avg_run": sum(r["run_time"] for r in history) / count if count else 0.0,
+            "max_wait": max((r["wait_time"] for r in history), default=0.0),
+        }
@@ -0,0 +1,115 @@
+# core/parse_pool.py
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.storage import load_settings
+
+# Тела меньше этого размера дешевле разобрать в своём процессе, чем пересылать
+DEFAULT_MIN_SIZE = 256 * 1024
+
+
+def default_workers():
+    """Число процессов по умолчанию: ядра минус одно (для GUI / event loop)"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def parse_job(body, encoding, url, selector, method, output):
+    """
+    Выполняется в дочернем процессе: байты тела + селектор -> готовые результаты.
+    Туда и обратно идут только bytes и компактные списки строк / словарей.
+    """
+    from core.scraper import parse_body, extract_tree_for_method  # scraper сам импортирует этот модуль
+    return extract_tree_for_method(parse_body(body, encoding), url, selector, method, output)
+
+
+def inline_limit(pool, headers):
+    """
+    Сколько байт тела разбирать по мере загрузки в этом процессе (parse_limit у StreamingPage).
+    Без пула — всё (None). С пулом: заявленный Content-Length не меньше min_size — ничего (0),
+    тело сразу копится для пула; иначе (мало или длина неизвестна: chunked, gzip) — разбор
+    на месте, пока загруженное не перевалит за min_size.
+    """
+    if pool is None:
+        return None
+    length = (headers.get("Content-Length") or "").strip()
+    if length.isdigit() and int(length) >= pool.min_size:
+        return 0
+    return pool.min_size
+
+
+def use_pool(pool, page):
+    """Отдать ли накопленное тело в пул (маленькие тела дешевле разобрать на месте)"""
+    return pool is not None and not page.parsed and page.size >= pool.min_size
+
+
+class ParsePool:
+    """
+    Пул процессов для разбора HTML: lxml держит GIL, поэтому большие страницы
+    разбираются параллельно в разных процессах, а не по очереди в одном.
+    Процессы запускаются при первом разборе.
+    """
+
+    def __init__(self, workers=None, min_size=DEFAULT_MIN_SIZE):
+        self.workers = workers or default_workers()
+        self.min_size = min_size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: дочерний процесс не наследует потоки Qt и event loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def submit(self, body, encoding, url, selector, method, output):
+        """:return: concurrent.futures.Future с результатами разбора"""
+        try:
+            return self._get_executor().submit(parse_job, body, encoding, url, selector, method, output)
+        except BrokenProcessPool:
+            # Процесс упал (например, убит по памяти) — пересоздаём пул один раз
+            self.shutdown(wait=False)
+            return self._get_executor().submit(parse_job, body, encoding, url, selector, method, output)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# ========= Общий пул процесса =========
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """
+    Общий пул по настройке parse_workers: None — по числу ядер, 0 — без пула
+    (разбор в потоках этого процесса).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = load_settings()
+            workers = settings.get("parse_workers")
+            if workers == 0:
+                return None
+            _pool = ParsePool(workers, settings.get("parse_pool_min_size", DEFAULT_MIN_SIZE))
+        return _pool
+
+
+def shutdown_parse_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,319 @@
+# core/proxy_pool.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+import aiohttp
+
+from core.storage import load_settings
+
+# Пул прокси по умолчанию (переопределяется в user_settings.json)
+DEFAULT_PROXY_LIST = "proxies.txt"             # по одному прокси на строку, # — комментарий
+DEFAULT_CHECK_URL = "https://httpbin.org/ip"   # любой быстрый URL, отвечающий 200
+DEFAULT_CHECK_TIMEOUT = 5                      # сек на одну проверку
+DEFAULT_CHECK_INTERVAL = 300                   # сек между фоновыми проверками (0 — только вручную)
+DEFAULT_CHECK_CONCURRENCY = 20                 # одновременных проверок
+DEFAULT_MAX_FAILURES = 3                       # ошибок подряд, после которых прокси выбывает из ротации
+DEFAULT_DIRECT_FALLBACK = False                # без живых прокси идти напрямую (со своего IP)
+
+LATENCY_ALPHA = 0.3       # вес нового замера в скользящей средней задержки
+UNKNOWN_LATENCY = 1.0     # сек — оценка для прокси без замеров
+
+# Состояния прокси
+UNCHECKED = "unchecked"
+ALIVE = "alive"
+DEAD = "dead"
+
+
+class NoLiveProxiesError(Exception):
+    """Ротация включена, но живых прокси нет — запрос напрямую не отправляем"""
+
+    def __init__(self):
+        super().__init__("No live proxies in the pool")
+
+
+def normalize_proxy(value):
+    """'1.2.3.4:8080' -> 'http://1.2.3.4:8080'; пустые строки и комментарии -> None"""
+    value = (value or "").split("#", 1)[0].strip()
+    if not value:
+        return None
+    return value if "://" in value else f"http://{value}"
+
+
+def load_proxy_list(path):
+    """Читает список прокси из файла; нет файла — пустой список"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        proxies = (normalize_proxy(line) for line in file)
+        return list(dict.fromkeys(p for p in proxies if p))
+
+
+class ProxyStats:
+    """Здоровье одного прокси: скользящая задержка, успехи/ошибки и число запросов в полёте"""
+
+    def __init__(self, url):
+        self.url = url
+        self.state = UNCHECKED
+        self.latency = None          # EWMA, сек
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.last_error = ""
+        self.last_checked = 0.0
+
+    def success_rate(self):
+        total = self.successes + self.failures
+        # Сглаживание: новый прокси не получает ни 0%, ни 100%
+        return (self.successes + 1) / (total + 2)
+
+    def score(self):
+        """Ожидаемая «цена» запроса, меньше — лучше: задержка с учётом очереди и доли ошибок"""
+        latency = self.latency if self.latency is not None else UNKNOWN_LATENCY
+        return latency * (1 + self.in_flight) / self.success_rate()
+
+    def observe_latency(self, seconds):
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency = LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * self.latency
+
+
+class ProxyPool:
+    """
+    Пул прокси с оценкой здоровья и ротацией.
+    Запрос получает лучший из двух случайных живых прокси (power of two choices)
+    по score(): медленный или перегруженный прокси быстро теряет долю трафика,
+    но не получает её целиком никто — нагрузка не сваливается в один прокси.
+    После max_failures ошибок подряд прокси выбывает из ротации до успешной проверки.
+    """
+
+    def __init__(self, proxies=(), check_url=DEFAULT_CHECK_URL, check_timeout=DEFAULT_CHECK_TIMEOUT,
+                 check_interval=DEFAULT_CHECK_INTERVAL, check_concurrency=DEFAULT_CHECK_CONCURRENCY,
+                 max_failures=DEFAULT_MAX_FAILURES):
+        self.check_url = check_url
+        self.check_timeout = check_timeout
+        self.check_interval = check_interval
+        self.check_concurrency = max(1, check_concurrency)
+        self.max_failures = max(1, max_failures)
+        self._proxies = {url: ProxyStats(url) for url in proxies}
+        self._lock = threading.Lock()
+        self._checking = False
+        self._last_check = 0.0
+
+    def __len__(self):
+        return len(self._proxies)
+
+    def set_proxies(self, proxies):
+        """Заменяет список, сохраняя статистику прокси, которые в нём остались"""
+        with self._lock:
+            self._proxies = {url: self._proxies.get(url) or ProxyStats(url) for url in proxies}
+
+    # ========= Ротация =========
+
+    def acquire(self):
+        """
+        Выбирает прокси для запроса и учитывает его «в полёте».
+        После запроса обязательно вызвать release().
+        :return: URL прокси или None, если живых нет
+        """
+        self.check_in_background()
+        with self._lock:
+            candidates = [s for s in self._proxies.values() if s.state != DEAD]
+            if not candidates:
+                return None
+            if len(candidates) > 1:
+                first, second = random.sample(candidates, 2)
+                chosen = first if first.score() <= second.score() else second
+            else:
+                chosen = candidates[0]
+            chosen.in_flight += 1
+            return chosen.url
+
+    def release(self, proxy, ok, latency=None, error=""):
+        """
+        Итог запроса через прокси.
+        :param ok: False — прокси не ответил (обрыв, таймаут); HTTP-ошибки сайта сюда не относятся.
+                   None — запрос отменён, прокси не оцениваем
+        """
+        with self._lock:
+            stats = self._proxies.get(proxy)
+            if stats is None:
+                return
+            stats.in_flight = max(0, stats.in_flight - 1)
+            if ok is not None:
+                self._record(stats, ok, latency, error)
+
+    def _record(self, stats, ok, latency, error):
+        if ok:
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.state = ALIVE
+            if latency is not None:
+                stats.observe_latency(latency)
+        else:
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            stats.last_error = error
+            if stats.consecutive_failures >= self.max_failures:
+                stats.state = DEAD
+
+    # ========= Проверка здоровья =========
+
+    def check_all(self, engine=None):
+        """
+        Проверяет все прокси параллельно (не больше check_concurrency за раз)
+        запросом к check_url. Блокирует до конца проверки.
+        Проверка идёт в event loop движка (по умолчанию общего), а не в потоке вызова —
+        у него может быть свой запущенный loop. Из потока движка — только await check_all_async().
+        :return: stats() после проверки
+        """
+        if engine is None:
+            from core.async_engine import get_engine  # async_engine сам импортирует этот модуль
+            engine = get_engine()
+        if engine.in_engine_thread():
+            raise RuntimeError("check_all() would block the engine loop, await check_all_async() instead")
+        return engine.run_coroutine(self.check_all_async()).result()
+
+    async def check_all_async(self):
+        """Та же проверка, что check_all(), для вызова из event loop"""
+        with self._lock:
+            proxies = list(self._proxies)
+        if proxies:
+            results = await self._check_many(proxies)
+            now = time.monotonic()
+            with self._lock:
+                for proxy, (ok, latency, error) in zip(proxies, results):
+                    stats = self._proxies.get(proxy)
+                    if stats is None:
+                        continue
+                    stats.last_checked = now
+                    if ok:
+                        self._record(stats, True, latency, "")
+                    else:
+                        # Проверка решает сразу: не ответил на check_url — вне ротации
+                        stats.consecutive_failures = self.max_failures - 1
+                        self._record(stats, False, None, error)
+        with self._lock:
+            self._last_check = time.monotonic()
+        return self.stats()
+
+    async def _check_many(self, proxies):
+        semaphore = asyncio.Semaphore(self.check_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.check_timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+
+            async def check(proxy):
+                async with semaphore:
+                    return await self._check_one(session, proxy)
+
+            return await asyncio.gather(*(check(proxy) for proxy in proxies))
+
+    async def _check_one(self, session, proxy):
+        started = time.monotonic()
+        try:
+            async with session.get(self.check_url, proxy=proxy) as response:
+                await response.read()
+                if response.status >= 400:
+                    return False, None, f"HTTP {response.status}"
+        except Exception as e:
+            return False, None, str(e) or type(e).__name__
+        return True, time.monotonic() - started, ""
+
+    def check_in_background(self):
+        """Запускает фоновую проверку, если прошлая была дольше check_interval назад"""
+        with self._lock:
+            due = self.check_interval and time.monotonic() - self._last_check >= self.check_interval
+            if not due or self._checking or not self._proxies:
+                return False
+            self._checking = True
+
+        def run():
+            try:
+                self.check_all()
+            finally:
+                with self._lock:
+                    self._checking = False
+
+        threading.Thread(target=run, name="ProxyCheck", daemon=True).start()
+        return True
+
+    def stats(self):
+        """
+        Состояние по прокси:
+        {"http://1.2.3.4:8080": {"state": "alive", "latency": 0.4, "success_rate": 0.95,
+                                 "requests": 20, "in_flight": 1, "last_error": ""}}
+        """
+        with self._lock:
+            return {
+                url: {
+                    "state": s.state,
+                    "latency": s.latency,
+                    "success_rate": s.success_rate(),
+                    "requests": s.successes + s.failures,
+                    "in_flight": s.in_flight,
+                    "last_error": s.last_error,
+                }
+                for url, s in self._proxies.items()
+            }
+
+
+# ========= Выбор прокси для запроса =========
+
+def rotation_enabled(settings=None):
+    settings = load_settings() if settings is None else settings
+    return bool(settings.get("proxy_rotation", False))
+
+
+def pick_proxy(explicit=None, settings=None):
+    """
+    Прокси для запроса: заданный в параметрах задачи важнее ротации.
+    Если живых прокси нет, бросает NoLiveProxiesError (прямой запрос — только при proxy_direct_fallback).
+    :param settings: уже загруженные настройки (движок читает их один раз, а не на каждый запрос)
+    :return: (proxy, pooled) — pooled=True, если прокси взят из пула и его надо вернуть через release()
+    """
+    if explicit:
+        return explicit, False
+    settings = load_settings() if settings is None else settings
+    if not rotation_enabled(settings):
+        return None, False
+    proxy = get_proxy_pool().acquire()
+    if proxy is None:
+        if not settings.get("proxy_direct_fallback", DEFAULT_DIRECT_FALLBACK):
+            raise NoLiveProxiesError()
+        return None, False
+    return proxy, True
+
+
+# ========= Общий пул процесса =========
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool():
+    """Общий пул по настройкам proxy_list / proxy_check_* / proxy_max_failures"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = load_settings()
+            _pool = ProxyPool(
+                load_proxy_list(settings.get("proxy_list", DEFAULT_PROXY_LIST)),
+                check_url=settings.get("proxy_check_url", DEFAULT_CHECK_URL),
+                check_timeout=settings.get("proxy_check_timeout", DEFAULT_CHECK_TIMEOUT),
+                check_interval=settings.get("proxy_check_interval", DEFAULT_CHECK_INTERVAL),
+                check_concurrency=settings.get("proxy_check_concurrency", DEFAULT_CHECK_CONCURRENCY),
+                max_failures=settings.get("proxy_max_failures", DEFAULT_MAX_FAILURES),
+            )
+        return _pool
+
+
+def reload_proxy_list():
+    """Перечитывает файл со списком прокси в общий пул"""
+    pool = get_proxy_pool()
+    pool.set_proxies(load_proxy_list(load_settings().get("proxy_list", DEFAULT_PROXY_LIST)))
+    return pool
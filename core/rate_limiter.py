@@ -0,0 +1,215 @@
+# core/rate_limiter.py
+
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from core.storage import load_settings
+
+# Лимиты по умолчанию (переопределяются в user_settings.json)
+DEFAULT_RATE = 2.0        # запросов в секунду на хост; 0 — без ограничения
+DEFAULT_BURST = 4         # сколько запросов можно отправить подряд без пауз
+
+MIN_RATE = 0.1            # ниже этой частоты при 429/503 не опускаемся
+BACKOFF_FACTOR = 0.5      # во сколько раз снижаем частоту после 429/503
+RECOVERY_STEP = 0.05      # на какую долю базовой частоты растём после каждого успешного ответа
+MAX_RETRY_AFTER = 300     # дольше этого Retry-After не ждём
+RATE_WINDOW = 10.0        # окно (сек) для наблюдаемой частоты запросов
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def host_of(url):
+    return urlparse(url).hostname or ""
+
+
+def parse_retry_after(value):
+    """Retry-After в секундах: число или HTTP-дата; None, если заголовка нет / он битый"""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return min(max(0.0, (when - datetime.now(timezone.utc)).total_seconds()), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """
+    Token bucket одного хоста в виде «расписания» (GCRA): вместо счётчика
+    токенов хранится время, когда освободится следующий слот. Так очередь
+    запросов растягивается равномерно, а не пачками после простоя.
+    Частота сама снижается после 429/503 и медленно возвращается к базовой.
+    """
+
+    def __init__(self, rate, burst):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.next_slot = 0.0        # theoretical arrival time (monotonic)
+        self.blocked_until = 0.0    # Retry-After / пауза после 429
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self.recent = deque()       # время последних отправок для наблюдаемой частоты
+
+    def reserve(self, now):
+        """Занимает слот и возвращает, сколько секунд ждать до отправки"""
+        interval = 1.0 / self.rate
+        tolerance = (self.burst - 1) * interval
+        send_at = max(now, self.next_slot - tolerance, self.blocked_until)
+        self.next_slot = max(self.next_slot, send_at) + interval
+
+        self.requests += 1
+        self.waited += send_at - now
+        self.record(send_at, now)
+        return send_at - now
+
+    def record(self, sent_at, now):
+        """Запоминает отправку; старше окна RATE_WINDOW выбрасываются сразу, чтобы очередь не росла"""
+        self.recent.append(sent_at)
+        self._prune(now)
+
+    def throttle(self, now, retry_after=None):
+        """Ответ 429/503: снижаем частоту и держим паузу (Retry-After или один новый интервал)"""
+        self.throttled += 1
+        self.rate = max(MIN_RATE, self.rate * BACKOFF_FACTOR)
+        pause = retry_after if retry_after is not None else 1.0 / self.rate
+        self.blocked_until = max(self.blocked_until, now + pause)
+        # Уже выданные слоты тоже сдвигаются за паузу
+        self.next_slot = max(self.next_slot, self.blocked_until)
+
+    def recover(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def _prune(self, now):
+        while self.recent and self.recent[0] < now - RATE_WINDOW:
+            self.recent.popleft()
+
+    def observed_rate(self, now):
+        self._prune(now)
+        return sum(1 for t in self.recent if t <= now) / RATE_WINDOW
+
+
+class RateLimiter:
+    """
+    Лимиты частоты запросов по хостам (и, по желанию, по прокси).
+    Синхронный код вызывает acquire(), асинхронный — reserve() и asyncio.sleep(),
+    пока blocked_for() не станет нулём.
+    После ответа нужно вызвать observe(), чтобы лимит подстроился под 429/503.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, per_proxy=False):
+        self.rate = rate
+        self.burst = burst
+        self.per_proxy = per_proxy
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _key(self, host, proxy=None):
+        return f"{host} via {proxy}" if self.per_proxy and proxy else host
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate or DEFAULT_RATE, self.burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    def reserve(self, host, proxy=None):
+        """:return: сколько секунд подождать перед запросом (0 — можно сразу)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(self._key(host, proxy))
+            if not self.rate:
+                bucket.requests += 1
+                bucket.record(now, now)
+                return 0.0
+            return bucket.reserve(now)
+
+    def blocked_for(self, host, proxy=None):
+        """
+        Сколько ещё длится пауза после 429/503. Проверяется после ожидания слота:
+        слот мог быть выдан до того, как сервер попросил подождать.
+        """
+        with self._lock:
+            bucket = self._buckets.get(self._key(host, proxy))
+            return max(0.0, bucket.blocked_until - time.monotonic()) if bucket else 0.0
+
+    def acquire(self, host, proxy=None):
+        """Блокирующий вариант для потоков: ждёт свой слот и конец паузы Retry-After"""
+        waited = 0.0
+        delay = self.reserve(host, proxy)
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            delay = self.blocked_for(host, proxy)
+        return waited
+
+    def observe(self, host, status, retry_after=None, proxy=None):
+        """Учитывает ответ: 429/503 снижают частоту, успешные ответы её восстанавливают"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(self._key(host, proxy))
+            if status in THROTTLE_STATUSES:
+                bucket.throttle(now, parse_retry_after(retry_after))
+            elif status < 400:
+                bucket.recover()
+
+    def stats(self):
+        """
+        Текущее состояние по хостам:
+        {"example.com": {"rate": 1.0, "base_rate": 2.0, "observed": 0.9, "requests": 42,
+                         "throttled": 1, "blocked_for": 0.0, "waited": 12.5}}
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: {
+                    "rate": bucket.rate if self.rate else 0.0,
+                    "base_rate": bucket.base_rate if self.rate else 0.0,
+                    "observed": bucket.observed_rate(now),
+                    "requests": bucket.requests,
+                    "throttled": bucket.throttled,
+                    "blocked_for": max(0.0, bucket.blocked_until - now),
+                    "waited": bucket.waited,
+                }
+                for key, bucket in self._buckets.items()
+            }
+
+
+# ========= Общий лимитер процесса =========
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Общий лимитер по настройкам rate_limit_per_host / rate_limit_burst / rate_limit_per_proxy"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            settings = load_settings()
+            _limiter = RateLimiter(
+                rate=settings.get("rate_limit_per_host", DEFAULT_RATE),
+                burst=settings.get("rate_limit_burst", DEFAULT_BURST),
+                per_proxy=settings.get("rate_limit_per_proxy", False),
+            )
+        return _limiter
+
+
+def configure(rate=DEFAULT_RATE, burst=DEFAULT_BURST, per_proxy=False):
+    """Заменяет общий лимитер (например, после изменения настроек)"""
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(rate, burst, per_proxy)
+        return _limiter
@@ -0,0 +1,210 @@
+# core/retry_policy.py
+
+import asyncio
+import random
+import threading
+import time
+
+import aiohttp
+import requests
+
+from core.storage import load_settings
+
+# Повторы по умолчанию (переопределяются в user_settings.json и параметрах задачи)
+DEFAULT_RETRIES = 2            # повторов после первой попытки
+DEFAULT_BACKOFF = 1.0          # базовая пауза, сек: 1, 2, 4... (с джиттером)
+DEFAULT_BACKOFF_MAX = 30.0     # дольше между попытками не ждём
+
+# Circuit breaker по хостам
+DEFAULT_BREAKER_THRESHOLD = 5  # ошибок подряд, после которых хост «выключается»
+DEFAULT_BREAKER_COOLDOWN = 60  # сек без запросов к выключенному хосту
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BREAKER_STATUSES = (500, 502, 503, 504)   # 429 — хост жив, им занимается rate_limiter
+
+# Состояния breaker
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Хост недавно падал подряд — запрос не отправляем до конца паузы"""
+
+    def __init__(self, host, retry_in, failures):
+        super().__init__(f"Circuit open for {host}: {failures} failures in a row, retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+        self.failures = failures
+
+
+def error_status(error):
+    """HTTP-статус из исключения aiohttp / requests (None — ошибка не HTTP)"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code
+    return None
+
+
+def is_transient(error):
+    """Стоит ли повторять: обрывы соединения, таймауты, 429 и 5xx. Ошибки селектора и 4xx — нет"""
+    status = error_status(error)
+    if status is not None:
+        return status in RETRY_STATUSES
+    return isinstance(error, (
+        aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError,
+        requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError,
+    ))
+
+
+def is_connection_error(error):
+    """Ответа не было вовсе (обрыв, таймаут) — виноват канал: хост или прокси"""
+    return error_status(error) is None and is_transient(error)
+
+
+def is_host_failure(error):
+    """Считается ли ошибка против хоста (для breaker): хост не отвечает или отвечает 5xx"""
+    status = error_status(error)
+    if status is not None:
+        return status in BREAKER_STATUSES
+    return is_transient(error)
+
+
+def retry_policy(params=None, settings=None):
+    """
+    Политика повторов задачи: параметры задачи (retries, retry_backoff) важнее
+    глобальных настроек.
+    :param settings: уже загруженные настройки (None — прочитать файл)
+    :return: {"retries": 2, "backoff": 1.0, "backoff_max": 30.0}
+    """
+    params = params or {}
+    settings = load_settings() if settings is None else settings
+    retries = params.get("retries")
+    backoff = params.get("retry_backoff")
+    return {
+        "retries": int(settings.get("retries", DEFAULT_RETRIES) if retries is None else retries),
+        "backoff": float(settings.get("retry_backoff", DEFAULT_BACKOFF) if backoff is None else backoff),
+        "backoff_max": float(settings.get("retry_backoff_max", DEFAULT_BACKOFF_MAX)),
+    }
+
+
+def backoff_delay(policy, attempt):
+    """
+    Пауза перед повтором номер attempt (с 1): экспонента с полным джиттером,
+    чтобы упавшие вместе задачи не возвращались к хосту одной волной.
+    """
+    ceiling = min(policy["backoff_max"], policy["backoff"] * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Breaker по хостам. После threshold ошибок подряд хост «открывается»:
+    запросы к нему сразу падают CircuitOpenError, не занимая слоты и не
+    дожидаясь таймаутов. После cooldown пропускается один пробный запрос
+    (half-open): успех закрывает breaker, ошибка открывает его снова.
+    """
+
+    def __init__(self, threshold=DEFAULT_BREAKER_THRESHOLD, cooldown=DEFAULT_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = {"state": CLOSED, "failures": 0, "opened_at": 0.0, "probing": False, "trips": 0}
+            self._hosts[host] = state
+        return state
+
+    def before_request(self, host):
+        """Проверяет хост перед запросом; CircuitOpenError, если он выключен"""
+        if not self.threshold:
+            return
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host)
+            if state["state"] == CLOSED:
+                return
+            retry_in = state["opened_at"] + self.cooldown - now
+            if state["state"] == OPEN and retry_in <= 0:
+                state["state"] = HALF_OPEN
+            if state["state"] == HALF_OPEN and not state["probing"]:
+                state["probing"] = True   # пробный запрос — только один
+                return
+            raise CircuitOpenError(host, max(0.0, retry_in), state["failures"])
+
+    def record_success(self, host):
+        with self._lock:
+            state = self._host(host)
+            state.update(state=CLOSED, failures=0, probing=False)
+
+    def release_probe(self, host):
+        """Запрос, пропущенный before_request(), так и не ушёл: пробный слот освобождается, состояние прежнее"""
+        with self._lock:
+            self._host(host)["probing"] = False
+
+    def record_failure(self, host):
+        """:return: True, если после этой ошибки breaker открылся"""
+        if not self.threshold:
+            return False
+        with self._lock:
+            state = self._host(host)
+            state["failures"] += 1
+            state["probing"] = False
+            if state["state"] == HALF_OPEN or (state["state"] == CLOSED and state["failures"] >= self.threshold):
+                state["state"] = OPEN
+                state["opened_at"] = time.monotonic()
+                state["trips"] += 1
+                return True
+            return False
+
+    def state(self, host):
+        """{"state": "open", "failures": 5, "retry_in": 42.0, "trips": 1}"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host)
+            retry_in = state["opened_at"] + self.cooldown - now if state["state"] == OPEN else 0.0
+            return {
+                "state": state["state"],
+                "failures": state["failures"],
+                "retry_in": max(0.0, retry_in),
+                "trips": state["trips"],
+            }
+
+    def stats(self):
+        with self._lock:
+            hosts = list(self._hosts)
+        return {host: self.state(host) for host in hosts}
+
+
+def describe_breaker(host, state):
+    """Короткая строка для подсказки в таблице задач"""
+    if state["state"] == OPEN:
+        return f"⛔ {host}: circuit open, {state['failures']} failures in a row, retry in {state['retry_in']:.0f}s"
+    if state["state"] == HALF_OPEN:
+        return f"🟡 {host}: probing after cool-down"
+    if state["failures"]:
+        return f"🟢 {host}: {state['failures']} failures in a row"
+    return f"🟢 {host}: ok"
+
+
+# ========= Общий breaker процесса =========
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_breaker():
+    """Общий breaker по настройкам breaker_threshold / breaker_cooldown (0 — выключен)"""
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            settings = load_settings()
+            _breaker = CircuitBreaker(
+                threshold=settings.get("breaker_threshold", DEFAULT_BREAKER_THRESHOLD),
+                cooldown=settings.get("breaker_cooldown", DEFAULT_BREAKER_COOLDOWN),
+            )
+        return _breaker
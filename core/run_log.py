@@ -0,0 +1,380 @@
+# core/run_log.py
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from core.storage import load_settings
+
+# История запусков: append-only JSONL-сегменты + SQLite-индекс по задаче и времени
+DEFAULT_RUN_LOG_DIR = os.path.join("data", "runs")
+DEFAULT_SEGMENT_MB = 16        # размер сегмента, после которого пишется следующий
+DEFAULT_MAX_SEGMENTS = 0       # 0 — хранить все сегменты
+
+_SEGMENT_NAME = "runs-{:06d}.jsonl"
+_SEGMENT_RE = re.compile(r"^runs-(\d{6})\.jsonl$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id      TEXT NOT NULL,
+    url          TEXT NOT NULL,
+    ran_at       TEXT NOT NULL,
+    duration     REAL NOT NULL,
+    status       TEXT NOT NULL,
+    bytes        INTEGER NOT NULL,
+    item_count   INTEGER NOT NULL,
+    results_hash TEXT,
+    has_results  INTEGER NOT NULL,
+    segment      INTEGER NOT NULL,
+    offset       INTEGER NOT NULL,
+    length       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_task ON runs (task_id, ran_at);
+CREATE INDEX IF NOT EXISTS runs_ran_at ON runs (ran_at);
+CREATE INDEX IF NOT EXISTS runs_hash ON runs (results_hash);
+CREATE INDEX IF NOT EXISTS runs_segment ON runs (segment, offset);
+"""
+
+
+class RunLog:
+    """
+    Журнал всех запусков задач. Каждый запуск — строка JSON в текущем сегменте
+    (task_id, url, ran_at, duration, status, message, bytes, results_hash, results);
+    файлы только дописываются, при превышении размера начинается новый сегмент.
+    Индекс (задача, время → сегмент и смещение) лежит в index.db рядом, поэтому
+    выборка по задаче или диапазону дат не читает сегменты, а результаты
+    читаются одним seek. Результаты, совпавшие по хэшу с прошлым запуском задачи,
+    повторно не пишутся — строка ссылается на хэш.
+    Запись идёт в фоновом потоке (append), чтение — из любого потока.
+    """
+
+    def __init__(self, directory=DEFAULT_RUN_LOG_DIR, segment_mb=DEFAULT_SEGMENT_MB,
+                 max_segments=DEFAULT_MAX_SEGMENTS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = max(1, int(segment_mb * 1024 * 1024))
+        self.max_segments = max_segments
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._last_hash = {}   # task_id -> хэш последних записанных результатов
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="run-log")
+        self._recover()
+
+    # ========= Запись =========
+
+    def append(self, records):
+        """Ставит записи в очередь фоновой записи. :return: Future"""
+        return self._executor.submit(self.write, list(records))
+
+    def write(self, records):
+        """
+        Дописывает запуски в текущий сегмент и индексирует их одной транзакцией.
+        :param records: словари task_id, url, ran_at, duration, status, message, bytes, results, results_hash
+        :return: число записанных запусков
+        """
+        if not records:
+            return 0
+        with self._lock:
+            segment = self._current_segment()
+            f = open(self._segment_path(segment), "ab")
+            try:
+                offset = f.tell()
+                rows = []
+                for record in records:
+                    line, row = self._encode(record)
+                    if offset and offset + len(line) > self.segment_bytes:
+                        # Ротация: сегмент заполнен — следующий файл
+                        self._sync_close(f)
+                        segment += 1
+                        f = open(self._segment_path(segment), "ab")
+                        offset = 0
+                    f.write(line)
+                    rows.append(row + (segment, offset, len(line)))
+                    offset += len(line)
+            finally:
+                self._sync_close(f)
+            # Индекс — после того как строки на диске: при сбое хвост переиндексирует _recover
+            self._index(rows)
+            self._drop_old_segments(segment)
+        return len(rows)
+
+    @staticmethod
+    def _sync_close(f):
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+
+    def _index(self, rows):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT INTO runs (task_id, url, ran_at, duration, status, bytes, item_count, results_hash,"
+                " has_results, segment, offset, length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _encode(self, record):
+        """:return: (строка JSONL в байтах, поля индекса без сегмента/смещения)"""
+        task_id = str(record["task_id"])
+        results = record.get("results") or []
+        results_hash = record.get("results_hash")
+        # Те же данные, что в прошлый раз, — только ссылка на хэш
+        has_results = bool(results) and (results_hash is None or results_hash != self._last_hash.get(task_id))
+        entry = {
+            "task_id": task_id,
+            "url": record.get("url", ""),
+            "ran_at": record["ran_at"],
+            "duration": round(float(record.get("duration") or 0), 3),
+            "status": record.get("status", ""),
+            "message": record.get("message", ""),
+            "bytes": int(record.get("bytes") or 0),   # размер тела ответа (0 — 304 или ошибка)
+            "results_hash": results_hash,
+        }
+        if has_results:
+            entry["results"] = results
+        if results_hash:
+            self._last_hash[task_id] = results_hash
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        return line, (task_id, entry["url"], entry["ran_at"], entry["duration"], entry["status"], entry["bytes"],
+                      len(results), results_hash, int(has_results))
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, _SEGMENT_NAME.format(segment))
+
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _current_segment(self):
+        segments = self._segments()
+        if not segments:
+            return 1
+        last = segments[-1]
+        if os.path.getsize(self._segment_path(last)) >= self.segment_bytes:
+            return last + 1
+        return last
+
+    def _drop_old_segments(self, current):
+        """
+        Ротация: старые сегменты сверх max_segments удаляются вместе со строками индекса.
+        Результаты, на которые по хэшу ещё ссылаются оставшиеся запуски, сначала переносятся вперёд.
+        """
+        if not self.max_segments:
+            return
+        for segment in self._segments():
+            if segment > current - self.max_segments:
+                break
+            self._carry_forward(segment, current)
+            self._conn.execute("DELETE FROM runs WHERE segment = ?", (segment,))
+            os.remove(self._segment_path(segment))
+            # Результаты удалённого сегмента больше не на что ссылаться — следующие запуски пишут их заново
+            self._last_hash.clear()
+
+    def _carry_forward(self, segment, current):
+        """
+        Перед удалением сегмента: если результаты из него нужны запускам в оставшихся сегментах
+        (строки-ссылки на хэш), самый ранний такой запуск переписывается в текущий сегмент
+        целиком — с результатами, и его строка индекса указывает уже туда.
+        """
+        referencing = self._conn.execute(
+            "SELECT MIN(id) AS id, results_hash FROM runs"
+            " WHERE segment > ? AND has_results = 0 AND results_hash IN"
+            "  (SELECT results_hash FROM runs WHERE segment = ? AND has_results = 1)"
+            " AND results_hash NOT IN"
+            "  (SELECT results_hash FROM runs WHERE segment > ? AND has_results = 1 AND results_hash IS NOT NULL)"
+            " GROUP BY results_hash", (segment, segment, segment)
+        ).fetchall()
+        if not referencing:
+            return
+        moved = []
+        f = open(self._segment_path(current), "ab")
+        try:
+            offset = f.tell()
+            for ref in referencing:
+                run = self._conn.execute("SELECT * FROM runs WHERE id = ?", (ref["id"],)).fetchone()
+                entry = self.read(dict(run))
+                if entry is None or not entry["results"]:
+                    continue
+                entry["carried"] = True   # копия старого запуска, _recover её не индексирует
+                line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                f.write(line)
+                moved.append((current, offset, len(line), run["id"]))
+                offset += len(line)
+        finally:
+            self._sync_close(f)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "UPDATE runs SET segment = ?, offset = ?, length = ?, has_results = 1 WHERE id = ?", moved
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _recover(self):
+        """
+        Индексирует строки последнего сегмента, записанные, но не попавшие в индекс
+        (сбой между записью и индексом); недописанная последняя строка отрезается.
+        item_count у строки-ссылки на хэш восстановленного запуска будет 0.
+        Заодно восстанавливает хэши последних результатов задач.
+        """
+        segments = self._segments()
+        with self._lock:
+            for row in self._conn.execute(
+                "SELECT task_id, results_hash FROM runs WHERE id IN"
+                " (SELECT MAX(id) FROM runs WHERE results_hash IS NOT NULL GROUP BY task_id)"
+            ):
+                self._last_hash[row["task_id"]] = row["results_hash"]
+            if not segments:
+                return
+            segment = segments[-1]
+            path = self._segment_path(segment)
+            end = self._conn.execute(
+                "SELECT COALESCE(MAX(offset + length), 0) FROM runs WHERE segment = ?", (segment,)
+            ).fetchone()[0]
+            if os.path.getsize(path) <= end:
+                return
+            with open(path, "rb") as f:
+                f.seek(end)
+                tail = f.read()
+            complete = tail[:tail.rfind(b"\n") + 1]
+            rows = []
+            offset = end
+            for line in complete.splitlines(keepends=True):
+                try:
+                    entry = json.loads(line)
+                    if entry.get("carried"):
+                        offset += len(line)
+                        continue
+                    rows.append((str(entry["task_id"]), entry.get("url", ""), entry["ran_at"],
+                                 entry.get("duration", 0), entry.get("status", ""), entry.get("bytes", 0),
+                                 len(entry.get("results") or []), entry.get("results_hash"),
+                                 int("results" in entry), segment, offset, len(line)))
+                    if entry.get("results_hash"):
+                        self._last_hash[str(entry["task_id"])] = entry["results_hash"]
+                except (ValueError, KeyError):
+                    pass
+                offset += len(line)
+            if len(complete) < len(tail):
+                with open(path, "r+b") as f:
+                    f.truncate(end + len(complete))
+            self._index(rows)
+
+    # ========= Чтение =========
+
+    def runs(self, task_id=None, since=None, until=None, limit=None):
+        """
+        Запуски из индекса (без результатов), по времени.
+        :param since / until: "YYYY-MM-DD[ HH:MM:SS]", until не включается
+        """
+        sql = "SELECT * FROM runs WHERE 1 = 1"
+        params = []
+        if task_id is not None:
+            sql += " AND task_id = ?"
+            params.append(str(task_id))
+        if since:
+            sql += " AND ran_at >= ?"
+            params.append(since)
+        if until:
+            sql += " AND ran_at < ?"
+            params.append(until)
+        sql += " ORDER BY ran_at, id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def runs_on(self, day, task_id=None):
+        """Запуски за день "YYYY-MM-DD" """
+        next_day = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        return self.runs(task_id=task_id, since=day, until=next_day)
+
+    def run_days(self):
+        """Дни, в которые были запуски (для подсветки календаря)"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT substr(ran_at, 1, 10) FROM runs")]
+
+    def read(self, run):
+        """Полная запись запуска из сегмента (с результатами, даже если в строке только хэш)"""
+        entry = self._read_line(run["segment"], run["offset"], run["length"])
+        if entry is None:
+            return None
+        if "results" not in entry:
+            entry["results"] = self._results_by_hash(run.get("results_hash"))
+        return entry
+
+    def results(self, run):
+        entry = self.read(run)
+        return entry["results"] if entry else []
+
+    def _results_by_hash(self, results_hash):
+        if not results_hash:
+            return []
+        with self._lock:
+            source = self._conn.execute(
+                "SELECT segment, offset, length FROM runs WHERE results_hash = ? AND has_results = 1"
+                " ORDER BY id DESC LIMIT 1", (results_hash,)
+            ).fetchone()
+        if source is None:
+            return []   # сегмент с данными уже удалён ротацией
+        entry = self._read_line(source["segment"], source["offset"], source["length"])
+        return entry.get("results", []) if entry else []
+
+    def _read_line(self, segment, offset, length):
+        try:
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(offset)
+                return json.loads(f.read(length))
+        except (OSError, ValueError):
+            return None
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            self._conn.close()
+
+
+_run_log = None
+_run_log_lock = threading.Lock()
+
+
+def get_run_log():
+    """Общий журнал запусков по настройкам run_log_dir / run_log_segment_mb / run_log_max_segments"""
+    global _run_log
+    with _run_log_lock:
+        if _run_log is None:
+            settings = load_settings()
+            _run_log = RunLog(
+                settings.get("run_log_dir") or DEFAULT_RUN_LOG_DIR,
+                segment_mb=settings.get("run_log_segment_mb", DEFAULT_SEGMENT_MB),
+                max_segments=settings.get("run_log_max_segments", DEFAULT_MAX_SEGMENTS),
+            )
+        return _run_log
+
+
+def close_run_log():
+    """Дописывает очередь и закрывает журнал (при выходе из приложения)"""
+    global _run_log
+    with _run_log_lock:
+        if _run_log is not None:
+            _run_log.close()
+            _run_log = None
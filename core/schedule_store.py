@@ -0,0 +1,217 @@
+# core/schedule_store.py
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from core.storage import load_settings
+
+# Расписания задач переживают перезапуск программы: SQLite-файл рядом с очередью воркеров
+DEFAULT_STORE_PATH = os.path.join("data", "schedules.db")
+
+# Что делать с запусками, пропущенными, пока программа была закрыта
+CATCHUP_SKIP = "skip"     # пропустить, продолжить с ближайшего слота
+CATCHUP_ONCE = "once"     # один догоняющий запуск на задачу
+CATCHUP_ALL = "all"       # каждый пропущенный запуск (не больше catchup_max на задачу)
+CATCHUP_POLICIES = (CATCHUP_SKIP, CATCHUP_ONCE, CATCHUP_ALL)
+
+DEFAULT_CATCHUP = CATCHUP_ONCE
+DEFAULT_CATCHUP_RATE = 1.0    # догоняющих запусков в секунду на всю программу
+DEFAULT_CATCHUP_MAX = 10      # догоняющих запусков на одну задачу при политике "all"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedules (
+    key        TEXT PRIMARY KEY,
+    url        TEXT NOT NULL,
+    selector   TEXT NOT NULL,
+    method     TEXT NOT NULL,
+    params     TEXT NOT NULL DEFAULT '{}',
+    spec       TEXT NOT NULL,
+    next_run   REAL,
+    last_run   REAL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS missed_runs (
+    key        TEXT NOT NULL,
+    due_at     REAL NOT NULL,
+    policy     TEXT NOT NULL,
+    noticed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS missed_runs_key ON missed_runs (key, due_at);
+"""
+
+
+def new_schedule_key():
+    return uuid.uuid4().hex
+
+
+class ScheduleStore:
+    """
+    Постоянное хранилище расписаний: задача (url, selector, method, params),
+    её расписание, время следующего и последнего запуска.
+    Пропущенные за время простоя запуски записываются в missed_runs —
+    даже если политика их пропускает, видно, какие окна наблюдения выпали.
+    Один объект — одно соединение, использовать из GUI-потока.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, timeout=30):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def save(self, key, task, spec, next_run, last_run=None):
+        """Создаёт или обновляет расписание задачи"""
+        self._conn.execute(
+            "INSERT INTO schedules (key, url, selector, method, params, spec, next_run, last_run, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET url = excluded.url, selector = excluded.selector,"
+            " method = excluded.method, params = excluded.params, spec = excluded.spec,"
+            " next_run = excluded.next_run, last_run = COALESCE(excluded.last_run, schedules.last_run),"
+            " updated_at = excluded.updated_at",
+            (key, task.get("url", ""), task.get("selector", ""), task.get("method") or "CSS",
+             json.dumps(task.get("params") or {}, ensure_ascii=False), str(spec), next_run, last_run, time.time()),
+        )
+
+    def update_task(self, key, task):
+        """
+        Обновляет определение задачи (URL, селектор, метод, параметры) у существующего
+        расписания; время запусков не трогает. :return: True, если расписание есть
+        """
+        return self._conn.execute(
+            "UPDATE schedules SET url = ?, selector = ?, method = ?, params = ?, updated_at = ? WHERE key = ?",
+            (task.get("url", ""), task.get("selector", ""), task.get("method") or "CSS",
+             json.dumps(task.get("params") or {}, ensure_ascii=False), time.time(), key),
+        ).rowcount > 0
+
+    def mark_runs(self, runs):
+        """
+        Запоминает выполненные запуски одной транзакцией.
+        :param runs: [(key, last_run, next_run), ...]
+        """
+        if not runs:
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "UPDATE schedules SET last_run = ?, next_run = ?, updated_at = ? WHERE key = ?",
+                [(last_run, next_run, last_run, key) for key, last_run, next_run in runs],
+            )
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def delete(self, key):
+        self._conn.execute("DELETE FROM schedules WHERE key = ?", (key,))
+        self._conn.execute("DELETE FROM missed_runs WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn.execute("DELETE FROM schedules")
+        self._conn.execute("DELETE FROM missed_runs")
+
+    def all(self):
+        """Все расписания в порядке создания строк таблицы"""
+        cursor = self._conn.execute("SELECT * FROM schedules ORDER BY rowid")
+        result = []
+        for row in cursor:
+            entry = dict(row)
+            entry["params"] = json.loads(entry["params"] or "{}")
+            result.append(entry)
+        return result
+
+    def record_missed(self, key, due_times, policy, now=None):
+        """
+        Пропуски последнего простоя задачи. Записи прошлых простоев к этому времени
+        уже отработаны догоняющими запусками — они заменяются, а не копятся.
+        """
+        now = now or time.time()
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("DELETE FROM missed_runs WHERE key = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO missed_runs (key, due_at, policy, noticed_at) VALUES (?, ?, ?, ?)",
+                [(key, due_at, policy, now) for due_at in due_times],
+            )
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def prune_missed(self):
+        """Удаляет пропуски расписаний, которых больше нет. :return: число удалённых строк"""
+        return self._conn.execute("DELETE FROM missed_runs WHERE key NOT IN (SELECT key FROM schedules)").rowcount
+
+    def missed_count(self, key):
+        return self._conn.execute("SELECT COUNT(*) FROM missed_runs WHERE key = ?", (key,)).fetchone()[0]
+
+
+def catchup_settings():
+    """(политика, запусков в секунду, максимум на задачу) из user_settings.json"""
+    settings = load_settings()
+    policy = settings.get("schedule_catchup", DEFAULT_CATCHUP)
+    if policy not in CATCHUP_POLICIES:
+        policy = DEFAULT_CATCHUP
+    return (
+        policy,
+        float(settings.get("schedule_catchup_rate", DEFAULT_CATCHUP_RATE)) or DEFAULT_CATCHUP_RATE,
+        int(settings.get("schedule_catchup_max", DEFAULT_CATCHUP_MAX)),
+    )
+
+
+def restore_schedules(scheduler, entries, policy=DEFAULT_CATCHUP, rate=DEFAULT_CATCHUP_RATE,
+                      max_runs=DEFAULT_CATCHUP_MAX, store=None, now=None):
+    """
+    Ставит сохранённые расписания в планировщик и решает, что делать с пропущенным.
+    Задачи, чей next_run ещё впереди, сохраняют его (и свою фазу) — без толпы на старте.
+    Догоняющие запуски идут друг за другом с частотой rate, а не все сразу. При политике "all"
+    сразу ставится только первый запуск задачи, остальные — по одному через Scheduler.next_catchup(),
+    когда предыдущий завершился (иначе очередь отбросила бы их как дубли).
+    :param entries: словари с key, spec, next_run (ScheduleStore.all())
+    :return: {"restored": n, "missed": n, "catchup": n}
+    """
+    now = time.time() if now is None else now
+    summary = {"restored": 0, "missed": 0, "catchup": 0}
+    if store is not None:
+        store.prune_missed()
+    pending = []   # (due_at, key, backlog): первый догоняющий запуск задачи и сколько отложено за ним
+    for entry in entries:
+        key, next_run = entry["key"], entry.get("next_run")
+        overdue = next_run is not None and next_run <= now
+        when = scheduler.schedule(key, entry["spec"], now, next_run=None if overdue else next_run)
+        if when is None:
+            continue
+        summary["restored"] += 1
+        if not overdue:
+            continue
+
+        missed = [next_run] + scheduler.missed_runs(key, next_run, now)
+        summary["missed"] += len(missed)
+        if store is not None:
+            store.record_missed(key, missed, policy, now)
+        if policy == CATCHUP_ONCE:
+            pending.append((missed[-1], key, 0))
+        elif policy == CATCHUP_ALL and max_runs > 0:
+            runs = missed[-max_runs:]
+            pending.append((runs[0], key, len(runs) - 1))
+
+    pending.sort()
+    for index, (_, key, backlog) in enumerate(pending):
+        scheduler.run_once(key, now + index / rate, backlog)
+        summary["catchup"] += 1 + backlog
+    return summary
+
+
+def store_path_from_settings():
+    return load_settings().get("schedule_store_path") or DEFAULT_STORE_PATH
@@ -0,0 +1,297 @@
+# core/scheduler.py
+
+import heapq
+import itertools
+import time
+import zlib
+from datetime import datetime, timedelta
+
+# Разброс запусков по cron (переопределяется в user_settings.json)
+DEFAULT_CRON_JITTER = 30    # сек: задачи с одним cron-выражением стартуют не в одну секунду
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+# (минимум, максимум) полей cron: минута, час, день месяца, месяц, день недели (0 и 7 — воскресенье)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+CRON_SEARCH_DAYS = 366 * 5   # дальше не ищем — выражение вроде "0 0 31 2 *" не сработает никогда
+
+
+def key_fraction(key):
+    """Стабильное число [0, 1) для ключа задачи — одинаковое между запусками программы"""
+    return zlib.crc32(str(key).encode("utf-8")) / 2 ** 32
+
+
+class IntervalSchedule:
+    """
+    Запуск каждые N секунд. Фаза сдвинута на долю интервала по ключу задачи:
+    задачи с одинаковым интервалом равномерно распределены по нему, а не стартуют разом.
+    """
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_after(self, ts, key):
+        phase = key_fraction(key) * self.seconds
+        slots = (ts - phase) // self.seconds + 1
+        return phase + slots * self.seconds
+
+    def __str__(self):
+        return str(self.seconds)
+
+
+class CronSchedule:
+    """
+    Cron-выражение из пяти полей: минута час день месяц день_недели.
+    Поддерживаются *, списки (1,15), диапазоны (9-18), шаги (*/5, 0-30/10) и @hourly/@daily/...
+    Время — локальное. К моменту запуска добавляется сдвиг до jitter секунд по ключу задачи.
+    """
+
+    def __init__(self, expression, jitter=DEFAULT_CRON_JITTER):
+        self.expression = expression.strip()
+        self.jitter = jitter
+        fields = CRON_ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        parsed = [_parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}
+        # Как в cron: если заданы и день месяца, и день недели — подходит любой из них
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_time(self, after):
+        """Ближайшая подходящая минута строго после datetime after"""
+        moment = (after + timedelta(minutes=1)).replace(second=0, microsecond=0)
+        limit = moment + timedelta(days=CRON_SEARCH_DAYS)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+    def next_after(self, ts, key):
+        offset = key_fraction(key) * self.jitter
+        # Момент по расписанию, а не со сдвигом: иначе сдвиг мог бы «съесть» следующий запуск
+        return self.next_time(datetime.fromtimestamp(ts - offset)).timestamp() + offset
+
+    def __str__(self):
+        return self.expression
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Bad cron field: {field!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_schedule(spec, cron_jitter=DEFAULT_CRON_JITTER):
+    """
+    Расписание задачи из значения timer_interval: число секунд или cron-выражение.
+    :return: IntervalSchedule / CronSchedule или None, если таймер выключен
+    """
+    if spec in (None, "", 0, "0"):
+        return None
+    if isinstance(spec, (int, float)):
+        return IntervalSchedule(spec)
+    spec = str(spec).strip()
+    if spec.isdigit():
+        return IntervalSchedule(int(spec)) if int(spec) else None
+    return CronSchedule(spec, cron_jitter)
+
+
+def describe_schedule(spec):
+    """Текст колонки Timer"""
+    schedule = parse_schedule(spec)
+    if schedule is None:
+        return "Отключено"
+    if isinstance(schedule, CronSchedule):
+        return f"🕒 {schedule.expression}"
+    seconds = schedule.seconds
+    if seconds % 3600 == 0:
+        return f"⏱ {seconds // 3600} ч"
+    if seconds % 60 == 0:
+        return f"⏱ {seconds // 60} мин"
+    return f"⏱ {seconds} сек"
+
+
+class Scheduler:
+    """
+    Один планировщик на все задачи: min-heap времён следующего запуска.
+    Не создаёт таймеров — владелец спрашивает next_due() и забирает созревшие
+    ключи через pop_due(), который сразу ставит их на следующий запуск.
+    Переназначение задачи не ищет её в куче: у записи в куче свой номер, и
+    запись, чей номер не совпал с текущим у задачи, выбрасывается при извлечении.
+    """
+
+    def __init__(self, cron_jitter=DEFAULT_CRON_JITTER):
+        self.cron_jitter = cron_jitter
+        self._heap = []             # (when, seq, key)
+        self._entries = {}          # key -> {"spec", "schedule", "when", "seq", "extra", "catchup"}
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def schedule(self, key, spec, now=None, next_run=None):
+        """
+        Ставит (или переставляет) задачу по расписанию spec: секунды или cron.
+        Пустое расписание снимает задачу.
+        :param next_run: сохранённое время следующего запуска (после перезапуска программы)
+        :return: время следующего запуска (timestamp) или None
+        """
+        schedule = parse_schedule(spec, self.cron_jitter)
+        if schedule is None:
+            self.unschedule(key)
+            return None
+        now = time.time() if now is None else now
+        when = next_run if next_run is not None else schedule.next_after(now, key)
+        entry = {"spec": spec, "schedule": schedule, "when": when, "extra": set(), "catchup": 0}
+        self._entries[key] = entry
+        self._push(entry, key)
+        self._compact()
+        return when
+
+    def run_once(self, key, when, backlog=0):
+        """
+        Разовый дополнительный запуск задачи (догоняющий после простоя); расписание не меняется.
+        :param backlog: сколько ещё догоняющих запусков отложить — их по одному выдаёт next_catchup()
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry["catchup"] += backlog
+        seq = next(self._seq)
+        entry["extra"].add(seq)
+        heapq.heappush(self._heap, (when, seq, key))
+
+    def next_catchup(self, key, when):
+        """
+        Ставит следующий отложенный догоняющий запуск — вызывается, когда предыдущий завершился,
+        чтобы запуски одной задачи не упирались друг в друга в очереди.
+        :return: True, если запуск поставлен
+        """
+        entry = self._entries.get(key)
+        if entry is None or not entry["catchup"]:
+            return False
+        entry["catchup"] -= 1
+        self.run_once(key, when)
+        return True
+
+    def missed_runs(self, key, since, now=None, limit=1000):
+        """Времена запусков задачи в (since, now], не больше limit"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return []
+        now = time.time() if now is None else now
+        missed = []
+        when = since
+        while len(missed) < limit:
+            when = entry["schedule"].next_after(when, key)
+            if when > now:
+                break
+            missed.append(when)
+        return missed
+
+    def unschedule(self, key):
+        self._entries.pop(key, None)
+        self._compact()
+
+    def clear(self):
+        self._entries.clear()
+        self._heap.clear()
+
+    def next_run(self, key):
+        entry = self._entries.get(key)
+        return entry["when"] if entry else None
+
+    def spec(self, key):
+        entry = self._entries.get(key)
+        return entry["spec"] if entry else None
+
+    def next_due(self):
+        """Время ближайшего запуска среди всех задач (None — задач нет)"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """
+        Забирает все задачи, время которых наступило, и ставит их на следующий запуск.
+        Пропущенные слоты (программа спала, GUI был занят) не накапливаются — задача
+        запускается один раз и переходит к ближайшему будущему слоту.
+        Разовые запуски run_once() выдаются как есть и расписание не сдвигают.
+        :return: список ключей
+        """
+        now = time.time() if now is None else now
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, seq, key = heapq.heappop(self._heap)
+            entry = self._entries[key]
+            due.append(key)
+            if seq in entry["extra"]:
+                entry["extra"].discard(seq)
+                continue
+            entry["when"] = entry["schedule"].next_after(max(now, entry["when"]), key)
+            self._push(entry, key)
+
+    # ========= Внутреннее =========
+
+    def _push(self, entry, key):
+        entry["seq"] = next(self._seq)
+        heapq.heappush(self._heap, (entry["when"], entry["seq"], key))
+
+    def _is_stale(self, item):
+        entry = self._entries.get(item[2])
+        return entry is None or (entry["seq"] != item[1] and item[1] not in entry["extra"])
+
+    def _drop_stale(self):
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        """Пересобирает кучу, когда устаревших записей стало больше живых"""
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap if not self._is_stale(item)]
+            heapq.heapify(self._heap)
@@ -1,69 +1,513 @@
-import requests
+import json
+import re
+import time
 from bs4 import BeautifulSoup
-from lxml import html
+from cssselect import SelectorError, ExpressionError
+from lxml import etree, html
 from urllib.parse import urljoin
+from core import http_client, http_cache
+from core.content_hash import new_hasher
+from core.parse_pool import get_parse_pool, inline_limit, use_pool
+from core.proxy_pool import pick_proxy, get_proxy_pool
+from core.retry_policy import is_connection_error
+from core.selector_cache import compile_selector
+from core.storage import load_settings
 
-def scrape_website(
-    url,
-    selector,
-    use_xpath=False,
-    proxy=None,
-    headers=None,
-    user_agent=None,
-    timeout=10,
-    cookies=None
-):
-    """Парсит сайт с поддержкой прокси, заголовков, куки и таймаута"""
+# Метод задачи, у которой в ячейке селектора лежит JSON с набором полей
+MULTI_METHOD = "multi"
+
+# Суффиксы CSS как в Scrapy: "a::attr(href)", "h1::text"
+_CSS_PSEUDO_RE = re.compile(r"::(text|attr\(([^)]+)\))\s*$")
 
-    # Добавляем https://, если нет
+def normalize_url(url):
+    """Добавляет https://, если схема не указана"""
     if not url.startswith(("http://", "https://")):
         url = "https://" + url
+    return url
 
-    # Подготовка заголовков
-    headers = headers or {}
+def build_headers(headers=None, user_agent=None):
+    """Готовит заголовки запроса с User-Agent по умолчанию"""
+    headers = dict(headers or {})
     if user_agent:
         headers["User-Agent"] = user_agent
     elif "User-Agent" not in headers:
         headers["User-Agent"] = "Mozilla/5.0"
+    return headers
 
-    # Прокси
-    proxies = {"http": proxy, "https": proxy} if proxy else None
+# Режимы вывода результатов: html (как раньше), text или attr:<имя>
+OUTPUT_HTML = "html"
+OUTPUT_TEXT = "text"
+
+def _strip_join(element):
+    """То же, что BeautifulSoup get_text(strip=True)"""
+    return "".join(text.strip() for text in element.itertext())
+
+def _prettify(element):
+    """Та же разметка, что BeautifulSoup prettify(), но только для найденного узла"""
+    fragment = html.tostring(element, encoding="unicode", with_tail=False)
+    soup = BeautifulSoup(fragment, "html.parser")
+    node = soup.find(element.tag) or soup
+    return str(node.prettify())
+
+def _format_element(el, url, output, prettify):
+    """Один найденный элемент -> строка результата (или None, если атрибута нет)"""
+    if not hasattr(el, "tag"):
+        return str(el)  # XPath вернул строку / число
+
+    if output == OUTPUT_TEXT:
+        return " ".join(el.text_content().split())
 
-    # Куки и сессия
-    session = requests.Session()
+    if output.startswith("attr:"):
+        name = output[len("attr:"):].strip()
+        value = el.get(name)
+        if value is None:
+            return None
+        return urljoin(url, value) if name in ("href", "src") else value
 
-    if cookies:
-        session.cookies.update(cookies)
+    if prettify:
+        # CSS: разметка как у BeautifulSoup
+        if el.tag == "a" and el.get("href"):
+            full_link = urljoin(url, el.get("href"))
+            text = _strip_join(el) or full_link
+            return f'<a href="{full_link}" target="_blank">{text}</a>'
+        return _prettify(el)
 
-    # Выполняем запрос
-    response = session.get(url, headers=headers, proxies=proxies, timeout=timeout)
-    response.raise_for_status()
+    if el.tag == "a" and "href" in el.attrib:
+        full_link = urljoin(url, el.attrib["href"])
+        text = el.text_content().strip() or full_link
+        return f'<a href="{full_link}" target="_blank">{text}</a>'
+    return html.tostring(el, encoding="unicode")
 
-    # Результаты
+def _extract_css_soup(page_text, url, selector):
+    """Старый путь через BeautifulSoup — для селекторов, которых нет в cssselect"""
     results = []
+    soup = BeautifulSoup(page_text, "html.parser")
+    for element in soup.select(selector):
+        if element.name == "a" and element.get("href"):
+            full_link = urljoin(url, element["href"])
+            text = element.get_text(strip=True) or full_link
+            results.append(f'<a href="{full_link}" target="_blank">{text}</a>')
+        else:
+            results.append(str(element.prettify()))
+    return results
 
-    if use_xpath:
-        tree = html.fromstring(response.text)
-        elements = tree.xpath(selector)
+def _parse_text(page_text, fragment=False):
+    """Строка HTML -> дерево lxml; None для пустого документа"""
+    try:
+        return html.fromstring(page_text) if fragment else html.document_fromstring(page_text)
+    except etree.ParserError:
+        return None
 
-        for el in elements:
-            if el.tag == "a" and "href" in el.attrib:
-                full_link = urljoin(url, el.attrib["href"])
-                text = el.text_content().strip() or full_link
-                results.append(f'<a href="{full_link}" target="_blank">{text}</a>')
-            else:
-                results.append(html.tostring(el, encoding="unicode"))
-    else:
-        soup = BeautifulSoup(response.text, "html.parser")
-        elements = soup.select(selector)
-
-        for element in elements:
-            if element.name == "a" and element.get("href"):
-                full_link = urljoin(url, element["href"])
-                text = element.get_text(strip=True) or full_link
-                results.append(f'<a href="{full_link}" target="_blank">{text}</a>')
+def extract_from_tree(tree, url, selector, use_xpath=False, output=OUTPUT_HTML, page_text=None):
+    """
+    Извлекает элементы из уже разобранного дерева lxml.
+    :param page_text: исходный HTML для запасного пути BeautifulSoup;
+                      если не передан, дерево сериализуется обратно
+    """
+    output = (output or OUTPUT_HTML).strip().lower()
+
+    try:
+        compiled = compile_selector(selector, "XPath" if use_xpath else "CSS")
+    except (SelectorError, ExpressionError):
+        # Псевдоклассы soupsieve (:-soup-contains и т.п.) cssselect не знает
+        if output == OUTPUT_HTML:
+            if page_text is None:
+                page_text = html.tostring(tree, encoding="unicode") if tree is not None else ""
+            return _extract_css_soup(page_text, url, selector)
+        raise
+
+    if tree is None:
+        return []  # пустой документ
+
+    elements = compiled(tree)
+    if not isinstance(elements, list):
+        elements = [elements]
+
+    results = []
+    for el in elements:
+        value = _format_element(el, url, output, prettify=not use_xpath)
+        if value is not None:
+            results.append(value)
+    return results
+
+def extract_results(page_text, url, selector, use_xpath=False, output=OUTPUT_HTML):
+    """
+    Извлекает элементы из HTML по CSS или XPath селектору.
+    :param output: "html" — разметка как раньше, "text" — текст узла,
+                   "attr:href" — значение атрибута
+    """
+    tree = _parse_text(page_text, fragment=use_xpath)
+    return extract_from_tree(tree, url, selector, use_xpath, output, page_text=page_text)
+
+def parse_field_spec(selector):
+    """
+    Разбирает набор полей для multi-задачи.
+    Формат ячейки: {"title": "h1::text", "links": "a::attr(href)",
+                    "prices": {"selector": "//span[@class='price']", "method": "XPath"}}
+    Строка с префиксом "xpath:" тоже считается XPath.
+    :return: {имя: (selector, use_xpath)}
+    """
+    try:
+        spec = json.loads(selector)
+    except ValueError as e:
+        raise ValueError(f"Invalid multi-selector JSON: {e}")
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("Multi-selector must be a JSON object: {\"name\": \"selector\"}")
+
+    fields = {}
+    for name, value in spec.items():
+        if isinstance(value, dict):
+            field_selector = value.get("selector", "")
+            use_xpath = str(value.get("method", "CSS")).lower() == "xpath"
+        else:
+            field_selector = str(value)
+            use_xpath = field_selector.lower().startswith("xpath:")
+            if use_xpath:
+                field_selector = field_selector[len("xpath:"):]
+        if not field_selector.strip():
+            raise ValueError(f"Empty selector for field '{name}'")
+        fields[name] = (field_selector.strip(), use_xpath)
+    return fields
+
+def _field_value(value, url):
+    """Приводит найденный узел / строку XPath к компактному значению"""
+    if isinstance(value, str):
+        return value.strip()
+    if not hasattr(value, "tag"):
+        return str(value)  # числа и bool из XPath-функций
+    if value.tag == "a" and "href" in value.attrib and not value.text_content().strip():
+        return urljoin(url, value.attrib["href"])
+    return value.text_content().strip()
+
+def _select_css(tree, selector, url):
+    match = _CSS_PSEUDO_RE.search(selector)
+    if not match:
+        return [_field_value(el, url) for el in compile_selector(selector, "CSS")(tree)]
+
+    elements = compile_selector(selector[:match.start()], "CSS")(tree)
+    attr = match.group(2)
+    if attr is None:
+        return [el.text_content().strip() for el in elements]
+
+    attr = attr.strip().strip("'\"")
+    values = []
+    for el in elements:
+        value = el.get(attr)
+        if value is None:
+            continue
+        values.append(urljoin(url, value) if attr in ("href", "src") else value)
+    return values
+
+def extract_fields(tree, url, fields):
+    """
+    Все селекторы multi-задачи по одному дереву lxml.
+    :param fields: результат parse_field_spec
+    :return: запись {имя_поля: [значения]}
+    """
+    record = {}
+    for name, (selector, use_xpath) in fields.items():
+        if tree is None:
+            record[name] = []
+        elif use_xpath:
+            found = compile_selector(selector, "XPath")(tree)
+            if not isinstance(found, list):
+                found = [found]
+            record[name] = [_field_value(value, url) for value in found]
+        else:
+            record[name] = _select_css(tree, selector, url)
+    return record
+
+def extract_tree_for_method(tree, url, selector, method, output=OUTPUT_HTML):
+    """Извлечение из готового дерева по методу задачи: CSS, XPath или Multi"""
+    method = (method or "").lower()
+    if method == MULTI_METHOD:
+        return [extract_fields(tree, url, parse_field_spec(selector))]
+    return extract_from_tree(tree, url, selector, use_xpath=method == "xpath", output=output)
+
+def extract_for_method(page_text, url, selector, method, output=OUTPUT_HTML):
+    """Извлечение из строки HTML по методу задачи: CSS, XPath или Multi (набор полей)"""
+    method = (method or "").lower()
+    if method == MULTI_METHOD:
+        return [extract_fields(_parse_text(page_text, fragment=True), url, parse_field_spec(selector))]
+    return extract_results(page_text, url, selector, use_xpath=method == "xpath", output=output)
+
+# ========= Потоковое чтение ответа =========
+
+# Лимит тела ответа по умолчанию (настройка max_body_size, 0 — без лимита)
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Типы, которые разбираем как HTML; ответ без Content-Type тоже пропускаем
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/xml", "application/xml", "text/plain")
+
+# Сколько байт начала документа смотрим в поисках <meta charset>
+_SNIFF_SIZE = 1024
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+class BodyTooLarge(ValueError):
+    """Тело ответа больше max_body_size"""
+
+class UnsupportedContentType(ValueError):
+    """Ответ не HTML (картинка, архив, PDF...) — скачивать его незачем"""
+
+def body_size_limit(params=None, settings=None):
+    """Лимит тела для задачи: параметр max_body_size важнее настройки пользователя"""
+    limit = (params or {}).get("max_body_size")
+    if limit is None:
+        settings = load_settings() if settings is None else settings
+        limit = settings.get("max_body_size", DEFAULT_MAX_BODY_SIZE)
+    return int(limit or 0)
+
+def content_charset(content_type):
+    """Кодировка из заголовка Content-Type или None"""
+    for part in (content_type or "").split(";")[1:]:
+        name, _, value = part.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip("'\"") or None
+    return None
+
+def check_response_headers(headers, max_size):
+    """
+    Проверки до чтения тела: тип содержимого и заявленная длина.
+    Бросает UnsupportedContentType / BodyTooLarge — тело тогда не скачивается.
+    """
+    mime = (headers.get("Content-Type") or "").split(";")[0].strip().lower()
+    if mime and mime not in HTML_CONTENT_TYPES:
+        raise UnsupportedContentType(f"Unsupported Content-Type: {mime}")
+
+    length = (headers.get("Content-Length") or "").strip()
+    if max_size and length.isdigit() and int(length) > max_size:
+        raise BodyTooLarge(f"Response body too large: {length} bytes (limit {max_size})")
+
+class StreamingPage:
+    """
+    Тело ответа, которое разбирается по мере загрузки.
+    Куски сразу уходят в lxml HTMLParser.feed(), попутно считаются размер и хэш.
+    Байты тела сохраняются только с keep_body=True (нужны для кэша ответов) или parse_limit.
+    parse_limit (см. core.parse_pool.inline_limit): None — разбирать всё тело; 0 — только копить,
+    тело разберёт пул процессов; n — разбирать, пока тело не перевалит за n байт, дальше только копить.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_BODY_SIZE, encoding=None, keep_body=False, parse_limit=None):
+        self.max_size = max_size
+        self.encoding = encoding
+        self.size = 0
+        self.parsed = parse_limit != 0
+        self.parse_limit = parse_limit
+        self._parser = None
+        self._tree = None
+        self._closed = False
+        self._head = b""
+        self._hasher = new_hasher()
+        self._chunks = [] if keep_body or parse_limit is not None else None
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.max_size and self.size > self.max_size:
+            raise BodyTooLarge(f"Response body too large: over {self.max_size} bytes")
+
+        self._hasher.update(chunk)
+        if self._chunks is not None:
+            self._chunks.append(chunk)
+        if self.parsed and self.parse_limit and self.size >= self.parse_limit:
+            # Тело оказалось большим — бросаем разбор на месте, его доделает пул процессов
+            self.parsed = False
+            self._parser, self._head = None, b""
+        if not self.parsed:
+            return
+
+        if self._parser is None:
+            # Кодировку выбираем по началу документа, поэтому первые байты копим
+            self._head += chunk
+            if len(self._head) >= _SNIFF_SIZE:
+                self._start_parser()
+            return
+        self._parser.feed(chunk)
+
+    def _start_parser(self):
+        head, self._head = self._head, b""
+        if not self.encoding and not head.startswith(_BOMS):
+            match = _META_CHARSET_RE.search(head[:_SNIFF_SIZE])
+            # Кодировка из <meta charset>, иначе utf-8 (libxml по умолчанию взял бы latin-1)
+            self.encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            self._parser = html.HTMLParser(encoding=self.encoding)
+        except LookupError:
+            self.encoding = "utf-8"
+            self._parser = html.HTMLParser(encoding=self.encoding)
+        if head:
+            self._parser.feed(head)
+
+    def close(self):
+        """
+        Завершает разбор: корень документа или None для пустого / неразобранного тела.
+        Вызывать в том же потоке, что и feed() — парсер lxml нельзя передавать между потоками.
+        Повторный вызов возвращает то же дерево.
+        """
+        if not self.parsed or self._closed:
+            return self._tree
+        self._closed = True
+        if self._parser is None:
+            if not self._head:
+                return None
+            self._start_parser()
+        parser, self._parser = self._parser, None
+        try:
+            self._tree = parser.close()
+        except etree.XMLSyntaxError:
+            self._tree = None
+        return self._tree
+
+    @property
+    def body_hash(self):
+        return self._hasher.hexdigest()
+
+    @property
+    def body(self):
+        return b"".join(self._chunks) if self._chunks is not None else None
+
+def parse_body(body, encoding=None):
+    """Разбор готового тела (например, из кэша) тем же парсером, что и при загрузке"""
+    page = StreamingPage(max_size=0, encoding=encoding)
+    page.feed(body)
+    return page.close()
+
+def cached_parse(page, response_headers, url, selector, method, output):
+    """
+    Готовый разбор из кэша, если тело побайтно совпало с прошлым (по хэшу), иначе None.
+    При попадании сохраняет свежие ETag / Last-Modified — следующий запрос уйдёт с ними.
+    """
+    key = http_cache.parse_key(selector, method, output)
+    results = http_cache.get_parsed(url, key, body_hash=page.body_hash)
+    if results is not None:
+        store_body(page, response_headers, url)
+    return results
+
+def store_body(page, response_headers, url):
+    """Кладёт тело и его валидаторы в кэш ответов (тело с тем же хэшем не перезаписывается)"""
+    if page.body is None:
+        return
+    http_cache.store_response(url, response_headers, page.body, page.encoding, page.body_hash)
+
+def store_parse(page, response_headers, url, selector, method, output, results):
+    """Кладёт тело и результат разбора в кэш ответов"""
+    if page.body is None:
+        return
+    store_body(page, response_headers, url)
+    http_cache.put_parsed(url, http_cache.parse_key(selector, method, output), results)
+
+def finish_page(page, response_headers, url, selector, method, output, use_cache=True):
+    """
+    Завершает потоковый разбор, извлекает результаты и кладёт тело и разбор в кэш.
+    Если тело побайтно совпадает с прошлым (по хэшу), селекторы не выполняются.
+    Дерево берётся из page.close() — тело, уже разобранное по ходу загрузки, повторно не разбирается.
+    """
+    tree = page.close()
+    if use_cache:
+        results = cached_parse(page, response_headers, url, selector, method, output)
+        if results is not None:
+            return results
+
+    if not page.parsed:
+        # Разбор был отложен для пула процессов — единственный разбор тела здесь
+        tree = parse_body(page.body, page.encoding)
+    results = extract_tree_for_method(tree, url, selector, method, output)
+    if use_cache:
+        store_parse(page, response_headers, url, selector, method, output, results)
+    return results
+
+def cached_results(url, selector, method, output):
+    """Результат для ответа 304: готовый разбор из кэша или разбор сохранённого тела"""
+    key = http_cache.parse_key(selector, method, output)
+    results = http_cache.get_parsed(url, key)
+    if results is not None:
+        return results
+
+    body, encoding = http_cache.load_body(url)
+    if body is None:
+        raise RuntimeError("304 Not Modified, but cached body is missing")
+    results = extract_tree_for_method(parse_body(body, encoding), url, selector, method, output)
+    http_cache.put_parsed(url, key, results)
+    return results
+
+def scrape_website(
+    url,
+    selector,
+    use_xpath=False,
+    proxy=None,
+    headers=None,
+    user_agent=None,
+    timeout=10,
+    cookies=None,
+    method=None,
+    output=OUTPUT_HTML,
+    use_cache=False,
+    max_body_size=None
+):
+    """
+    Парсит сайт с поддержкой прокси, заголовков, куки и таймаута.
+    Если передан method ("CSS", "XPath", "Multi"), он важнее use_xpath.
+    use_cache=True включает условный GET: при 304 берётся разбор из кэша.
+    Тело читается потоково и не больше max_body_size байт (None — из настроек).
+    """
+
+    url = normalize_url(url)
+    headers = build_headers(headers, user_agent)
+    settings = load_settings()   # один раз на вызов
+    if max_body_size is None:
+        max_body_size = body_size_limit(settings=settings)
+
+    # Прокси: заданный в параметрах или лучший из пула (при proxy_rotation)
+    proxy, pooled = pick_proxy(proxy, settings)
+    proxies = {"http": proxy, "https": proxy} if proxy else None
+
+    # Куки и сессия (соединения берутся из общего пула)
+    session = http_client.new_session(cookies)
+
+    method = method or ("XPath" if use_xpath else "CSS")
+    if use_cache:
+        headers.update(http_cache.conditional_headers(url))
+
+    # Выполняем запрос; тело читаем кусками, а не через response.text
+    started = time.monotonic()
+    try:
+        response = session.get(url, headers=headers, proxies=proxies, timeout=timeout, stream=True)
+    except Exception as e:
+        if pooled:
+            get_proxy_pool().release(proxy, not is_connection_error(e), error=str(e) or type(e).__name__)
+        raise
+    if pooled:
+        get_proxy_pool().release(proxy, True, time.monotonic() - started)
+    try:
+        if use_cache and response.status_code == 304:
+            results = cached_results(url, selector, method, output)
+        else:
+            response.raise_for_status()
+            check_response_headers(response.headers, max_body_size)
+            pool = get_parse_pool()
+            page = StreamingPage(
+                max_body_size, content_charset(response.headers.get("Content-Type")),
+                keep_body=use_cache, parse_limit=inline_limit(pool, response.headers)
+            )
+            for chunk in response.iter_content(CHUNK_SIZE):
+                page.feed(chunk)
+
+            if use_pool(pool, page):
+                # Большая страница: разбор в отдельном процессе, GIL этого процесса свободен
+                results = cached_parse(page, response.headers, url, selector, method, output) if use_cache else None
+                if results is None:
+                    results = pool.submit(page.body, page.encoding, url, selector, method, output).result()
+                    if use_cache:
+                        store_parse(page, response.headers, url, selector, method, output, results)
             else:
-                results.append(str(element.prettify()))
+                # Кэш проверяет сам finish_page — по хэшу тела, на уже построенном дереве
+                results = finish_page(page, response.headers, url, selector, method, output, use_cache)
+    finally:
+        # Недочитанное соединение закрывается, дочитанное возвращается в пул
+        response.close()
 
     # ✅ Возвращаем также куки
     return results, session.cookies.get_dict()
@@ -0,0 +1,41 @@
+# core/selector_cache.py
+
+from functools import lru_cache
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+# Сколько скомпилированных селекторов держим в памяти процесса
+CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile(selector, use_xpath):
+    if use_xpath:
+        return etree.XPath(selector)
+    return CSSSelector(selector)  # cssselect переводит CSS в XPath один раз
+
+
+def compile_selector(selector, method="CSS"):
+    """
+    Возвращает скомпилированный селектор (etree.XPath или CSSSelector).
+    Результат вызывается на дереве lxml: compile_selector("a", "CSS")(tree).
+    Кэш общий для всех задач, поэтому селектор компилируется один раз на процесс.
+    """
+    return _compile(selector, str(method).lower() == "xpath")
+
+
+def cache_stats():
+    """Статистика кэша: попадания, промахи, размер"""
+    info = _compile.cache_info()
+    total = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hit_rate": info.hits / total if total else 0.0,
+    }
+
+
+def clear_cache():
+    _compile.cache_clear()
@@ -0,0 +1,47 @@
+# core/session_saver.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from core.session_store import get_session_store
+
+
+class SessionSaver(QObject):
+    """
+    Пишет сессии в SQLite-хранилище в отдельном потоке, чтобы сохранение
+    десятков тысяч задач не подвешивало GUI. Один рабочий поток — сохранения
+    идут строго по очереди. Снимок задач собирается в GUI-потоке заранее,
+    фоновая работа читает только его. Итог приходит сигналами (в GUI-поток).
+    """
+    saved = pyqtSignal(str, int, float)   # имя сессии, записано задач, секунд
+    failed = pyqtSignal(str, str)         # имя сессии, текст ошибки
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store or get_session_store()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-saver")
+
+    def save(self, name, tasks, removed_ids=(), full=True):
+        """
+        Ставит сохранение в очередь.
+        :param full: True — сессия целиком, False — только изменившиеся задачи и удалённые ID
+        :return: Future с числом записанных задач
+        """
+        return self._executor.submit(self._save, name, list(tasks), list(removed_ids), full)
+
+    def _save(self, name, tasks, removed_ids, full):
+        started = time.monotonic()
+        try:
+            if full:
+                written = self.store.save_session(name, tasks)
+            else:
+                written = self.store.save_changes(name, tasks, removed_ids)
+        except Exception as e:
+            self.failed.emit(name, str(e))
+            raise
+        self.saved.emit(name, written, time.monotonic() - started)
+        return written
+
+    def shutdown(self, wait=True):
+        """Дожидается записи поставленных сохранений (при закрытии окна)"""
+        self._executor.shutdown(wait=wait)
@@ -3,8 +3,11 @@
 import os
 import json
 from datetime import datetime
+from core.content_hash import hash_results
+from core.scheduler import describe_schedule
+from core.session_store import get_session_store, results_preview
 
-# Определяем директории для хранения сессий и результатов
+# Директории JSON-сессий: батч-режим и кластер работают с файлами, GUI — с core/session_store.py
 SESSIONS_DIR = "sessions"
 RESULTS_DIR = "results"
 
@@ -20,77 +23,102 @@ def generate_session_name():
 
 def save_session(session_name, tasks):
     """
-    Сохраняет текущую сессию.
+    Сохраняет текущую сессию в SQLite-хранилище (core/session_store.py).
+    Результаты, чей хэш уже есть в базе, повторно не сериализуются.
     :param session_name: имя сессии
     :param tasks: список словарей с параметрами задач
-    :return: путь к файлу сохранённой сессии
+    :return: имя сохранённой сессии
     """
-    session_data = {
-        "session_name": session_name,
-        "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "tasks": []
-    }
+    get_session_store().save_session(session_name, tasks)
+    return session_name
+
+def write_task_results(session_name, index, results, results_hash=None, previous_hashes=None):
+    """
+    Пишет результаты задачи в results/<session>/task_<index>.json.
+    :param previous_hashes: {results_path: results_hash} прошлого сохранения —
+                            если хэш совпал, файл не перезаписывается
+    :return: (results_path, results_hash) или (None, None), если результатов нет
+    """
+    if not results:
+        return None, None
 
     result_dir = os.path.join(RESULTS_DIR, session_name)
     os.makedirs(result_dir, exist_ok=True)
+    result_path = os.path.join(result_dir, f"task_{index}.json")
+    results_hash = results_hash or hash_results(results)
 
-    for i, task in enumerate(tasks):
-        result_path = None
-        if task.get("results"):
-            result_path = os.path.join(result_dir, f"task_{i}.json")
-            with open(result_path, "w", encoding="utf-8") as f:
-                json.dump(task["results"], f, indent=4, ensure_ascii=False)
-
-        session_data["tasks"].append({
-            "url": task.get("url", ""),
-            "selector": task.get("selector", ""),
-            "method": task.get("method", "CSS"),
-            "status": task.get("status", "Ожидает"),
-            "params": task.get("params", {}),
-            "cookies_file": task.get("cookies_file", ""),
-            "results_path": result_path,
-            "log_path": task.get("log_path", ""),
-            "timer_interval": task.get("timer_interval", 0),
-            "last_run": task.get("last_run", "")
-        })
-
-    path = os.path.join(SESSIONS_DIR, f"{session_name}.json")
+    # 💤 Результаты не изменились — файл не перезаписываем
+    if (previous_hashes or {}).get(result_path) != results_hash or not os.path.exists(result_path):
+        with open(result_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+    return result_path, results_hash
+
+def write_session_file(path, session_data):
+    """Записывает данные сессии в JSON-файл и возвращает путь"""
     with open(path, "w", encoding="utf-8") as f:
         json.dump(session_data, f, indent=4, ensure_ascii=False)
-
     return path
 
 def load_session(path):
-    """Загружает сессию по заданному пути к JSON-файлу."""
+    """Загружает сессию по заданному пути к JSON-файлу (батч-режим и кластер)."""
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def list_sessions():
+def load_saved_session(session_name):
     """
-    Возвращает список всех сессий с информацией (имя файла, дата, количество задач).
+    Загружает сессию из хранилища по имени (None — такой сессии нет).
+    Результаты не читаются: у задач только сводка, сами данные — load_task_results.
+    """
+    return get_session_store().load_session(session_name, lazy=True)
+
+def load_task_results(entry):
+    """
+    Результаты задачи из task_results. После восстановления сессии их нет в памяти —
+    читаются из хранилища по хэшу при каждом обращении и не кэшируются.
+    """
+    if not entry:
+        return []
+    if "results" in entry:
+        return entry["results"]
+    if entry.get("results_hash"):
+        return get_session_store().load_results(entry["results_hash"])
+    return []
+
+def iter_task_results(entry):
+    """Генератор результатов задачи для потокового экспорта: читает их только при обходе"""
+    yield from load_task_results(entry)
+
+def result_summary(results, results_hash=None):
+    """Сводка результатов для task_results: число элементов, превью первого, хэш"""
+    return {
+        "results_hash": results_hash,
+        "result_count": len(results or []),
+        "result_preview": results_preview(results),
+    }
+
+def list_sessions(day=None):
+    """
+    Возвращает список сессий из хранилища (имя, дата, количество задач) — без чтения самих задач.
+    :param day: "YYYY-MM-DD" — только сессии за этот день
     :return: список словарей с данными сессий
     """
-    sessions = []
-    for file in sorted(os.listdir(SESSIONS_DIR), reverse=True):
-        if file.endswith(".json"):
-            path = os.path.join(SESSIONS_DIR, file)
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                sessions.append({
-                    "file": file,
-                    "path": path,
-                    "session_name": data.get("session_name", file),
-                    "datetime": data.get("datetime", ""),
-                    "task_count": len(data.get("tasks", []))
-                })
-    return sessions
-
-def delete_session(path):
-    """Удаляет файл сессии по заданному пути."""
-    if os.path.exists(path):
-        os.remove(path)
-        return True
-    return False
+    return get_session_store().list_sessions(day)
+
+def session_days():
+    """Дни, за которые есть сессии — для подсветки календаря."""
+    return get_session_store().session_days()
+
+def delete_session(session_name, keep_hashes=()):
+    """
+    Удаляет сессию из хранилища по имени.
+    keep_hashes — результаты, которые ещё читает загруженная сессия (см. stored_hashes), остаются в хранилище.
+    """
+    return get_session_store().delete_session(session_name, keep_hashes)
+
+def stored_hashes(task_results):
+    """Хэши результатов, которые задачи из task_results читают из хранилища (в памяти их нет)"""
+    return {entry["results_hash"] for entry in task_results.values()
+            if entry.get("results_hash") and "results" not in entry}
 
 def get_cookie_file_name(url):
     """
@@ -108,85 +136,146 @@ class SessionController:
     Использует функции сохранения сессии, определённые выше.
     """
 
-    def __init__(self, table_controller, add_task_callback, task_params, task_results, task_intervals):
+    def __init__(self, table_controller, add_tasks_callback, task_params, task_results, task_intervals,
+                 saver=None):
         self.table = table_controller
-        self.add_task = add_task_callback
+        self.add_tasks = add_tasks_callback
         self.task_params = task_params
         self.task_results = task_results
         self.task_intervals = task_intervals
+        self.saver = saver   # core/session_saver.py: запись в фоне; None — синхронно
+
+        # 🧾 Что изменилось с последнего сохранения сессии saved_name
+        self.saved_name = None
+        self.dirty = set()
+        self.removed = set()
+        self.table.model.tasks_changed.connect(self.mark_dirty)
+        self.table.model.tasks_removed.connect(self.mark_removed)
+        if saver:
+            saver.failed.connect(self.on_save_failed)
+
+    def mark_dirty(self, task_ids):
+        self.dirty.update(task_ids)
+
+    def mark_removed(self, task_ids):
+        self.dirty.difference_update(task_ids)
+        self.removed.update(task_ids)
+
+    def mark_clean(self, session_name):
+        """Таблица совпадает с сохранённой сессией session_name"""
+        self.saved_name = session_name
+        self.dirty.clear()
+        self.removed.clear()
+
+    def has_changes(self):
+        return bool(self.dirty or self.removed)
+
+    def on_save_failed(self, session_name, error):
+        # Изменения, ушедшие в неудачное сохранение, потеряны для дельты — следующее сохранение полное
+        if session_name == self.saved_name:
+            self.saved_name = None
 
     def save_session(self, session_name):
         """
-        Сохраняет сессию, собирая данные по всем задачам из таблицы.
+        Сохраняет сессию. Повторное сохранение под тем же именем пишет только
+        изменившиеся задачи и удаляет убранные, новое имя — сессию целиком.
+        Снимок задач собирается здесь (GUI-поток), запись — в SessionSaver.
         :param session_name: имя сессии
-        :return: путь к сохранённому файлу сессии
+        :return: имя сохранённой сессии
         """
-        tasks = []
-
-        for row in range(self.table.table.rowCount()):
-            task = self.table.get_task_data(row)
-            params = self.task_params.get(row, {})
-            results = self.task_results.get(row, [])
-            timer_interval = self.task_intervals.get(row, 0)
-            cookies_file = get_cookie_file_name(task["url"])
-
-            tasks.append({
-                "url": task["url"],
-                "selector": task["selector"],
-                "method": task["method"],
-                "status": task["status"],
-                "params": params,
-                "cookies_file": cookies_file,
-                "results": results,
-                "timer_interval": timer_interval,
-                "last_run": task["last_run"],
-            })
-
-        return save_session(session_name, tasks)
+        store = self.table.task_store
+        full = session_name != self.saved_name
+        if full:
+            task_ids = store.ids()
+        else:
+            task_ids = sorted((t for t in self.dirty if t in store), key=store.row_of)
+        tasks = [self.task_entry(task_id) for task_id in task_ids]
+        removed_ids = [] if full else list(self.removed)
+
+        if self.saver:
+            self.saver.save(session_name, tasks, removed_ids, full=full)
+        elif full:
+            save_session(session_name, tasks)
+        else:
+            get_session_store().save_changes(session_name, tasks, removed_ids)
+
+        self.mark_clean(session_name)
+        return session_name
+
+    def task_entry(self, task_id):
+        """Словарь задачи для хранилища сессий"""
+        task = self.table.task_data(task_id)
+        entry = self.task_results.get(task_id) or {}
+        return {
+            "task_id": task_id,
+            "url": task["url"],
+            "selector": task["selector"],
+            "method": task["method"],
+            "status": task["status"],
+            "params": self.task_params.get(task_id, {}),
+            "cookies_file": get_cookie_file_name(task["url"]),
+            "results": entry.get("results") or [],   # нет в памяти — хранилище сошлётся на results_hash
+            "results_hash": entry.get("results_hash"),
+            "timer_interval": self.task_intervals.get(task_id, 0),
+            "last_run": task["last_run"],
+        }
 
     def restore_session(self, session_data):
         """
-        Восстанавливает сессию из данных, загруженных из JSON.
-        Заполняет таблицу и соответствующие словари параметров, результатов и интервалов.
+        Восстанавливает сессию из данных хранилища (или старого JSON).
+        Все задачи попадают в модель таблицы одной пачкой, затем заполняются
+        словари параметров, результатов и интервалов. Результаты из хранилища
+        в память не грузятся — в task_results только сводка и хэш (load_task_results).
         :param session_data: данные сессии (словарь)
         """
-        from PyQt5.QtWidgets import QTableWidgetItem
+        from ui.task_table_model import COL_PARAMS, COL_TIMER
 
         self.clear_all_tasks()
 
-        for i, task in enumerate(session_data.get("tasks", [])):
-            self.add_task(task["url"], task["selector"], task["method"], task["status"])
-
-            self.task_params[i] = task.get("params", {})
-            self.task_results[i] = {
+        tasks = session_data.get("tasks", [])
+        task_ids = self.add_tasks([{
+            "task_id": task.get("task_id"),
+            "url": task["url"],
+            "selector": task["selector"],
+            "method": task["method"],
+            "status": task["status"],
+            "last_run": task.get("last_run", ""),
+            "cells": {
+                COL_PARAMS: "🛠 Настроить",
+                COL_TIMER: describe_schedule(task.get("timer_interval", 0)),
+            },
+        } for task in tasks])
+
+        for task_id, task in zip(task_ids, tasks):
+            self.task_params[task_id] = task.get("params", {})
+            entry = {
                 "url": task["url"],
                 "status": task["status"],
-                "results": task.get("results", []),
+                "results_hash": task.get("results_hash"),
+                "result_count": task.get("result_count", 0),
+                "result_preview": task.get("result_preview", ""),
                 "message": task.get("log_path", ""),
                 "last_run": task.get("last_run", "")
             }
-            self.task_intervals[i] = task.get("timer_interval", 0)
-
-            # Обновляем отображение "Last Run"
-            self.table.set_last_run(i, task.get("last_run", ""))
-
-            # Устанавливаем tooltip для cookies
-            self.table.table.setItem(i, 7, QTableWidgetItem(task.get("cookies_file", "")))
-
-            # Устанавливаем иконку для параметров
-            self.table.table.setItem(i, 8, QTableWidgetItem("🛠 Настроить"))
-
-            # Записываем интервал таймера
-            timer_text = f"{self.task_intervals[i]} сек" if self.task_intervals[i] else "–"
-            self.table.table.setItem(i, 9, QTableWidgetItem(timer_text))
-
+            if "results" in task:
+                # Старый JSON: результаты уже прочитаны вместе с сессией
+                entry["results"] = task["results"]
+                entry.update(result_summary(task["results"], task.get("results_hash")))
+            self.task_results[task_id] = entry
+            self.task_intervals[task_id] = task.get("timer_interval", 0)
+
+        # Ширина колонок — один раз на всю сессию
         self.table.table.resizeColumnsToContents()
+        # Повторное сохранение под тем же именем станет инкрементальным, если сессия есть в хранилище
+        name = session_data.get("session_name")
+        self.mark_clean(name if name and get_session_store().has_session(name) else None)
 
     def clear_all_tasks(self):
         """
         Очищает таблицу и внутренние словари, связанные с задачами.
         """
-        self.table.table.setRowCount(0)
+        self.table.model.clear()
         self.task_params.clear()
         self.task_results.clear()
         self.task_intervals.clear()
+        self.mark_clean(None)
@@ -0,0 +1,385 @@
+# core/session_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from core.content_hash import hash_results
+from core.storage import load_settings
+from core.task_store import new_task_id
+
+# Сессии, задачи, запуски и результаты — в одном SQLite-файле вместо JSON на каждую задачу
+DEFAULT_SESSION_STORE_PATH = os.path.join("data", "sessions.db")
+
+# Старые сессии в JSON (импортируются один раз)
+LEGACY_SESSIONS_DIR = "sessions"
+
+# Длина превью первого элемента в сводке результатов
+PREVIEW_CHARS = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    name       TEXT PRIMARY KEY,
+    saved_at   TEXT NOT NULL,
+    day        TEXT NOT NULL,
+    task_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_day ON sessions (day, saved_at);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    session        TEXT NOT NULL,
+    task_id        TEXT NOT NULL,
+    position       INTEGER NOT NULL,
+    url            TEXT NOT NULL,
+    selector       TEXT NOT NULL,
+    method         TEXT NOT NULL,
+    status         TEXT NOT NULL,
+    params         TEXT NOT NULL DEFAULT '{}',
+    cookies_file   TEXT NOT NULL DEFAULT '',
+    timer_interval TEXT NOT NULL DEFAULT '0',
+    last_run       TEXT NOT NULL DEFAULT '',
+    results_hash   TEXT,
+    PRIMARY KEY (session, task_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_position ON tasks (session, position);
+CREATE INDEX IF NOT EXISTS tasks_url ON tasks (url);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_last_run ON tasks (last_run);
+
+CREATE TABLE IF NOT EXISTS results (
+    hash       TEXT PRIMARY KEY,
+    item_count INTEGER NOT NULL,
+    preview    TEXT NOT NULL DEFAULT '',
+    results    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS session_saves (
+    session  TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    full     INTEGER NOT NULL,
+    written  INTEGER NOT NULL,
+    removed  INTEGER NOT NULL,
+    seconds  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_saves_session ON session_saves (session, saved_at);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class _Transaction:
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        self.store._lock.acquire()
+        self.store._conn.execute("BEGIN IMMEDIATE")
+        return self.store._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.store._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.store._lock.release()
+        return False
+
+
+class SessionStore:
+    """
+    Постоянное хранилище сессий: сессия -> задачи -> результаты (история запусков — core/run_log.py).
+    Результаты лежат по хэшу содержимого: одинаковые списки хранятся один раз,
+    а неизменившиеся при пересохранении не сериализуются заново.
+    Повторное сохранение той же сессии пишет только изменившиеся задачи (save_changes);
+    каждое сохранение — одна транзакция и строка в журнале session_saves.
+    Список сессий, подсветка календаря и выборка по дате — запросы по индексам,
+    без чтения самих задач. Соединение общее для потоков, запросы идут под блокировкой.
+    """
+
+    def __init__(self, path=DEFAULT_SESSION_STORE_PATH, timeout=30):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ========= Запись =========
+
+    def save_session(self, name, tasks, saved_at=None):
+        """
+        Сохраняет сессию целиком (задачи, которых больше нет, удаляются).
+        :param tasks: словари как в SessionController.save_session (+ task_id)
+        :return: число сохранённых задач
+        """
+        saved_at = saved_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        started = time.monotonic()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE session = ?", (name,))
+            for position, task in enumerate(tasks):
+                self._write_task(conn, name, position, task)
+            self._touch_session(conn, name, saved_at)
+            self._log_save(conn, name, saved_at, True, len(tasks), 0, started)
+        return len(tasks)
+
+    def save_changes(self, name, tasks, removed_ids=(), saved_at=None):
+        """
+        Инкрементальное сохранение: пишет только переданные (изменившиеся) задачи
+        и удаляет removed_ids. Новые задачи встают в конец сессии, у остальных
+        позиция не меняется. Время — пропорционально изменениям, а не размеру сессии.
+        :return: число записанных задач
+        :raises LookupError: сессии ещё нет в хранилище (нужно полное сохранение)
+        """
+        saved_at = saved_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        started = time.monotonic()
+        with self._transaction() as conn:
+            if not conn.execute("SELECT 1 FROM sessions WHERE name = ?", (name,)).fetchone():
+                # Без полной копии сессии дельту применить не к чему
+                raise LookupError(f"Сессия не найдена: {name}")
+            if removed_ids:
+                conn.executemany("DELETE FROM tasks WHERE session = ? AND task_id = ?",
+                                 [(name, task_id) for task_id in removed_ids])
+            position = conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM tasks WHERE session = ?", (name,)
+            ).fetchone()[0]
+            for offset, task in enumerate(tasks):
+                self._write_task(conn, name, position + offset, task)
+            self._touch_session(conn, name, saved_at)
+            self._log_save(conn, name, saved_at, False, len(tasks), len(removed_ids), started)
+        return len(tasks)
+
+    def _write_task(self, conn, session, position, task):
+        """Вставляет задачу или обновляет её поля; позиция существующей задачи не меняется"""
+        task_id = task.get("task_id") or new_task_id()
+        results_hash = self._write_results(conn, task.get("results"), task.get("results_hash"))
+        conn.execute(
+            "INSERT INTO tasks (session, task_id, position, url, selector, method, status, params,"
+            " cookies_file, timer_interval, last_run, results_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(session, task_id) DO UPDATE SET url = excluded.url, selector = excluded.selector,"
+            " method = excluded.method, status = excluded.status, params = excluded.params,"
+            " cookies_file = excluded.cookies_file, timer_interval = excluded.timer_interval,"
+            " last_run = excluded.last_run, results_hash = excluded.results_hash",
+            (session, task_id, position, task.get("url", ""), task.get("selector", ""),
+             task.get("method") or "CSS", task.get("status", "Ожидает"),
+             json.dumps(task.get("params") or {}, ensure_ascii=False), task.get("cookies_file", ""),
+             str(task.get("timer_interval") or 0), task.get("last_run", ""), results_hash),
+        )
+
+    def _write_results(self, conn, results, results_hash=None):
+        """
+        Результаты по хэшу; уже сохранённый хэш не сериализуется повторно.
+        Без results (задача восстановлена лениво) сохраняется ссылка на уже записанный хэш.
+        :return: хэш или None
+        """
+        if not results:
+            if results_hash and conn.execute("SELECT 1 FROM results WHERE hash = ?", (results_hash,)).fetchone():
+                return results_hash
+            return None
+        results_hash = results_hash or hash_results(results)
+        if conn.execute("SELECT 1 FROM results WHERE hash = ?", (results_hash,)).fetchone() is None:
+            conn.execute(
+                "INSERT INTO results (hash, item_count, preview, results) VALUES (?, ?, ?, ?)",
+                (results_hash, len(results), results_preview(results),
+                 json.dumps(results, ensure_ascii=False, separators=(",", ":"))),
+            )
+        return results_hash
+
+    def _touch_session(self, conn, name, saved_at):
+        conn.execute(
+            "INSERT INTO sessions (name, saved_at, day, task_count)"
+            " VALUES (?, ?, ?, (SELECT COUNT(*) FROM tasks WHERE session = ?))"
+            " ON CONFLICT(name) DO UPDATE SET saved_at = excluded.saved_at, day = excluded.day,"
+            " task_count = excluded.task_count",
+            (name, saved_at, saved_at[:10], name),
+        )
+
+    def _log_save(self, conn, name, saved_at, full, written, removed, started):
+        """Строка журнала сохранений: что и сколько записано (manifest delta)"""
+        conn.execute(
+            "INSERT INTO session_saves (session, saved_at, full, written, removed, seconds) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, saved_at, int(full), written, removed, time.monotonic() - started),
+        )
+
+    def delete_session(self, name, keep_hashes=()):
+        """
+        :param keep_hashes: хэши результатов, которые ещё нужны загруженной в память сессии
+                            (ленивые сводки задач) — их строки не удаляются вместе с сессией
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE session = ?", (name,))
+            conn.execute("DELETE FROM session_saves WHERE session = ?", (name,))
+            deleted = conn.execute("DELETE FROM sessions WHERE name = ?", (name,)).rowcount
+            self._prune_results(conn, keep_hashes)
+        return deleted > 0
+
+    def prune_results(self, keep_hashes=()):
+        """Удаляет результаты, на которые не ссылается ни одна задача (кроме keep_hashes). :return: число удалённых"""
+        with self._transaction() as conn:
+            return self._prune_results(conn, keep_hashes)
+
+    def _prune_results(self, conn, keep_hashes=()):
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS kept_results (hash TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM kept_results")
+        conn.executemany("INSERT OR IGNORE INTO kept_results (hash) VALUES (?)",
+                         ((h,) for h in keep_hashes if h))
+        return conn.execute(
+            "DELETE FROM results WHERE hash NOT IN (SELECT results_hash FROM tasks WHERE results_hash IS NOT NULL)"
+            " AND hash NOT IN (SELECT hash FROM kept_results)"
+        ).rowcount
+
+    # ========= Чтение =========
+
+    def has_session(self, name):
+        return bool(self._query("SELECT 1 FROM sessions WHERE name = ?", (name,)))
+
+    def list_sessions(self, day=None):
+        """Сессии (новые сверху); day="YYYY-MM-DD" — только за этот день"""
+        if day:
+            rows = self._query(
+                "SELECT name, saved_at, task_count FROM sessions WHERE day = ? ORDER BY saved_at DESC", (day,)
+            )
+        else:
+            rows = self._query("SELECT name, saved_at, task_count FROM sessions ORDER BY saved_at DESC")
+        return [{"session_name": row["name"], "datetime": row["saved_at"], "task_count": row["task_count"]}
+                for row in rows]
+
+    def session_days(self):
+        """Дни, за которые есть сохранённые сессии ("YYYY-MM-DD")"""
+        return {row["day"] for row in self._query("SELECT DISTINCT day FROM sessions")}
+
+    def load_session(self, name, lazy=False):
+        """
+        Сессия в том же виде, что и старый JSON: session_name, datetime, tasks.
+        У каждой задачи есть сводка результатов: result_count, result_preview, results_hash.
+        :param lazy: True — без самих результатов (их читает load_results по хэшу, когда нужны)
+        :return: словарь или None, если сессии нет
+        """
+        session = self._query("SELECT name, saved_at FROM sessions WHERE name = ?", (name,))
+        if not session:
+            return None
+        rows = self._query(
+            "SELECT t.*, r.item_count AS result_count, r.preview AS result_preview"
+            + ("" if lazy else ", r.results") +
+            " FROM tasks t LEFT JOIN results r ON r.hash = t.results_hash"
+            " WHERE t.session = ? ORDER BY t.position", (name,)
+        )
+        tasks = []
+        for row in rows:
+            task = dict(row)
+            task["params"] = json.loads(task["params"] or "{}")
+            interval = task["timer_interval"]
+            task["timer_interval"] = int(interval) if interval.isdigit() else interval
+            task["result_count"] = task["result_count"] or 0
+            task["result_preview"] = task["result_preview"] or ""
+            if not lazy:
+                task["results"] = json.loads(task["results"]) if task["results"] else []
+            del task["session"], task["position"]
+            tasks.append(task)
+        return {"session_name": session[0]["name"], "datetime": session[0]["saved_at"], "tasks": tasks}
+
+    def load_results(self, results_hash):
+        rows = self._query("SELECT results FROM results WHERE hash = ?", (results_hash,))
+        return json.loads(rows[0]["results"]) if rows else []
+
+    # ========= Импорт старых JSON-сессий =========
+
+    def import_legacy(self, sessions_dir=LEGACY_SESSIONS_DIR):
+        """
+        Переносит sessions/*.json и их results/<session>/task_N.json в базу.
+        Сессии, которые уже есть в базе, пропускаются; файлы не удаляются.
+        :return: число импортированных сессий
+        """
+        if not os.path.isdir(sessions_dir):
+            return 0
+        existing = {row["name"] for row in self._query("SELECT name FROM sessions")}
+        imported = 0
+        for file in sorted(os.listdir(sessions_dir)):
+            if not file.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(sessions_dir, file), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            name = data.get("session_name") or file[:-len(".json")]
+            if name in existing:
+                continue
+            tasks = []
+            for task in data.get("tasks", []):
+                task = dict(task)
+                task["results"] = _read_results_file(task.get("results_path"))
+                tasks.append(task)
+            saved_at = data.get("datetime") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.save_session(name, tasks, saved_at=saved_at)
+            existing.add(name)
+            imported += 1
+        return imported
+
+    def get_meta(self, key, default=None):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def results_preview(results):
+    """Превью первого элемента результатов (для таблицы предпросмотра и сводки сессии)"""
+    if not isinstance(results, list) or not results:
+        return ""
+    first = results[0]
+    if isinstance(first, dict):
+        preview = first.get("title") or str(first)
+    else:
+        preview = str(first)
+    return preview[:PREVIEW_CHARS]
+
+
+def _read_results_file(path):
+    if not path or not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """
+    Общее хранилище по настройке session_store_path.
+    При первом открытии один раз импортирует старые JSON-сессии.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(load_settings().get("session_store_path") or DEFAULT_SESSION_STORE_PATH)
+            if _store.get_meta("legacy_imported") is None:
+                _store.import_legacy()
+                _store.set_meta("legacy_imported", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        return _store
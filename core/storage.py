@@ -7,8 +7,45 @@ from datetime import datetime
 DEFAULT_SETTINGS = {
     "dark_theme": False,
     "auto_save": False,
+    "auto_save_interval": 60,   # секунд между автосохранениями изменённых задач текущей сессии
     "proxy_rotation": False,
-    "last_used_proxy": ""
+    "last_used_proxy": "",
+    "http_pool_connections": 10,
+    "http_pool_maxsize": 20,
+    "max_concurrency": 20,
+    "per_host_concurrency": 4,
+    "queue_capacity": 500,
+    "http_cache": True,
+    "http_cache_max_entries": 5000,   # URL в кэше ответов; дольше всех не запрашиваемые вытесняются
+    "http_cache_max_mb": 512,         # общий размер кэша ответов на диске
+    "max_body_size": 10 * 1024 * 1024,
+    "work_queue_path": "data/work_queue.db",
+    "parse_workers": None,
+    "parse_pool_min_size": 256 * 1024,
+    "rate_limit_per_host": 2.0,
+    "rate_limit_burst": 4,
+    "rate_limit_per_proxy": False,
+    "retries": 2,
+    "retry_backoff": 1.0,
+    "retry_backoff_max": 30.0,
+    "breaker_threshold": 5,
+    "breaker_cooldown": 60,
+    "proxy_list": "proxies.txt",
+    "proxy_check_url": "https://httpbin.org/ip",
+    "proxy_check_timeout": 5,
+    "proxy_check_interval": 300,
+    "proxy_check_concurrency": 20,
+    "proxy_max_failures": 3,
+    "proxy_direct_fallback": False,
+    "schedule_cron_jitter": 30,
+    "schedule_store_path": "data/schedules.db",
+    "schedule_catchup": "once",
+    "schedule_catchup_rate": 1.0,
+    "schedule_catchup_max": 10,
+    "session_store_path": "data/sessions.db",
+    "run_log_dir": "data/runs",
+    "run_log_segment_mb": 16,     # размер сегмента журнала запусков
+    "run_log_max_segments": 0     # 0 — хранить всю историю
 }
 
 SETTINGS_FILE = "user_settings.json"
@@ -1,77 +1,193 @@
-from PyQt5.QtCore import QObject
-from core.task_worker import TaskWorker
+from PyQt5.QtCore import QObject, pyqtSignal
+from core.task_worker import AsyncTaskRunner
 from core import cookie_manager
-from ui.table_utils import colorize_row_by_status
+from core.job_queue import JobQueue, PRIORITY_MANUAL, QUEUED, DEFAULT_CAPACITY
+from core.retry_policy import describe_breaker
+from core.run_log import get_run_log
+from core.session_service import result_summary
+from core.storage import load_settings
+from ui.task_table_model import COL_STATUS, COL_ACTION, COL_LAST_RUN
 from datetime import datetime
 
 class TaskManager(QObject):
-    def __init__(self, table, task_results, task_params, update_lcd_callback, update_tooltips_callback, lock_row_callback):
+    """
+    Запуск задач по их стабильным ID (см. TaskStore): очередь, движок и
+    применение результатов. Ячейки меняются через TaskTableModel по ID —
+    удаление строк не сбивает выполняющиеся задачи.
+    """
+    tasks_done = pyqtSignal(list)   # ID задач, чьи запуски завершились (пачкой)
+
+    def __init__(self, model, task_results, task_params, update_lcd_callback):
         super().__init__()
-        self.table = table
+        self.model = model
+        self.task_store = model.task_store
         self.task_results = task_results
         self.task_params = task_params
         self.update_lcd = update_lcd_callback
-        self.update_tooltips = update_tooltips_callback
-        self.lock_row = lock_row_callback
-        self.workers = []
 
-    def run_task(self, row):
-        # Получаем данные из таблицы
-        url_item = self.table.item(row, 1)
-        selector_item = self.table.item(row, 2)
-        method_item = self.table.item(row, 3)
+        # ⚙️ Все задачи идут через один асинхронный движок, результаты — пачками
+        self.runner = AsyncTaskRunner(parent=self)
+        self.runner.tasks_finished.connect(self.on_tasks_finished)
+
+        # 📜 Каждый запуск дописывается в журнал (в фоне) — история для аналитики и календаря
+        self.run_log = get_run_log()
 
-        if not url_item or not selector_item or not method_item:
+        # 📋 Очередь перед движком: приоритеты, без дублей, с ограниченной ёмкостью
+        self.queue = JobQueue(
+            capacity=load_settings().get("queue_capacity", DEFAULT_CAPACITY),
+            max_running=self.runner.engine.max_concurrency
+        )
+
+    def run_task(self, task_id, priority=PRIORITY_MANUAL):
+        """
+        Ставит задачу в очередь.
+        :return: QUEUED, DUPLICATE, FULL или None, если задача не заполнена / удалена
+        """
+        task = self.task_store.get(task_id)
+        if task is None:
             return
 
-        url = url_item.text().strip()
-        selector = selector_item.text().strip()
-        method = method_item.text().strip()
+        url = task["url"].strip()
+        selector = task["selector"].strip()
+        method = task["method"].strip()
 
         if not url or not selector:
             return
 
+        payload = {
+            "url": url,
+            "selector": selector,
+            "method": method,
+            "params": self.task_params.get(task_id, {})
+        }
+        state = self.queue.push(task_id, payload, priority)
+        if state != QUEUED:
+            return state
+
+        # Статус
+        self.model.set_text(task_id, COL_STATUS, "🕓 Queued")
+
+        # Заблокировать редактирование
+        self.model.set_locked(task_id, True)
+
+        self._dispatch()
+        return state
+
+    def forget_tasks(self, task_ids):
+        """Задачи удалены из таблицы: снимаем их из очереди, выполняющиеся доработают впустую"""
+        for task_id in task_ids:
+            self.queue.remove(task_id)
+            self.task_results.pop(task_id, None)
+
+    def _dispatch(self):
+        """Отдаёт движку задачи из очереди, пока есть свободные слоты"""
+        while True:
+            job = self.queue.pop()
+            if job is None:
+                return
+            self._start_job(job["key"], job["payload"])
+
+    def _start_job(self, task_id, payload):
+        url = payload["url"]
+
         # Статус
-        self.table.setItem(row, 4, self._create_item("⏳ Running"))
+        self.model.set_text(task_id, COL_STATUS, "⏳ Running")
 
         # Last Run
         now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.table.setItem(row, 10, self._create_item(now_str))
+        self.model.set_text(task_id, COL_LAST_RUN, now_str)
 
-        # Заблокировать редактирование
-        self.lock_row(row, True)
-
-        # Параметры
-        params = self.task_params.get(row, {})
         cookies = cookie_manager.load_cookies(url) or {}
 
-        # Создаём и запускаем воркера
-        worker = TaskWorker(row, url, selector, method, params=params, cookies=cookies)
-        worker.task_finished.connect(self.on_task_finished)
-        self.workers.append(worker)
-        worker.start()
+        # Отдаём задачу движку (поле "row" результата вернёт этот же ID)
+        self.runner.submit(
+            task_id, url, payload["selector"], payload["method"],
+            params=payload["params"], cookies=cookies
+        )
 
-    def on_task_finished(self, row_index, status_text, message, results, cookies):
-        self.table.setItem(row_index, 4, self._create_item(status_text))
-        colorize_row_by_status(self.table, row_index)
-        self.lock_row(row_index, False)  # 🔓 Разблокировать строку
+    def queue_stats(self):
+        """Глубина очереди, число запущенных и среднее время ожидания/выполнения"""
+        return self.queue.stats()
 
-        url = self.table.item(row_index, 1).text()
-        cookie_manager.save_cookies(url, cookies)
+    def on_tasks_finished(self, batch):
+        """Обрабатывает пачку завершённых задач и обновляет UI один раз"""
+        runs = []
+        for outcome in batch:
+            self._apply_result(outcome)
+            if "ran_at" in outcome:   # задачу не удалили, пока она выполнялась
+                runs.append({
+                    "task_id": outcome["row"],
+                    "url": outcome["url"],
+                    "ran_at": outcome["ran_at"],
+                    "duration": outcome.get("duration", 0),
+                    "bytes": outcome.get("bytes", 0),
+                    "status": outcome["status"],
+                    "message": outcome["message"],
+                    "results": outcome["results"],
+                    "results_hash": outcome.get("results_hash"),
+                })
+        if runs:
+            self.run_log.append(runs)
+
+        self._dispatch()
         self.update_lcd()
-        
-        self.task_results[row_index] = {
+        self.tasks_done.emit([outcome["row"] for outcome in batch])
+
+    def _apply_result(self, outcome):
+        """
+        Применяет результат одной задачи.
+        Если извлечённые данные совпали с прошлым запуском (по хэшу), результаты
+        не перезаписываются и лишние обновления UI пропускаются.
+        :return: True, если результаты изменились
+        """
+        task_id = outcome["row"]
+        status_text = outcome["status"]
+        results_hash = outcome.get("results_hash")
+
+        self.queue.finish(task_id)
+        task = self.task_store.get(task_id)
+        if task is None:
+            return False   # задачу удалили, пока она выполнялась
+        self.model.set_text(task_id, COL_STATUS, status_text)
+        self.model.set_tooltip(task_id, COL_STATUS, self._status_tooltip(outcome))
+        self.model.set_locked(task_id, False)  # 🔓 Разблокировать строку
+
+        url = task["url"]
+        if outcome.get("cookies_changed", True):
+            cookie_manager.save_cookies(url, outcome["cookies"])
+
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        outcome["url"] = url
+        outcome["ran_at"] = now_str
+        previous = self.task_results.get(task_id)
+        changed = not (results_hash and previous and previous.get("results_hash") == results_hash)
+
+        # 🔄 / ＝ Индикатор изменений с прошлого запуска (колонка Action)
+        if results_hash is None:
+            marker = "⚠ Failed"
+        else:
+            marker = "🔄 Changed" if changed else "＝ Unchanged"
+        self.model.set_text(task_id, COL_ACTION, marker)
+
+        if not changed:
+            previous.update({"status": status_text, "message": outcome["message"], "last_run": now_str})
+            return False
+
+        self.task_results[task_id] = {
             "url": url,
             "status": status_text,
-            "message": message,
-            "results": results,
-            "last_run": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            "message": outcome["message"],
+            "results": outcome["results"],
+            "last_run": now_str,
+            **result_summary(outcome["results"], results_hash)
         }
+        return True
 
-        self.table.resizeColumnsToContents()
-        self.update_tooltips(row_index)  # обновим tooltip (cookies, params и т.д.)
-
-
-    def _create_item(self, text):
-        from PyQt5.QtWidgets import QTableWidgetItem
-        return QTableWidgetItem(text)
+    def _status_tooltip(self, outcome):
+        """Подсказка колонки Status: число попыток и состояние breaker'а хоста"""
+        lines = [outcome["message"]]
+        if outcome.get("attempts", 0) > 1:
+            lines.append(f"🔁 Attempts: {outcome['attempts']}")
+        if outcome.get("breaker"):
+            lines.append(describe_breaker(outcome["host"], outcome["breaker"]))
+        return "\n".join(lines)
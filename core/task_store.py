@@ -0,0 +1,148 @@
+# core/task_store.py
+
+import uuid
+from collections import defaultdict
+from urllib.parse import urlparse
+
+# Поля задачи, которые хранит TaskStore (параметры, результаты и расписания — в своих словарях по ID)
+TASK_FIELDS = ("url", "selector", "method", "status", "last_run")
+
+
+def new_task_id():
+    return uuid.uuid4().hex
+
+
+def task_host(url):
+    """Хост задачи для индекса; URL без схемы тоже понимаем"""
+    url = (url or "").strip()
+    if url and "://" not in url:
+        url = f"http://{url}"
+    return (urlparse(url).hostname or "").lower()
+
+
+class TaskStore:
+    """
+    Задачи по стабильным ID вместо номеров строк таблицы.
+    Основной словарь ID -> задача и вторичные индексы по URL, хосту и статусу:
+    поиск, фильтры и точечные обновления — O(1), удаление строки не сдвигает
+    ключи остальных задач. Порядок задач = порядок строк таблицы.
+    """
+
+    def __init__(self):
+        self._tasks = {}                    # id -> {"id", "url", "selector", "method", "status", "last_run"}
+        self._order = []                    # ID в порядке строк
+        self._rows = {}                     # id -> номер строки (пересчитывается после удаления)
+        self._by_url = defaultdict(set)
+        self._by_host = defaultdict(set)
+        self._by_status = defaultdict(set)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def __iter__(self):
+        """Задачи в порядке строк"""
+        return (self._tasks[task_id] for task_id in list(self._order))
+
+    # ========= Изменение =========
+
+    def add(self, url="", selector="", method="CSS", status="", last_run="", task_id=None):
+        """Добавляет задачу в конец; :return: её ID"""
+        task_id = task_id or new_task_id()
+        if task_id in self._tasks:
+            raise ValueError(f"Task {task_id} already exists")
+        task = {"id": task_id, "url": url, "selector": selector, "method": method,
+                "status": status, "last_run": last_run}
+        self._tasks[task_id] = task
+        self._rows[task_id] = len(self._order)
+        self._order.append(task_id)
+        self._index(task)
+        return task_id
+
+    def update(self, task_id, **fields):
+        """
+        Меняет поля задачи и поддерживает индексы.
+        :return: словарь изменившихся полей (пустой — ничего не поменялось или задачи нет)
+        """
+        task = self._tasks.get(task_id)
+        if task is None:
+            return {}
+        changed = {k: v for k, v in fields.items() if k in TASK_FIELDS and task.get(k) != v}
+        if not changed:
+            return {}
+        self._unindex(task)
+        task.update(changed)
+        self._index(task)
+        return changed
+
+    def remove(self, task_ids):
+        """Удаляет задачи; :return: список удалённых ID"""
+        removed = []
+        for task_id in task_ids:
+            task = self._tasks.pop(task_id, None)
+            if task is not None:
+                self._unindex(task)
+                removed.append(task_id)
+        if removed:
+            gone = set(removed)
+            self._order = [task_id for task_id in self._order if task_id not in gone]
+            self._rows = {task_id: row for row, task_id in enumerate(self._order)}
+        return removed
+
+    def clear(self):
+        self._tasks.clear()
+        self._order.clear()
+        self._rows.clear()
+        self._by_url.clear()
+        self._by_host.clear()
+        self._by_status.clear()
+
+    # ========= Чтение =========
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    def ids(self):
+        return list(self._order)
+
+    def row_of(self, task_id):
+        """Номер строки таблицы для задачи (None — задачи уже нет)"""
+        return self._rows.get(task_id)
+
+    def id_at(self, row):
+        """ID задачи в строке row (None — строки нет)"""
+        return self._order[row] if 0 <= row < len(self._order) else None
+
+    def by_url(self, url):
+        return set(self._by_url.get(url, ()))
+
+    def by_host(self, host):
+        return set(self._by_host.get((host or "").lower(), ()))
+
+    def by_status(self, status):
+        return set(self._by_status.get(status, ()))
+
+    def status_counts(self):
+        """{статус: число задач}"""
+        return {status: len(ids) for status, ids in self._by_status.items() if ids}
+
+    # ========= Индексы =========
+
+    def _index(self, task):
+        task_id = task["id"]
+        self._by_url[task["url"]].add(task_id)
+        self._by_host[task_host(task["url"])].add(task_id)
+        self._by_status[task["status"]].add(task_id)
+
+    def _unindex(self, task):
+        task_id = task["id"]
+        for index, key in ((self._by_url, task["url"]),
+                           (self._by_host, task_host(task["url"])),
+                           (self._by_status, task["status"])):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del index[key]
@@ -1,59 +1,64 @@
-from PyQt5.QtCore import QThread, pyqtSignal
-from core.scraper import scrape_website
-
-class TaskWorker(QThread):
-    # 🔄 Добавили cookies в сигнал
-    task_finished = pyqtSignal(int, str, str, list, dict)  # row_index, status, message, results, cookies
-
-    def __init__(self, row_index, url, selector, method, params=None, cookies=None):
-        super().__init__()
-        self.row_index = row_index
-        self.url = url
-        self.selector = selector
-        self.method = method
-        self.params = params or {}
-        self.cookies = cookies or {}
-
-    def run(self):
-        try:
-            use_xpath = self.method.lower() == "xpath"
-
-            # 🔽 Парсим сайт, получаем результат + session.cookies
-            results, final_cookies = scrape_website(
-                url=self.url,
-                selector=self.selector,
-                use_xpath=use_xpath,
-                proxy=self.params.get("proxy"),
-                headers=self.params.get("headers"),
-                user_agent=self.params.get("user_agent"),
-                timeout=self.params.get("timeout", 10),
-                cookies=self.cookies
-            )
-
-            # 🔼 Передаём всё: статус, сообщение, данные, cookies
-            if results:
-                self.task_finished.emit(
-                    self.row_index,
-                    "✅ Success",
-                    f"Elements finded: {len(results)}",
-                    results,
-                    final_cookies
-                )
-            else:
-                self.task_finished.emit(
-                    self.row_index,
-                    "✅ Success",
-                    "Elements not find",
-                    results,
-                    final_cookies
-                )
-
-        except Exception as e:
-            # ⛔ В случае ошибки — пустые результаты, куки не обновляем
-            self.task_finished.emit(
-                self.row_index,
-                "❌ ERROR",
-                str(e),
-                [],
-                self.cookies
-            )
+import threading
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from core.async_engine import get_engine
+
+# Результаты копятся столько перед отправкой в GUI: ~один кадр — одно обновление таблицы и счётчиков
+FLUSH_INTERVAL_MS = 16
+
+class AsyncTaskRunner(QObject):
+    """
+    Мост между асинхронным движком и Qt.
+    Задачи выполняются в одном фоновом event loop, а результаты
+    собираются в пачки и приходят в GUI-поток одним сигналом.
+    """
+    # 📦 Пачка результатов движка: [{"row", "status", "message", "results",
+    #     "results_hash", "cookies", "cookies_changed"}, ...]
+    tasks_finished = pyqtSignal(list)
+
+    _batch_ready = pyqtSignal()
+
+    def __init__(self, engine=None, parent=None, flush_interval_ms=FLUSH_INTERVAL_MS):
+        super().__init__(parent)
+        self.engine = engine or get_engine()
+        self._pending = deque()
+        self._lock = threading.Lock()
+        # Результаты, пришедшие за один кадр, уходят в GUI одной пачкой
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self._flush)
+        # Сигнал испускается из потока движка, слот выполняется в GUI-потоке
+        self._batch_ready.connect(self._schedule_flush)
+
+    def submit(self, task_id, url, selector, method, params=None, cookies=None):
+        job = {
+            "row": task_id,
+            "url": url,
+            "selector": selector,
+            "method": method,
+            "params": params or {},
+            "cookies": cookies or {},
+        }
+        return self.engine.submit(job, self._on_job_done)
+
+    def _on_job_done(self, outcome):
+        # Поток движка: копим результаты, будим GUI только для первой записи пачки
+        with self._lock:
+            wake = not self._pending
+            self._pending.append(outcome)
+        if wake:
+            self._batch_ready.emit()
+
+    def _schedule_flush(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        if not batch:
+            return
+
+        self.tasks_finished.emit(batch)
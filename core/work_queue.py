@@ -0,0 +1,283 @@
+# core/work_queue.py
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+# Общая очередь задач для нескольких процессов / машин.
+# SQLite-файл в WAL-режиме: на одной машине или на общем диске (не NFS без блокировок).
+DEFAULT_QUEUE_PATH = os.path.join("data", "work_queue.db")
+
+DEFAULT_LEASE_SECONDS = 60    # сколько задача принадлежит воркеру без продления
+DEFAULT_MAX_ATTEMPTS = 3      # попыток с учётом смерти воркера
+WORKER_STALE_SECONDS = 30     # воркер без heartbeat дольше — считается пропавшим
+
+# Состояния задания
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch         TEXT NOT NULL,
+    task_index    INTEGER NOT NULL,
+    url           TEXT NOT NULL,
+    selector      TEXT NOT NULL,
+    method        TEXT NOT NULL,
+    params        TEXT NOT NULL DEFAULT '{}',
+    state         TEXT NOT NULL DEFAULT 'pending',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    enqueued_at   REAL NOT NULL,
+    started_at    REAL,
+    finished_at   REAL,
+    status        TEXT,
+    message       TEXT,
+    results       TEXT,
+    results_hash  TEXT,
+    cookies       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, task_index);
+
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id    TEXT PRIMARY KEY,
+    host         TEXT,
+    pid          INTEGER,
+    started_at   REAL,
+    last_seen    REAL,
+    jobs_done    INTEGER NOT NULL DEFAULT 0,
+    jobs_failed  INTEGER NOT NULL DEFAULT 0,
+    busy_seconds REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+def new_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def new_batch_id(name="batch"):
+    return f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+
+
+class WorkQueue:
+    """
+    Очередь заданий с арендой (lease).
+    Воркер берёт задания через lease(), продлевает аренду heartbeat() и сдаёт
+    результат complete(). Если воркер умер, аренда истекает и задание
+    возвращается в очередь, пока не кончатся попытки.
+    Один объект — одно соединение, использовать из одного потока.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, timeout=30):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _transaction(self):
+        """BEGIN IMMEDIATE: запись блокируется сразу, два воркера не возьмут одно задание"""
+        return _Transaction(self._conn)
+
+    # ========= Координатор =========
+
+    def submit(self, batch, tasks, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Ставит задачи сессии в очередь.
+        :param tasks: словари url, selector, method, params (как в session_service)
+        :return: число поставленных заданий (задачи без URL/селектора пропускаются)
+        """
+        now = time.time()
+        rows = [
+            (batch, index, task["url"], task["selector"], task.get("method") or "CSS",
+             json.dumps(task.get("params") or {}, ensure_ascii=False), max_attempts, now)
+            for index, task in enumerate(tasks)
+            if task.get("url") and task.get("selector")
+        ]
+        with self._transaction():
+            self._conn.executemany(
+                "INSERT INTO jobs (batch, task_index, url, selector, method, params, max_attempts, enqueued_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def batches(self):
+        """Сводка по пачкам: batch, total, pending, leased, done, failed, submitted_at"""
+        self._expire_leases()
+        cursor = self._conn.execute(
+            "SELECT batch, COUNT(*) AS total,"
+            " SUM(state = 'pending') AS pending, SUM(state = 'leased') AS leased,"
+            " SUM(state = 'done') AS done, SUM(state = 'failed') AS failed,"
+            " MIN(enqueued_at) AS submitted_at"
+            " FROM jobs GROUP BY batch ORDER BY submitted_at DESC"
+        )
+        return [dict(row) for row in cursor]
+
+    def batch_status(self, batch):
+        for row in self.batches():
+            if row["batch"] == batch:
+                return row
+        return None
+
+    def results(self, batch):
+        """Завершённые задания пачки в порядке задач сессии"""
+        cursor = self._conn.execute(
+            "SELECT * FROM jobs WHERE batch = ? AND state IN ('done', 'failed') ORDER BY task_index",
+            (batch,),
+        )
+        for row in cursor:
+            yield _job_dict(row)
+
+    def delete_batch(self, batch):
+        with self._transaction():
+            self._conn.execute("DELETE FROM jobs WHERE batch = ?", (batch,))
+
+    # ========= Воркер =========
+
+    def register_worker(self, worker_id):
+        now = time.time()
+        with self._transaction():
+            self._conn.execute(
+                "INSERT INTO workers (worker_id, host, pid, started_at, last_seen) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+                (worker_id, socket.gethostname(), os.getpid(), now, now),
+            )
+
+    def lease(self, worker_id, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Забирает до limit заданий в аренду; просроченные аренды сначала возвращаются в очередь"""
+        now = time.time()
+        with self._transaction():
+            self._expire_leases(now)
+            ids = [row["id"] for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE state = 'pending' ORDER BY id LIMIT ?", (limit,)
+            )]
+            if ids:
+                marks = ",".join("?" * len(ids))
+                self._conn.execute(
+                    f"UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?,"
+                    f" attempts = attempts + 1, started_at = ? WHERE id IN ({marks})",
+                    (worker_id, now + lease_seconds, now, *ids),
+                )
+            self._conn.execute("UPDATE workers SET last_seen = ? WHERE worker_id = ?", (now, worker_id))
+            if not ids:
+                return []
+            rows = self._conn.execute(f"SELECT * FROM jobs WHERE id IN ({marks}) ORDER BY id", ids).fetchall()
+        return [_job_dict(row) for row in rows]
+
+    def heartbeat(self, worker_id, job_ids, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Продлевает аренду заданий, которые воркер ещё выполняет"""
+        now = time.time()
+        with self._transaction():
+            self._conn.execute("UPDATE workers SET last_seen = ? WHERE worker_id = ?", (now, worker_id))
+            if job_ids:
+                marks = ",".join("?" * len(job_ids))
+                self._conn.execute(
+                    f"UPDATE jobs SET lease_expires = ? WHERE state = 'leased' AND lease_owner = ?"
+                    f" AND id IN ({marks})",
+                    (now + lease_seconds, worker_id, *job_ids),
+                )
+
+    def complete(self, job_id, worker_id, outcome):
+        """
+        Сдаёт результат задания (словарь как у ScrapeEngine).
+        :return: False, если аренда уже истекла и задание отдано другому воркеру
+        """
+        now = time.time()
+        with self._transaction():
+            updated = self._conn.execute(
+                "UPDATE jobs SET state = 'done', finished_at = ?, lease_owner = NULL, lease_expires = NULL,"
+                " status = ?, message = ?, results = ?, results_hash = ?, cookies = ?"
+                " WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (now, outcome["status"], outcome["message"],
+                 json.dumps(outcome["results"], ensure_ascii=False), outcome.get("results_hash"),
+                 json.dumps(outcome.get("cookies") or {}, ensure_ascii=False), job_id, worker_id),
+            ).rowcount
+            if updated:
+                self._count_job(worker_id, job_id, now, failed=outcome.get("results_hash") is None)
+        return bool(updated)
+
+    def release(self, job_id, worker_id, message=""):
+        """Возвращает задание в очередь (или помечает failed, если попытки кончились)"""
+        now = time.time()
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE jobs SET lease_owner = NULL, lease_expires = NULL, message = ?,"
+                " state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,"
+                " finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END"
+                " WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (message, now, job_id, worker_id),
+            )
+
+    def worker_stats(self, now=None):
+        """Воркеры: выполнено, ошибок, заданий в секунду, когда видели, жив ли"""
+        now = now or time.time()
+        stats = []
+        for row in self._conn.execute("SELECT * FROM workers ORDER BY started_at"):
+            worker = dict(row)
+            uptime = max((worker["last_seen"] or now) - (worker["started_at"] or now), 1e-9)
+            worker["throughput"] = (worker["jobs_done"] + worker["jobs_failed"]) / uptime
+            worker["alive"] = now - (worker["last_seen"] or 0) < WORKER_STALE_SECONDS
+            worker["leased"] = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'leased' AND lease_owner = ?", (worker["worker_id"],)
+            ).fetchone()[0]
+            stats.append(worker)
+        return stats
+
+    # ========= Внутреннее =========
+
+    def _expire_leases(self, now=None):
+        """Аренды умерших воркеров: задание снова в очередь, без попыток — failed"""
+        now = now or time.time()
+        self._conn.execute(
+            "UPDATE jobs SET lease_owner = NULL, lease_expires = NULL, message = 'Lease expired',"
+            " state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,"
+            " finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END"
+            " WHERE state = 'leased' AND lease_expires < ?",
+            (now, now),
+        )
+
+    def _count_job(self, worker_id, job_id, now, failed):
+        started = self._conn.execute("SELECT started_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        self._conn.execute(
+            "UPDATE workers SET last_seen = ?, jobs_done = jobs_done + ?, jobs_failed = jobs_failed + ?,"
+            " busy_seconds = busy_seconds + ? WHERE worker_id = ?",
+            (now, 0 if failed else 1, 1 if failed else 0, now - (started or now), worker_id),
+        )
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _job_dict(row):
+    job = dict(row)
+    job["params"] = json.loads(job["params"] or "{}")
+    job["results"] = json.loads(job["results"]) if job.get("results") else []
+    job["cookies"] = json.loads(job["cookies"]) if job.get("cookies") else {}
+    return job
@@ -5,13 +5,14 @@ from datetime import datetime
 
 
 class AnalyticsDialog(QDialog):
-    def __init__(self, parent=None, rows=None, task_results=None):
+    def __init__(self, parent=None, rows=None, task_results=None, run_log=None):
         super().__init__(parent)
         self.setWindowTitle("📊 Analytics")
         self.resize(800, 600)
 
         self.rows = rows or []
         self.task_results = task_results or {}
+        self.run_log = run_log   # core/run_log.py: история запусков для LineChart
 
         self.layout = QVBoxLayout(self)
         
@@ -23,7 +24,7 @@ class AnalyticsDialog(QDialog):
 
         # Фильтрация по статусу
         self.status_filter_combo = QComboBox()
-        self.status_filter_combo.addItems(["Все", "✅ Success", "❌ ERROR", "⏳ In Progress", "⏸️ Stopped"])
+        self.status_filter_combo.addItems(["Все", "✅ Success", "✅ Unchanged", "❌ ERROR", "⛔ Circuit open", "⛔ No live proxies", "⏳ In Progress", "⏸️ Stopped"])
         self.status_filter_combo.currentIndexChanged.connect(self.update_chart)
         self.layout.addWidget(self.status_filter_combo)
         
@@ -73,14 +74,13 @@ class AnalyticsDialog(QDialog):
                 continue
 
             url = task.get("url", f"Row {row}")
-            results = task.get("results", [])
 
             short_label = url.replace("https://", "").replace("http://", "")
             if len(short_label) > 25:
                 short_label = short_label[:25] + "..."
 
             labels.append(short_label)
-            counts.append(len(results))
+            counts.append(task.get("result_count", len(task.get("results", []))))
 
         if not labels:
             ax.text(0.5, 0.5, "No data to show", ha="center", va="center", fontsize=12)
@@ -139,43 +139,43 @@ class AnalyticsDialog(QDialog):
         ax = self.canvas.figure.add_subplot(111)
         ax.clear()
 
-        times = []
-        counts = []
-        labels = []
-
+        plotted = False
         for row in rows:
             task = self.task_results.get(row)
-            print("ROW:", row)
-            print("last_run =", task.get("last_run"))
             if not task:
                 continue
 
-            last_run = task.get("last_run")
-            results = task.get("results", [])
-
-            if not last_run or not results:
+            # 📜 Все запуски задачи из индекса журнала (без чтения результатов);
+            #    без журнала — только последний запуск
+            if self.run_log:
+                points = [(run["ran_at"], run["item_count"]) for run in self.run_log.runs(task_id=row)]
+            else:
+                points = [(task.get("last_run"), task.get("result_count", len(task.get("results", []))))]
+
+            times = []
+            counts = []
+            for ran_at, count in points:
+                try:
+                    times.append(datetime.strptime(ran_at or "", "%Y-%m-%d %H:%M:%S"))
+                except ValueError:
+                    continue
+                counts.append(count)
+            if not times:
                 continue
 
-            try:
-                time_obj = datetime.strptime(last_run, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                continue
-
-            times.append(time_obj)
-            counts.append(len(results))
-
             url = task.get("url", f"Row {row}")
             short = url.replace("https://", "").replace("http://", "")
             short = short[:25] + "..." if len(short) > 25 else short
-            labels.append(short)
+            ax.plot(times, counts, marker="o", label=short)
+            plotted = True
 
-        if not times:
+        if not plotted:
             ax.text(0.5, 0.5, "No data for graphic", ha="center", va="center")
         else:
-            ax.plot(times, counts, marker="o", color="green")
-            ax.set_title("Startup time results")
+            ax.set_title("Results over time")
             ax.set_xlabel("Time")
             ax.set_ylabel("Number of elements found")
+            ax.legend(fontsize="small")
             ax.grid(True)
 
         self.canvas.draw()
@@ -5,16 +5,18 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import QDate
 from PyQt5.QtGui import QTextCharFormat, QBrush, QColor
 from datetime import datetime
-from core.session_service import list_sessions, load_session
+from core.session_service import list_sessions, load_saved_session, session_days
 
 
 class CalendarDialog(QDialog):
-    def __init__(self, parent, task_results, load_session_callback):
+    def __init__(self, parent, task_results, load_session_callback, task_store=None, run_log=None):
         super().__init__(parent)
         self.setWindowTitle("📆 History by date")
         self.resize(800, 500)
 
         self.task_results = task_results or {}
+        self.task_store = task_store
+        self.run_log = run_log   # core/run_log.py: все запуски, а не только последний
         self.load_session_callback = load_session_callback
 
         # Layouts
@@ -66,6 +68,13 @@ class CalendarDialog(QDialog):
         format_session.setBackground(QBrush(QColor("lightblue")))
 
         task_dates = set()
+        if self.run_log:
+            # Дни с запусками — один запрос к индексу журнала
+            for day in self.run_log.run_days():
+                try:
+                    task_dates.add(datetime.strptime(day, "%Y-%m-%d").date())
+                except ValueError:
+                    continue
         for data in self.task_results.values():
             last_run = data.get("last_run", "")
             if last_run:
@@ -75,15 +84,13 @@ class CalendarDialog(QDialog):
                 except:
                     continue
 
+        # Дни с сессиями — один индексный запрос, сами сессии не читаются
         session_dates = set()
-        for session in list_sessions():
-            dt_str = session.get("datetime", "")
-            if dt_str:
-                try:
-                    dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-                    session_dates.add(dt.date())
-                except:
-                    continue
+        for day in session_days():
+            try:
+                session_dates.add(datetime.strptime(day, "%Y-%m-%d").date())
+            except ValueError:
+                continue
 
         for date in task_dates:
             self.calendar.setDateTextFormat(QDate(date.year, date.month, date.day), format_task)
@@ -97,21 +104,41 @@ class CalendarDialog(QDialog):
         selected_date = self.calendar.selectedDate().toPyDate()
         self.selected_str = selected_date.strftime("%Y-%m-%d")
 
-        # Filter task_results
         self.task_list.clear()
         self.filtered_rows = []
-        for row, data in self.task_results.items():
-            last_run = data.get("last_run", "")
-            if last_run.startswith(self.selected_str):
-                self.task_list.addItem(f"#{row+1} → {data.get('url')}")
-                self.filtered_rows.append(row)
-
+        if self.run_log:
+            self.list_runs()
+        else:
+            # Filter task_results
+            for task_id, data in self.task_results.items():
+                last_run = data.get("last_run", "")
+                if last_run.startswith(self.selected_str):
+                    row = self.task_store.row_of(task_id) if self.task_store else None
+                    number = f"#{row + 1}" if row is not None else "•"
+                    self.task_list.addItem(f"{number} → {data.get('url')}")
+                    self.filtered_rows.append(task_id)
+
+        self.list_sessions()
+
+    def list_runs(self):
+        """Все запуски за выбранный день из журнала: время, задача, статус, число элементов"""
+        seen = set()
+        for run in self.run_log.runs_on(self.selected_str):
+            task_id = run["task_id"]
+            row = self.task_store.row_of(task_id) if self.task_store else None
+            number = f"#{row + 1}" if row is not None else "•"
+            self.task_list.addItem(
+                f"{run['ran_at'][11:]} {number} → {run['url']} {run['status']} ({run['item_count']})"
+            )
+            if row is not None and task_id not in seen:
+                seen.add(task_id)
+                self.filtered_rows.append(task_id)
+
+    def list_sessions(self):
         # Filter sessions
         self.session_list.clear()
-        for session in list_sessions():
-            session_date = session.get("datetime", "").split(" ")[0]
-            if session_date == self.selected_str:
-                self.session_list.addItem(session.get("session_name"))
+        for session in list_sessions(day=self.selected_str):
+            self.session_list.addItem(session.get("session_name"))
 
     def load_selected_session(self):
         item = self.session_list.currentItem()
@@ -119,9 +146,10 @@ class CalendarDialog(QDialog):
             QMessageBox.warning(self, "ERORR", "Choose session to load")
             return
 
-        session_name = item.text()
-        path = f"sessions/{session_name}.json"
-        session_data = load_session(path)
+        session_data = load_saved_session(item.text())
+        if session_data is None:
+            QMessageBox.warning(self, "ERORR", "Session not found")
+            return
         self.load_session_callback(session_data)
         self.accept()
 
@@ -0,0 +1,152 @@
+from datetime import datetime
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton, QMessageBox
+)
+from PyQt5.QtCore import QTimer
+from core.cluster import queue_path_from_settings
+from core.work_queue import WorkQueue, DONE, new_batch_id
+
+REFRESH_MS = 2000
+
+
+class ClusterDialog(QDialog):
+    """
+    Тонкий клиент распределённой очереди: отправляет задачи таблицы воркерам
+    (python cluster.py work) и показывает сводный статус пачек и воркеров.
+    """
+
+    def __init__(self, parent=None, collect_tasks=None, apply_outcomes=None):
+        super().__init__(parent)
+        self.setWindowTitle("Cluster")
+        self.resize(800, 500)
+        self.collect_tasks = collect_tasks
+        self.apply_outcomes = apply_outcomes
+        self.work_queue = WorkQueue(queue_path_from_settings())
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Queue: {self.work_queue.path}"))
+
+        # Пачки
+        layout.addWidget(QLabel("Batches"))
+        self.batches_table = QTableWidget()
+        self.batches_table.setColumnCount(7)
+        self.batches_table.setHorizontalHeaderLabels(
+            ["Batch", "Submitted", "Done", "Failed", "Pending", "Leased", "Total"]
+        )
+        self.batches_table.setSelectionBehavior(QTableWidget.SelectRows)
+        layout.addWidget(self.batches_table)
+
+        # Воркеры
+        layout.addWidget(QLabel("Workers"))
+        self.workers_table = QTableWidget()
+        self.workers_table.setColumnCount(7)
+        self.workers_table.setHorizontalHeaderLabels(
+            ["Worker", "Host", "State", "Done", "Failed", "Leased", "Jobs/s"]
+        )
+        layout.addWidget(self.workers_table)
+
+        # Кнопки
+        btn_layout = QHBoxLayout()
+
+        self.submit_button = QPushButton("📤 Submit tasks")
+        self.submit_button.clicked.connect(self.submit_tasks)
+        btn_layout.addWidget(self.submit_button)
+
+        self.apply_button = QPushButton("📥 Apply results")
+        self.apply_button.clicked.connect(self.apply_selected_batch)
+        btn_layout.addWidget(self.apply_button)
+
+        self.delete_button = QPushButton("🗑 Delete batch")
+        self.delete_button.clicked.connect(self.delete_selected_batch)
+        btn_layout.addWidget(self.delete_button)
+
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.accept)
+        btn_layout.addWidget(self.close_button)
+
+        layout.addLayout(btn_layout)
+
+        # 🔄 Статус обновляется сам, пока окно открыто
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+        self.refresh()
+
+    def refresh(self):
+        selected = self.get_selected_batch()
+
+        batches = self.work_queue.batches()
+        self.batches_table.setRowCount(len(batches))
+        for i, row in enumerate(batches):
+            submitted = datetime.fromtimestamp(row["submitted_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            values = [row["batch"], submitted, row["done"], row["failed"], row["pending"], row["leased"], row["total"]]
+            for col, value in enumerate(values):
+                self.batches_table.setItem(i, col, QTableWidgetItem(str(value or 0) if col > 1 else value))
+            if row["batch"] == selected:
+                self.batches_table.selectRow(i)
+
+        workers = self.work_queue.worker_stats()
+        self.workers_table.setRowCount(len(workers))
+        for i, worker in enumerate(workers):
+            values = [
+                worker["worker_id"], worker["host"], "🟢 alive" if worker["alive"] else "⚪ gone",
+                worker["jobs_done"], worker["jobs_failed"], worker["leased"], f"{worker['throughput']:.2f}",
+            ]
+            for col, value in enumerate(values):
+                self.workers_table.setItem(i, col, QTableWidgetItem(str(value)))
+
+        self.batches_table.resizeColumnsToContents()
+        self.workers_table.resizeColumnsToContents()
+
+    def get_selected_batch(self):
+        row = self.batches_table.currentRow()
+        if row < 0 or not self.batches_table.item(row, 0):
+            return None
+        return self.batches_table.item(row, 0).text()
+
+    def submit_tasks(self):
+        tasks = self.collect_tasks() if self.collect_tasks else []
+        batch = new_batch_id("gui")
+        count = self.work_queue.submit(batch, tasks)
+        if not count:
+            QMessageBox.warning(self, "Error", "No tasks to submit")
+            return
+        self.refresh()
+        QMessageBox.information(self, "Cluster", f"Submitted {count} tasks as {batch}")
+
+    def apply_selected_batch(self):
+        batch = self.get_selected_batch()
+        if not batch:
+            QMessageBox.warning(self, "Error", "Choose batch to apply")
+            return
+
+        outcomes = []
+        for job in self.work_queue.results(batch):
+            outcomes.append({
+                "row": job["task_index"],
+                "url": job["url"],
+                "status": job["status"] or "❌ ERROR",
+                "message": job["message"] or "",
+                "results": job["results"] if job["state"] == DONE else [],
+                "results_hash": job["results_hash"] if job["state"] == DONE else None,
+                "cookies": job["cookies"],
+                "cookies_changed": False,
+            })
+        applied = self.apply_outcomes(outcomes) if self.apply_outcomes else 0
+        QMessageBox.information(self, "Cluster", f"Applied {applied} of {len(outcomes)} results")
+
+    def delete_selected_batch(self):
+        batch = self.get_selected_batch()
+        if not batch:
+            QMessageBox.warning(self, "Error", "Choose batch to delete")
+            return
+
+        confirm = QMessageBox.question(self, "Accepting", f"Delete batch {batch}?", QMessageBox.Yes | QMessageBox.No)
+        if confirm == QMessageBox.Yes:
+            self.work_queue.delete_batch(batch)
+            self.refresh()
+
+    def done(self, result):
+        self.timer.stop()
+        self.work_queue.close()
+        super().done(result)
@@ -1,6 +1,7 @@
 from .base_dialog import BaseDialog
 import json
-from PyQt5.QtWidgets import (QLineEdit, QLabel, QTextEdit, QSpinBox, QMessageBox, QDialog)
+from core.storage import load_settings
+from PyQt5.QtWidgets import (QLineEdit, QLabel, QTextEdit, QSpinBox, QMessageBox, QDialog, QComboBox)
 
 class ParamsDialog(BaseDialog):
     def __init__(self, parent=None, existing_params=None):
@@ -36,6 +37,21 @@ class ParamsDialog(BaseDialog):
         self.add_widget(QLabel("⏱️ Timeout (sec)"))
         self.add_widget(self.timeout_input)
 
+        # Retries (повторы временных ошибок: обрыв, таймаут, 429, 5xx)
+        self.retries_input = QSpinBox()
+        self.retries_input.setRange(0, 10)
+        self.retries_input.setValue(existing_params.get("retries", load_settings().get("retries", 2)))
+        self.add_widget(QLabel("🔁 Retries on network errors / 5xx"))
+        self.add_widget(self.retries_input)
+
+        # Output mode
+        self.output_input = QComboBox()
+        self.output_input.setEditable(True)  # можно ввести attr:data-id и т.п.
+        self.output_input.addItems(["html", "text", "attr:href", "attr:src"])
+        self.output_input.setCurrentText(existing_params.get("output", "html"))
+        self.add_widget(QLabel("📤 Output (html / text / attr:<name>)"))
+        self.add_widget(self.output_input)
+
     def accept(self):
         try:
             headers = json.loads(self.headers_input.toPlainText())
@@ -47,7 +63,9 @@ class ParamsDialog(BaseDialog):
             "proxy": self.proxy_input.text().strip(),
             "user_agent": self.ua_input.text().strip(),
             "headers": headers,
-            "timeout": self.timeout_input.value()
+            "timeout": self.timeout_input.value(),
+            "retries": self.retries_input.value(),
+            "output": self.output_input.currentText().strip() or "html"
         }
         super().accept()
 
@@ -0,0 +1,101 @@
+import threading
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton, QCheckBox
+)
+from PyQt5.QtCore import QTimer
+from core.proxy_pool import get_proxy_pool, reload_proxy_list, DEFAULT_PROXY_LIST
+from core.async_engine import reload_engine_settings
+from core.storage import load_settings, save_settings
+
+REFRESH_MS = 1000
+
+
+class ProxyDialog(QDialog):
+    """Пул прокси: состояние, задержка и доля успехов; ручная проверка и перечитывание списка"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Proxy Pool")
+        self.resize(800, 400)
+        self._check_thread = None
+
+        layout = QVBoxLayout(self)
+
+        settings = load_settings()
+        pool = get_proxy_pool()
+        layout.addWidget(QLabel(
+            f"List: {settings.get('proxy_list', DEFAULT_PROXY_LIST)}  •  check URL: {pool.check_url}"
+        ))
+
+        self.rotation_checkbox = QCheckBox("Rotate requests across healthy proxies")
+        self.rotation_checkbox.setChecked(bool(settings.get("proxy_rotation", False)))
+        self.rotation_checkbox.toggled.connect(self.set_rotation)
+        layout.addWidget(self.rotation_checkbox)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(6)
+        self.table.setHorizontalHeaderLabels(
+            ["Proxy", "State", "Latency, ms", "Success", "Requests / in flight", "Last error"]
+        )
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+
+        self.check_button = QPushButton("🩺 Check now")
+        self.check_button.clicked.connect(self.check_now)
+        btn_layout.addWidget(self.check_button)
+
+        self.reload_button = QPushButton("🔄 Reload list")
+        self.reload_button.clicked.connect(self.reload_list)
+        btn_layout.addWidget(self.reload_button)
+
+        btn_layout.addStretch()
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.accept)
+        btn_layout.addWidget(self.close_button)
+        layout.addLayout(btn_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+        self.refresh()
+
+    def refresh(self):
+        stats = get_proxy_pool().stats()
+        checking = self._check_thread is not None and self._check_thread.is_alive()
+        self.check_button.setEnabled(not checking)
+        self.check_button.setText("⏳ Checking..." if checking else "🩺 Check now")
+
+        self.table.setRowCount(len(stats))
+        for i, (proxy, row) in enumerate(sorted(stats.items())):
+            values = [
+                proxy,
+                row["state"],
+                f"{row['latency'] * 1000:.0f}" if row["latency"] is not None else "–",
+                f"{row['success_rate'] * 100:.0f}%",
+                f"{row['requests']} / {row['in_flight']}",
+                row["last_error"],
+            ]
+            for col, value in enumerate(values):
+                self.table.setItem(i, col, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+
+    def check_now(self):
+        """Проверка идёт в фоновом потоке, таблица подхватит результат при обновлении"""
+        self._check_thread = threading.Thread(target=get_proxy_pool().check_all, name="ProxyCheck", daemon=True)
+        self._check_thread.start()
+        self.refresh()
+
+    def reload_list(self):
+        reload_proxy_list()
+        self.refresh()
+
+    def set_rotation(self, enabled):
+        settings = load_settings()
+        settings["proxy_rotation"] = enabled
+        save_settings(settings)
+        reload_engine_settings()
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
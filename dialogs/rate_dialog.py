@@ -0,0 +1,84 @@
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton
+from PyQt5.QtCore import QTimer
+from core import http_client
+from core.rate_limiter import get_limiter
+from core.retry_policy import get_breaker, OPEN, HALF_OPEN
+
+REFRESH_MS = 1000
+
+
+class RateDialog(QDialog):
+    """Живая таблица частоты запросов по хостам: лимит, фактическая частота, 429/503, breaker"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Host Rates")
+        self.resize(800, 400)
+
+        layout = QVBoxLayout(self)
+
+        limiter = get_limiter()
+        limit_text = f"{limiter.rate} req/s per host, burst {limiter.burst}" if limiter.rate else "off"
+        layout.addWidget(QLabel(f"Rate limit: {limit_text}"))
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(9)
+        self.table.setHorizontalHeaderLabels(
+            ["Host", "Limit, req/s", "Actual, req/s", "Requests", "429/503", "Blocked, s", "Waited, s", "Reused conn.", "Breaker"]
+        )
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.accept)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.close_button)
+        layout.addLayout(btn_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+        self.refresh()
+
+    def refresh(self):
+        stats = get_limiter().stats()
+        connections = http_client.connection_stats()
+        breakers = get_breaker().stats()
+        for host in breakers:
+            stats.setdefault(host, None)
+
+        self.table.setRowCount(len(stats))
+        for i, (host, row) in enumerate(sorted(stats.items())):
+            conn = connections.get(host, {})
+            values = [host] + (_limiter_values(row) if row else ["–"] * 6) + [
+                f"{conn.get('reused', 0)}/{conn.get('requests', 0)}" if conn else "–",
+                _breaker_text(breakers.get(host)),
+            ]
+            for col, value in enumerate(values):
+                self.table.setItem(i, col, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
+
+
+def _limiter_values(row):
+    return [
+        f"{row['rate']:.2f}" if row["rate"] else "–",
+        f"{row['observed']:.2f}",
+        str(row["requests"]),
+        str(row["throttled"]),
+        f"{row['blocked_for']:.1f}",
+        f"{row['waited']:.1f}",
+    ]
+
+
+def _breaker_text(state):
+    if not state:
+        return "–"
+    if state["state"] == OPEN:
+        return f"⛔ open, {state['retry_in']:.0f}s"
+    if state["state"] == HALF_OPEN:
+        return "🟡 probing"
+    return f"🟢 {state['failures']} fail" if state["failures"] else "🟢 ok"
@@ -2,8 +2,9 @@ from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem
 from core import session_service
 
 class SessionHistoryDialog(QDialog):
-    def __init__(self, parent=None, load_callback=None):
+    def __init__(self, parent=None, load_callback=None, keep_hashes=None):
         super().__init__(parent)
+        self.keep_hashes = keep_hashes   # () -> хэши результатов, нужные открытой сессии
         self.setWindowTitle("Sessions History")
         self.resize(600, 400)
         self.load_callback = load_callback
@@ -47,32 +48,34 @@ class SessionHistoryDialog(QDialog):
 
         self.table.resizeColumnsToContents()
 
-    def get_selected_path(self):
+    def get_selected_name(self):
         row = self.table.currentRow()
         if row < 0:
             return None
-        file_name = self.table.item(row, 0).text()
-        full_path = f"sessions/{file_name}.json"
-        return full_path
+        return self.table.item(row, 0).text()
 
     def load_selected_session(self):
-        path = self.get_selected_path()
-        if not path:
+        name = self.get_selected_name()
+        if not name:
             QMessageBox.warning(self, "Error", "Choose session to load")
             return
 
-        session = session_service.load_session(path)
+        session = session_service.load_saved_session(name)
+        if session is None:
+            QMessageBox.warning(self, "Error", f"Session {name} not found")
+            self.refresh_table()
+            return
         if self.load_callback:
             self.load_callback(session)
         self.accept()
 
     def delete_selected_session(self):
-        path = self.get_selected_path()
-        if not path:
+        name = self.get_selected_name()
+        if not name:
             QMessageBox.warning(self, "Error", "Choose session to delete")
             return
 
         confirm = QMessageBox.question(self, "Accepting", "Delete choosen session?", QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
-            session_service.delete_session(path)
+            session_service.delete_session(name, self.keep_hashes() if self.keep_hashes else ())
             self.refresh_table()
\ No newline at end of file
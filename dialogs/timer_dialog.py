@@ -1,11 +1,14 @@
-from PyQt5.QtWidgets import QLabel, QComboBox, QSpinBox, QPushButton, QHBoxLayout
+from datetime import datetime
+from PyQt5.QtWidgets import QLabel, QComboBox, QSpinBox, QPushButton, QHBoxLayout, QLineEdit, QMessageBox
 from dialogs.base_dialog import BaseDialog
+from core.scheduler import parse_schedule, CronSchedule
 
 class TimerDialog(BaseDialog):
-    def __init__(self, parent=None, current_seconds=None):
+    def __init__(self, parent=None, current_schedule=None):
         super().__init__(parent, title="Timer Settings")
         self.resize(350, 200)
-        self.result_seconds = None
+        self.result_schedule = None   # секунды или cron-выражение; 0 — выключить
+        current_seconds = current_schedule if isinstance(current_schedule, int) else None
 
         # Готовые интервалы
         self.preset_combo = QComboBox()
@@ -26,6 +29,14 @@ class TimerDialog(BaseDialog):
         self.add_widget(QLabel("Type timer manual(in seconds):"))
         self.add_widget(self.custom_spin)
 
+        # Cron-выражение (важнее интервала, если заполнено)
+        self.cron_input = QLineEdit()
+        self.cron_input.setPlaceholderText("*/15 9-18 * * 1-5  or  @daily")
+        if isinstance(current_schedule, str) and not current_schedule.isdigit():
+            self.cron_input.setText(current_schedule)
+        self.add_widget(QLabel("Or cron expression (min hour day month weekday):"))
+        self.add_widget(self.cron_input)
+
         # Кнопки действия
         btn_layout = QHBoxLayout()
 
@@ -51,9 +62,20 @@ class TimerDialog(BaseDialog):
             self.custom_spin.setValue(seconds)
 
     def accept_dialog(self):
-        self.result_seconds = self.custom_spin.value()
+        expression = self.cron_input.text().strip()
+        if expression:
+            try:
+                schedule = parse_schedule(expression)
+                if isinstance(schedule, CronSchedule):
+                    schedule.next_time(datetime.now())
+            except ValueError as e:
+                QMessageBox.warning(self, "Cron", f"❌ {e}")
+                return
+            self.result_schedule = expression
+        else:
+            self.result_schedule = self.custom_spin.value()
         self.accept()
 
     def clear_timer(self):
-        self.result_seconds = 0
+        self.result_schedule = 0
         self.accept()
@@ -1,25 +1,21 @@
-from PyQt5.QtWidgets import QMainWindow, QFileDialog, QPushButton, QMenu, QDialog, QMessageBox
+from PyQt5.QtWidgets import QMainWindow, QFileDialog, QMenu, QDialog, QMessageBox, QAbstractItemView, QHeaderView
 from PyQt5.QtCore import Qt, QTimer
 # Core import
 #from core.exporter import save_to_csv, save_to_excel, export_results
 from core import cookie_manager
 from core.storage import load_settings, save_settings
-from core.session_service import SessionController
+from core.session_service import SessionController, iter_task_results, stored_hashes
 # Date import
 from datetime import datetime
 # pyright: reportMissingImports=false
-import sip, os
+import sip, os, time
+from collections import deque
 # Полный доступ к table_utils через namespace
 from ui import table_utils
-# Дополнительно — импорт часто используемых функций напрямую
-from ui.table_utils import (
-    update_lcd_counters,
-    colorize_row_by_status,
-    add_task_row as base_add_task_row,
-    create_save_button
-)
-
 from ui.table_controller import TableController
+from ui.task_table_model import (
+    TaskTableModel, RowsTableModel, COL_URL, COL_SAVE, COL_COOKIES, COL_PARAMS, COL_TIMER
+)
 from ui import editor_handlers
 from ui.scraper_ui import Ui_MainWindow
 from ui.scanner_ui.subdomain_scanner import SubdomainScanner
@@ -37,6 +33,9 @@ from dialogs.timer_dialog import TimerDialog
 from dialogs.timer_dialog import TimerDialog
 from dialogs.analytics_dialog import AnalyticsDialog
 from dialogs.calendar_dialog import CalendarDialog
+from dialogs.cluster_dialog import ClusterDialog
+from dialogs.rate_dialog import RateDialog
+from dialogs.proxy_dialog import ProxyDialog
 #Шпаргалка для JS XSS
 from dialogs.xss_cheatsheet_dialog import XssCheatsheetDialog
 
@@ -44,6 +43,9 @@ from dialogs.xss_cheatsheet_dialog import XssCheatsheetDialog
 # USER SETTINGS FILE
 USER_SETTINGS_FILE = "user_settings.json"
 
+# Дольше не ждём: таймер перепроверяет кучу хотя бы раз в минуту (сон ноутбука, перевод часов)
+MAX_TIMER_MS = 60 * 1000
+
 
 class ScraperApp(QMainWindow):
     def __init__(self):
@@ -71,41 +73,80 @@ class ScraperApp(QMainWindow):
         # Calendar Widget
         self.ui.action_open_calendar.triggered.connect(self.open_calendar_dialog)
 
+        # 📦 Инициализация ВСЕХ рабочих структур ДО добавления задач
+        # Ключ везде — стабильный ID задачи из TaskStore, а не номер строки
+        from core.task_store import TaskStore
+        self.task_store = TaskStore()   # id -> url/selector/method/status/last_run (+ индексы)
+        self.task_params = {}     # id -> request params
+        self.task_intervals = {}  # id -> seconds or cron expression
+        self.task_results = {}    # id -> result list
+        self.export_worker = None  # core/export_worker.py: текущий экспорт в фоне
+        self.export_queue = deque()   # экспорты, ждущие текущего: выполняются по очереди
+
+        # 🗂 Таблица задач — QTableView над моделью: ячейки рисуются лениво, только видимые
+        self.task_model = TaskTableModel(self.task_store, tooltip_provider=self.task_tooltip, parent=self)
+        self.ui.tasks_table.setModel(self.task_model)
+        self.ui.tasks_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.ui.tasks_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.ui.tasks_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.preview_model = RowsTableModel(parent=self)
+        self.ui.table_data_preview.setModel(self.preview_model)
+
         # Column settings
         self.load_column_widths()
 
-        # 📦 Инициализация ВСЕХ рабочих структур ДО добавления задач
-        self.task_params = {}     # row -> request params
-        self.task_intervals = {}  # row -> seconds
-        self.task_timers = {}     # row -> QTimer
-        self.task_results = {}    # row -> result list
-        self.workers = []         # list of TaskWorker
+        # ⏰ Один планировщик на все строки: куча времён запуска и один QTimer
+        from core.scheduler import Scheduler, DEFAULT_CRON_JITTER
+        self.scheduler = Scheduler(cron_jitter=load_settings().get("schedule_cron_jitter", DEFAULT_CRON_JITTER))
+        self.schedule_timer = QTimer(self)
+        self.schedule_timer.setSingleShot(True)
+        self.schedule_timer.timeout.connect(self.run_due_tasks)
+
+        # 💾 Расписания переживают перезапуск: ключ расписания = ID задачи
+        from core.schedule_store import ScheduleStore, store_path_from_settings
+        self.schedule_store = ScheduleStore(store_path_from_settings())
+        # Правки задачи с расписанием сразу попадают и в хранилище расписаний
+        self.task_model.task_edited.connect(self.sync_task_schedule)
 
         # ✅ Инициализация TaskManager
         from core.task_manager import TaskManager
         self.task_manager = TaskManager(
-            table=self.ui.tasks_table,
+            model=self.task_model,
             task_results=self.task_results,
             task_params=self.task_params,
-            update_lcd_callback=self.update_lcd,
-            update_tooltips_callback=self.update_tooltips,
-            lock_row_callback=self.lock_row
+            update_lcd_callback=self.update_lcd
         )
+        # Отложенные догоняющие запуски идут по одному: следующий — после завершения предыдущего
+        self.catchup_interval = 0.0
+        self.task_manager.tasks_done.connect(self.continue_catchup)
         
         # Table controller
         self.table_controller = TableController(
             table_widget=self.ui.tasks_table,
-            task_params=self.task_params
+            task_params=self.task_params,
+            task_model=self.task_model
         )
         
-        # SessionControler
+        # SessionControler: сессии пишутся в фоне, повторное сохранение — только изменённые задачи
+        from core.session_saver import SessionSaver
+        self.session_saver = SessionSaver(parent=self)
+        self.session_saver.saved.connect(self.on_session_saved)
+        self.session_saver.failed.connect(self.on_session_save_failed)
         self.session_controller = SessionController(
             table_controller=self.table_controller,
-            add_task_callback=self.add_task_row,  # метод, который добавляет строку в таблицу
+            add_tasks_callback=self.add_task_rows,  # метод, который добавляет пачку строк в таблицу
             task_params=self.task_params,
             task_results=self.task_results,
-            task_intervals=self.task_intervals
+            task_intervals=self.task_intervals,
+            saver=self.session_saver
         )
+
+        # 💾 Автосохранение: раз в auto_save_interval секунд, если в открытой сессии что-то изменилось
+        settings = load_settings()
+        self.auto_save_timer = QTimer(self)
+        self.auto_save_timer.timeout.connect(self.auto_save_session)
+        if settings.get("auto_save"):
+            self.auto_save_timer.start(max(1, int(settings.get("auto_save_interval", 60))) * 1000)
         
         # Search connection
         self.ui.action_search_tasks.triggered.connect(self.open_search_dialog)
@@ -121,8 +162,9 @@ class ScraperApp(QMainWindow):
         self.ui.tasks_table.setContextMenuPolicy(3)  # Qt.CustomContextMenu
         self.ui.tasks_table.customContextMenuRequested.connect(self.show_table_context_menu)
 
-        # 📌 Двойной клик — редактирование
-        self.ui.tasks_table.cellDoubleClicked.connect(self.edit_cell_handler)
+        # 📌 Двойной клик — редактирование, клик по Save / Cookies — как по кнопке
+        self.ui.tasks_table.doubleClicked.connect(lambda index: self.edit_cell_handler(index.row(), index.column()))
+        self.ui.tasks_table.clicked.connect(self.on_cell_clicked)
 
         # 📌 Toolbar действия
         self.ui.action_add_task_2.triggered.connect(self.add_template_task)
@@ -133,8 +175,25 @@ class ScraperApp(QMainWindow):
         self.ui.action_save_selected_bulk.triggered.connect(self.save_selected_results_bulk)
         self.ui.action_run_analytics.triggered.connect(self.run_analytics_dialog)
 
+        # 🛰 Распределённая очередь: отправка задач воркерам и сводный статус
+        self.action_cluster = self.ui.toolBar.addAction("🛰 Cluster")
+        self.action_cluster.triggered.connect(self.open_cluster_dialog)
+
+        # 📶 Частота запросов по хостам (лимитер и ответы 429/503)
+        self.action_rates = self.ui.toolBar.addAction("📶 Rates")
+        self.action_rates.triggered.connect(self.open_rate_dialog)
+
+        # 🧦 Пул прокси: здоровье, ротация, ручная проверка
+        self.action_proxies = self.ui.toolBar.addAction("🧦 Proxies")
+        self.action_proxies.triggered.connect(self.open_proxy_dialog)
+        self.ui.check_proxy_button.clicked.connect(self.open_proxy_dialog)
+
+        # ⏰ Задачи с расписанием из прошлого запуска программы
+        self.restore_saved_schedules()
+
         # 📌 Добавим одну задачу для примера (после инициализации task_params!)
-        self.add_template_task()
+        if len(self.task_store) == 0:
+            self.add_template_task()
 
         # Привязываем к действию кнопку запуска
         self.ui.action_run_task.triggered.connect(self.run_selected_task)
@@ -183,27 +242,34 @@ class ScraperApp(QMainWindow):
             self.subdomain_Scanner = SubdomainScanner()
             self.subdomain_Scanner.show()
             
-    def add_task_row(self, url, selector, method, status):
-        row_position = self.ui.tasks_table.rowCount()
+    def add_task_row(self, url, selector, method, status, task_id=None):
+        """Добавляет задачу в хранилище и строку в таблицу; :return: ID задачи"""
+        return self.add_task_rows([{
+            "url": url, "selector": selector, "method": method, "status": status, "task_id": task_id
+        }])[0]
 
-        # 🔹 Добавляем строку через table_logic
-        base_add_task_row(self.ui.tasks_table, url, selector, method, status)
+    def add_task_rows(self, tasks):
+        """
+        Добавляет пачку задач одной вставкой в модель (сессии на десятки тысяч строк).
+        Ширина колонок здесь не пересчитывается — это делается один раз после загрузки.
+        :return: список ID
+        """
+        return self.task_model.add_tasks(tasks)
 
-        # 🔹 Кнопка "Сохранить"
-        save_button = create_save_button()
-        save_button.clicked.connect(lambda _, r=row_position: self.save_task_result(r))
-        self.ui.tasks_table.setCellWidget(row_position, 6, save_button)
-        
-        # COOKIE BUTTON IN TABLE
-        cookie_button = QPushButton("🍪 Куки")
-        cookie_button.clicked.connect(lambda _, r=row_position: self.load_cookie_file(r))
-        self.ui.tasks_table.setCellWidget(row_position, 7, cookie_button)
-        
-        # 🔹 Вот сюда ДОБАВЬ ⬇️ пустую ячейку для Last Run
-        self.ui.tasks_table.setItem(row_position, 10, self.create_item("")) 
-        
-        # Update Toolbar Tips
-        self.update_tooltips(row_position)
+    def on_cell_clicked(self, index):
+        """Колонки Save и Cookies работают как кнопки (без виджета в каждой строке)"""
+        task_id = self.task_store.id_at(index.row())
+        if task_id is None:
+            return
+        if index.column() == COL_SAVE:
+            self.save_task_result(task_id)
+        elif index.column() == COL_COOKIES:
+            self.load_cookie_file(task_id)
+
+    def current_row(self):
+        """Номер текущей строки таблицы (-1 — нет)"""
+        index = self.ui.tasks_table.currentIndex()
+        return index.row() if index.isValid() else -1
 
 
     def add_template_task(self):
@@ -211,11 +277,25 @@ class ScraperApp(QMainWindow):
         self.update_lcd()
     
     def delete_task(self):
-        table_utils.delete_selected_row(self.ui.tasks_table)
+        task_id = self.task_store.id_at(self.current_row())
+        if task_id:
+            self.delete_tasks([task_id])
         self.update_lcd()
 
+    def delete_tasks(self, task_ids):
+        """Удаляет задачи: строки таблицы, запись в хранилище, параметры, результаты, расписания и очередь"""
+        removed = self.task_model.remove_tasks(task_ids)
+        for task_id in removed:
+            self.task_params.pop(task_id, None)
+            self.task_intervals.pop(task_id, None)
+            if task_id in self.scheduler:
+                self.scheduler.unschedule(task_id)
+            self.schedule_store.delete(task_id)
+        self.task_manager.forget_tasks(removed)
+        self.arm_scheduler()
+
     def run_task_stub(self):
-        row = self.ui.tasks_table.currentRow()
+        row = self.current_row()
         if row >= 0:
             self.table_controller.update_row_status(row, "⏳ Выполняется")
         self.update_lcd()
@@ -234,10 +314,11 @@ class ScraperApp(QMainWindow):
 
         # 💡 Если кликнули по колонке Timer
         if column == 9:
+            task_id = self.task_store.id_at(row)
             menu = QMenu()
 
             menu.addAction("🔁 Переустановить таймер", lambda: self.edit_timer_for_row(row))
-            menu.addAction("⏹ Отключить таймер", lambda: self.configure_task_timer(row, 0))
+            menu.addAction("⏹ Отключить таймер", lambda: self.configure_task_timer(task_id, 0))
 
             menu.exec_(self.ui.tasks_table.viewport().mapToGlobal(position))
             return
@@ -247,7 +328,7 @@ class ScraperApp(QMainWindow):
             self,
             self.ui.tasks_table,
             position,
-            lambda: update_lcd_counters(self.ui.tasks_table, self.lcd_counters),
+            self.update_lcd,
             self.run_selected_task,
             self.add_task_row
         )
@@ -257,6 +338,10 @@ class ScraperApp(QMainWindow):
     # ============================
 
     def edit_cell_handler(self, row, column):
+        if column in (1, 2, 3) and self.task_model.is_locked(self.task_store.id_at(row)):
+            self.statusBar().showMessage("🔒 Задача в очереди или выполняется — правка недоступна")
+            return
+
         if column == 9:  # Таймер
             self.configure_timer_dialog(row)
             return
@@ -272,14 +357,16 @@ class ScraperApp(QMainWindow):
         )
         
     def edit_params_modal(self, row):
-        old_params = self.task_params.get(row, {})
+        task_id = self.task_store.id_at(row)
+        old_params = self.task_params.get(task_id, {})
         result = show_params_dialog(self, old_params)
         
-        if result:
-            self.task_params[row] = result
-            self.ui.tasks_table.setItem(row, 8, self.create_item("✅ Настроено"))
+        if result and task_id in self.task_store:
+            self.task_params[task_id] = result
+            self.sync_task_schedule(task_id)
+            row = self.task_store.row_of(task_id)
+            self.task_model.set_text(task_id, COL_PARAMS, "✅ Настроено")
             self.statusBar().showMessage(f"🛠 Параметры обновлены для строки #{row + 1}")
-            self.update_tooltips(row)  # ⬅️ Обновляем подсказку
         else:
             self.statusBar().showMessage("❌ Параметры не были изменены")
 
@@ -290,7 +377,7 @@ class ScraperApp(QMainWindow):
 
     def update_lcd(self):
         table_utils.update_lcd_counters(
-            self.ui.tasks_table,
+            self.task_store,
             {
                 'total': self.ui.lcd_total,
                 'running': self.ui.lcd_running,
@@ -301,84 +388,92 @@ class ScraperApp(QMainWindow):
         )
         
     def run_selected_task(self):
-        row = self.ui.tasks_table.currentRow()
+        row = self.current_row()
         if row < 0:
             self.statusBar().showMessage("⚠ Выберите задачу для запуска")
             return
-        self.task_manager.run_task(row)
-
-    def on_task_finished(self, row_index, status_text, message, results, cookies):
-        
-        self.ui.tasks_table.setItem(row_index, 4, self.create_item(status_text))
-        colorize_row_by_status(self.ui.tasks_table, row_index)
-        self.lock_row(row_index, False)  # 🔓 Разблокировать строку
-        task = self.table_controller.get_task_data(row_index)
-        url = task["url"]
-        cookie_manager.save_cookies(url, cookies)
-        self.statusBar().showMessage(f"Задача #{row_index + 1} завершена: {message}")
-        self.update_lcd()
-
-        task = self.table_controller.get_task_data(row_index)
-        url = task["url"]
-
-        self.task_results[row_index] = {
-            "url": url,
-            "status": status_text,
-            "message": message,
-            "results": results,
-            "last_run": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        self.ui.tasks_table.resizeColumnsToContents()
-
-    def create_item(self, text):
-        from PyQt5.QtWidgets import QTableWidgetItem
-        return QTableWidgetItem(text)
-
-
-    def save_task_result(self, row_index):
-        from core.exporter import export_results
-        task = self.task_results.get(row_index)
-        if not task or not task.get("results"):
+        state = self.task_manager.run_task(self.task_store.id_at(row))
+        self.show_queue_state(row, state)
+
+    def show_queue_state(self, row, state):
+        from core.job_queue import DUPLICATE, FULL
+        stats = self.task_manager.queue_stats()
+        if state == DUPLICATE:
+            self.statusBar().showMessage(f"⚠ Задача #{row + 1} уже в очереди или выполняется")
+        elif state == FULL:
+            self.statusBar().showMessage(f"⛔ Очередь заполнена ({stats['capacity']}), задача #{row + 1} не добавлена")
+        elif state:
+            self.statusBar().showMessage(
+                f"🕓 В очереди: {stats['depth']} | выполняется: {stats['running']} | "
+                f"ожидание ~{stats['avg_wait']:.1f}s | выполнение ~{stats['avg_run']:.1f}s"
+            )
+
+    def save_task_result(self, task_id):
+        task = self.task_results.get(task_id)
+        if not task or not task.get("result_count"):
             self.statusBar().showMessage("⚠ Нет данных для сохранения")
             return
 
         url = task["url"]
-        results = task["results"]
 
         file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить результат", "", 
-                                                "JSON (*.json);;CSV (*.csv);;Excel (*.xlsx)")
+                                                "JSON (*.json);;JSON Lines (*.jsonl);;CSV (*.csv);;Excel (*.xlsx)")
 
         if not file_path:
             return
 
-        try:
-            export_results({url: results}, file_path)
-            self.statusBar().showMessage(f"✅ Сохранено: {file_path}")
-        except Exception as e:
-            self.statusBar().showMessage(f"❌ Ошибка при сохранении: {str(e)}")
+        # После восстановления сессии результаты читаются из хранилища по хэшу — уже в потоке экспорта
+        self.start_export([(url, {"url": url, "results": iter_task_results(task)})], file_path, total=1)
+
+    def start_export(self, tasks, file_path, is_flat=False, total=None):
+        """
+        Экспорт в фоне (core/export_worker.py); прогресс и итог — в строке состояния.
+        Пока идёт другой экспорт, новый ждёт в очереди и запускается следом.
+        """
+        self.export_queue.append((tasks, file_path, is_flat, total))
+        if self.export_worker is None:
+            self.start_next_export()
+        else:
+            self.statusBar().showMessage(f"⏳ Экспорт в очереди: {len(self.export_queue)}")
+
+    def start_next_export(self):
+        """Запускает следующий экспорт из очереди; None в export_worker — очередь пуста"""
+        from core.export_worker import ExportWorker
+        if not self.export_queue:
+            self.export_worker = None
+            self.ui.btn_export_data.setEnabled(True)
+            return
+        tasks, file_path, is_flat, total = self.export_queue.popleft()
+        worker = ExportWorker(tasks, file_path, is_flat=is_flat, total=total, parent=self)
+        worker.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"⏳ Export: {done}/{total} tasks")
+        )
+        worker.export_finished.connect(self.on_export_finished)
+        worker.export_failed.connect(self.on_export_failed)
+        self.export_worker = worker
+        self.ui.btn_export_data.setEnabled(False)
+        worker.start()
+
+    def on_export_finished(self, file_path, count):
+        self.ui.lbl_exported_path.setText(f"Exported to: {file_path}")
+        self.statusBar().showMessage(f"✅ Export successful: {file_path} ({count} rows)", 5000)
+        self.start_next_export()
+
+    def on_export_failed(self, file_path, error):
+        self.statusBar().showMessage(f"❌ Ошибка при сохранении: {error}")
+        self.start_next_export()
+        QMessageBox.critical(self, "Export Failed", f"Error during export:\n{error}")
         
         
-    def lock_row(self, row_index, lock=True):
-        """Блокирует или разблокирует редактирование ячеек строки."""
-        for col in range(1, 4):  # URL, Selector, Method — колонки 1, 2, 3
-            item = self.ui.tasks_table.item(row_index, col)
-            if item:
-                flags = item.flags()
-                if lock:
-                    item.setFlags(flags & ~Qt.ItemIsEditable)
-                else:
-                    item.setFlags(flags | Qt.ItemIsEditable)
-                    
-    
-    def load_cookie_file(self, row_index):
-        task = self.table_controller.get_task_data(row_index)
+    def load_cookie_file(self, task_id):
+        task = self.table_controller.task_data(task_id)
         url = task["url"]
         if cookie_manager.cookie_exists(url):
             path = cookie_manager.get_cookie_path(url)
             self.statusBar().showMessage(f"🍪 Куки загружены: {path}")
         else:
-            self.statusBar().showMessage(f"⚠ Куки для задачи #{row_index + 1} не найдены")
+            row = self.task_store.row_of(task_id)
+            self.statusBar().showMessage(f"⚠ Куки для задачи #{(row or 0) + 1} не найдены")
          
          
     # SESSION SECTION
@@ -388,7 +483,9 @@ class ScraperApp(QMainWindow):
         def load_callback(session_data):
             self.restore_session(session_data)
 
-        dialog = SessionHistoryDialog(self, load_callback=load_callback)
+        dialog = SessionHistoryDialog(
+            self, load_callback=load_callback, keep_hashes=lambda: stored_hashes(self.task_results)
+        )
         dialog.exec_()
         
     # RESTORE SESSION 
@@ -396,6 +493,9 @@ class ScraperApp(QMainWindow):
         
     def restore_session(self, session_data):
         self.session_controller.restore_session(session_data)
+        self.reschedule_all()
+        # Подписи таймеров после reschedule_all совпадают с сохранёнными — это не изменения
+        self.session_controller.mark_clean(self.session_controller.saved_name)
         self.statusBar().showMessage("Сессия восстановлена успешно")
    
     # SAVE SESSION
@@ -405,8 +505,19 @@ class ScraperApp(QMainWindow):
         from PyQt5.QtWidgets import QInputDialog
         name, ok = QInputDialog.getText(self, "Сохранение сессии", "Введите имя сессии:")
         if ok and name:
-            path = self.session_controller.save_session(name)
-            self.statusBar().showMessage(f"Сессия сохранена: {path}")
+            self.session_controller.save_session(name)
+            self.statusBar().showMessage(f"⏳ Сохранение сессии: {name}")
+
+    def auto_save_session(self):
+        controller = self.session_controller
+        if controller.saved_name and controller.has_changes():
+            controller.save_session(controller.saved_name)
+
+    def on_session_saved(self, name, written, seconds):
+        self.statusBar().showMessage(f"Сессия сохранена: {name} (задач записано: {written}, {seconds:.2f} с)", 5000)
+
+    def on_session_save_failed(self, name, error):
+        self.statusBar().showMessage(f"❌ Сессия {name} не сохранена: {error}")
             
     # SEARCH BLOCK SECTION
     
@@ -435,18 +546,18 @@ class ScraperApp(QMainWindow):
         for field, value in filters:
             grouped[field].append(value.lower())
 
-        field_to_column = {"URL": 1, "Selector": 2, "Status": 4, "Last Run": 10}
+        field_to_key = {"URL": "url", "Selector": "selector", "Status": "status", "Last Run": "last_run"}
 
-        for row in range(self.ui.tasks_table.rowCount()):
+        # Значения берём из TaskStore, а не из ячеек таблицы
+        for task in self.task_store:
             match = True
 
             for field, values in grouped.items():
-                col_index = field_to_column.get(field)
-                if col_index is None:
+                key = field_to_key.get(field)
+                if key is None:
                     continue
 
-                item = self.ui.tasks_table.item(row, col_index)
-                cell_text = item.text().lower() if item else ""
+                cell_text = task[key].lower()
 
                 if field == "Selector":
                     selectors = [s.strip() for s in cell_text.split(",")]
@@ -458,129 +569,200 @@ class ScraperApp(QMainWindow):
                         match = False
                         break
 
-            self.ui.tasks_table.setRowHidden(row, not match)
+            self.ui.tasks_table.setRowHidden(self.task_store.row_of(task["id"]), not match)
             
             
     # TIMER SETTINGS BLOCK
     
     def configure_timer_dialog(self, row):
-        current = self.task_intervals.get(row, 0)
-        dialog = TimerDialog(self, current_seconds=current)
+        task_id = self.task_store.id_at(row)
+        current = self.task_intervals.get(task_id, 0)
+        dialog = TimerDialog(self, current_schedule=current)
         if dialog.exec_():
-            seconds = dialog.result_seconds or 0
-            self.task_intervals[row] = seconds
-            label = "Отключено" if seconds == 0 else f"⏱ {seconds // 60} мин"
-            self.ui.tasks_table.setItem(row, 9, self.create_item(label))
-            self.configure_task_timer(row, seconds)
+            self.configure_task_timer(task_id, dialog.result_schedule or 0)
             
     # TIMER CONFIGURE
 
-    def configure_task_timer(self, row, seconds):
-        # ⛔ Безопасно останавливаем старый таймер
-        old_timer = self.task_timers.get(row)
-        if old_timer and not sip.isdeleted(old_timer):
-            old_timer.stop()
-            old_timer.deleteLater()
-
-        # Обновляем интервал
-        self.task_intervals[row] = seconds
+    def configure_task_timer(self, task_id, schedule):
+        """
+        Ставит задачу в общий планировщик: секунды, cron-выражение или 0 — выключить.
+        Ключ расписания — ID задачи; расписание сразу сохраняется в хранилище, чтобы пережить перезапуск.
+        """
+        from core.scheduler import describe_schedule
 
-        # Обновляем отображение в колонке
-        label = "Отключено" if seconds == 0 else f"⏱ {seconds // 60} мин"
-        self.ui.tasks_table.setItem(row, 9, self.create_item(label))
+        if task_id not in self.task_store:
+            return
+        self.task_intervals[task_id] = schedule
+        if schedule:
+            next_run = self.scheduler.schedule(task_id, schedule)
+            self.schedule_store.save(task_id, self.table_controller.task_data(task_id), schedule, next_run)
+        elif task_id in self.scheduler:
+            self.scheduler.unschedule(task_id)
+            self.schedule_store.delete(task_id)
+        self.task_model.set_text(task_id, COL_TIMER, describe_schedule(schedule))
+        self.arm_scheduler()
+
+    def sync_task_schedule(self, task_id):
+        """Пересохраняет URL / селектор / метод / параметры задачи в её расписании (если оно есть)"""
+        if task_id in self.scheduler:
+            self.schedule_store.update_task(task_id, self.table_controller.task_data(task_id))
+
+    def reschedule_all(self):
+        """Заменяет все расписания расписаниями из task_intervals (после восстановления сессии)"""
+        self.scheduler.clear()
+        self.schedule_store.clear()
+        for task_id, schedule in list(self.task_intervals.items()):
+            if schedule:
+                self.configure_task_timer(task_id, schedule)
+        self.arm_scheduler()
+
+    def restore_saved_schedules(self):
+        """
+        Возвращает в таблицу задачи с расписанием из хранилища и ставит их в планировщик.
+        Задача получает прежний ID (ключ расписания). Пропущенные за время простоя
+        запуски обрабатываются по политике schedule_catchup.
+        """
+        from core.schedule_store import restore_schedules, catchup_settings
+        from core.scheduler import describe_schedule
 
-        # Если задан новый интервал — создаём таймер
-        if seconds > 0:
-            timer = QTimer(self)
-            timer.timeout.connect(lambda r=row: self.run_scheduled_task(r))
-            timer.start(seconds * 1000)
-            self.task_timers[row] = timer
+        entries = self.schedule_store.all()
+        if not entries:
+            return
+        for entry in entries:
+            spec = entry["spec"]
+            entry["spec"] = int(spec) if spec.isdigit() else spec
+        self.add_task_rows([{
+            "url": entry["url"],
+            "selector": entry["selector"],
+            "method": entry["method"],
+            "status": "Ожидает",
+            "last_run": f"{datetime.fromtimestamp(entry['last_run']):%Y-%m-%d %H:%M:%S}" if entry["last_run"] else "",
+            "task_id": entry["key"],
+            "cells": {COL_TIMER: describe_schedule(entry["spec"])},
+        } for entry in entries])
+        for entry in entries:
+            self.task_params[entry["key"]] = entry["params"]
+            self.task_intervals[entry["key"]] = entry["spec"]
+
+        policy, rate, max_runs = catchup_settings()
+        self.catchup_interval = 1.0 / rate
+        summary = restore_schedules(
+            self.scheduler, entries, policy=policy, rate=rate, max_runs=max_runs, store=self.schedule_store
+        )
+        self.arm_scheduler()
+        self.statusBar().showMessage(
+            f"⏰ Расписаний восстановлено: {summary['restored']} | пропущено запусков: {summary['missed']} | "
+            f"догоняющих ({policy}): {summary['catchup']}"
+        )
 
-        self.update_tooltips(row)
+    def continue_catchup(self, task_ids):
+        """Ставит следующий отложенный догоняющий запуск задач, чей запуск только что завершился"""
+        when = time.time() + self.catchup_interval
+        if [task_id for task_id in task_ids if self.scheduler.next_catchup(task_id, when)]:
+            self.arm_scheduler()
+
+    def arm_scheduler(self):
+        """Единственный таймер ждёт ближайший запуск из кучи планировщика"""
+        next_due = self.scheduler.next_due()
+        if next_due is None:
+            self.schedule_timer.stop()
+            return
+        delay_ms = max(0, int((next_due - time.time()) * 1000))
+        self.schedule_timer.start(min(delay_ms, MAX_TIMER_MS))
 
-    
     # START TIMER
+
+    def run_due_tasks(self):
+        """Отдаёт созревшие задачи прямо в очередь — без выделения строк в таблице"""
+        now = time.time()
+        runs = []
+        for task_id in self.scheduler.pop_due(now):
+            if task_id not in self.task_store:
+                continue
+            self.run_scheduled_task(task_id)
+            runs.append((task_id, now, self.scheduler.next_run(task_id)))
+        self.schedule_store.mark_runs(runs)
+        self.arm_scheduler()
     
-    def run_scheduled_task(self, row):
-        self.ui.tasks_table.selectRow(row)
+    def run_scheduled_task(self, task_id):
+        from core.job_queue import PRIORITY_SCHEDULED
 
         # 🕓 Устанавливаем время последнего запуска
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.table_controller.set_last_run(row, timestamp)
-        self.run_selected_task()
+        self.table_controller.set_last_run(self.task_store.row_of(task_id), timestamp)
+
+        # Запуски по таймеру идут в очередь после ручных, дубли отбрасываются
+        self.task_manager.run_task(task_id, priority=PRIORITY_SCHEDULED)
         
     # EDIT TIMER METHOD
     
     def edit_timer_for_row(self, row):
-        current_seconds = self.task_intervals.get(row, 0)
-        dialog = TimerDialog(self, current_seconds=current_seconds)
+        task_id = self.task_store.id_at(row)
+        current = self.task_intervals.get(task_id, 0)
+        dialog = TimerDialog(self, current_schedule=current)
 
         if dialog.exec_() == QDialog.Accepted:
-            seconds = dialog.result_seconds
-            self.configure_task_timer(row, seconds)
-            self.update_tooltips(row)
+            self.configure_task_timer(task_id, dialog.result_schedule or 0)
 
         
     # TOOLBAR TIPS EXPLANATION
     
-    def update_tooltips(self, row):
-        url_item = self.ui.tasks_table.item(row, 1)
-        params_item = self.ui.tasks_table.item(row, 8)
-        timer_item = self.ui.tasks_table.item(row, 9)
-
-        if url_item:
+    def task_tooltip(self, task_id, column):
+        """Подсказка ячейки — считается моделью при наведении, а не для каждой строки заранее"""
+        if column == COL_URL:
             from core.cookie_manager import get_cookie_path
-            url = url_item.text()
-            tooltip = get_cookie_path(url)
-            url_item.setToolTip(f"🍪 Cookies path: {tooltip}")
+            return f"🍪 Cookies path: {get_cookie_path(self.task_store.get(task_id)['url'])}"
 
-        if params_item:
-            params = self.task_params.get(row, {})
+        if column == COL_PARAMS:
+            params = self.task_params.get(task_id, {})
             if not params:
-                params_item.setToolTip("❌ No params set")
-            else:
-                desc = []
-                if params.get("proxy"):
-                    desc.append(f"Proxy: {params['proxy']}")
-                if params.get("user_agent"):
-                    desc.append(f"UA: {params['user_agent'][:40]}...")
-                if params.get("timeout"):
-                    desc.append(f"Timeout: {params['timeout']}s")
-                if params.get("headers"):
-                    desc.append(f"Headers: {len(params['headers'])} items")
-                params_item.setToolTip(" | ".join(desc))
-
-        if timer_item:
-            seconds = self.task_intervals.get(row, 0)
-            if seconds:
-                timer_item.setToolTip(f"⏱ Task will auto-run in ~{seconds} sec")
-            else:
-                timer_item.setToolTip("⏹ Timer disabled")
+                return "❌ No params set"
+            desc = []
+            if params.get("proxy"):
+                desc.append(f"Proxy: {params['proxy']}")
+            if params.get("user_agent"):
+                desc.append(f"UA: {params['user_agent'][:40]}...")
+            if params.get("timeout"):
+                desc.append(f"Timeout: {params['timeout']}s")
+            if params.get("headers"):
+                desc.append(f"Headers: {len(params['headers'])} items")
+            return " | ".join(desc)
+
+        if column == COL_TIMER:
+            next_run = self.scheduler.next_run(task_id)
+            if not next_run:
+                return "⏹ Timer disabled"
+            tip = f"⏱ Next run: {datetime.fromtimestamp(next_run):%Y-%m-%d %H:%M:%S}"
+            missed = self.schedule_store.missed_count(task_id)
+            if missed:
+                tip += f"\n⚠ Missed while the app was closed: {missed}"
+            return tip
+        return None
                 
     # SELECTED ROWS WITH CTRL/SHIFT
     # SELECTED ROWS WITH CTRL/SHIFT
     
     def get_selected_rows(self):
-        return list(set(index.row() for index in self.ui.tasks_table.selectedIndexes()))
+        return list(set(index.row() for index in self.ui.tasks_table.selectionModel().selectedIndexes()))
+
+    def get_selected_task_ids(self):
+        """ID выделенных задач в порядке строк"""
+        return [self.task_store.id_at(row) for row in sorted(self.get_selected_rows())]
     
     def run_selected_tasks_bulk(self):
-        rows = self.get_selected_rows()
-        for row in rows:
-            self.ui.tasks_table.selectRow(row)  # для совместимости с текущим методом
-            self.run_selected_task()
+        for row in sorted(self.get_selected_rows()):
+            state = self.task_manager.run_task(self.task_store.id_at(row))
+            self.show_queue_state(row, state)
             
 
     def delete_selected_tasks_bulk(self):
-        rows = sorted(self.get_selected_rows(), reverse=True)
-        for row in rows:
-            self.ui.tasks_table.removeRow(row)
+        self.delete_tasks(self.get_selected_task_ids())
         self.update_lcd()
         
         
     def save_selected_results_bulk(self):
-        rows = self.get_selected_rows()
-        for row in rows:
-            self.save_task_result(row)
+        for task_id in self.get_selected_task_ids():
+            self.save_task_result(task_id)
             
     # SAVE COLUMN WIDTH
             
@@ -588,7 +770,7 @@ class ScraperApp(QMainWindow):
         settings = load_settings()
         widths = {}
 
-        for col in range(self.ui.tasks_table.columnCount()):
+        for col in range(self.task_model.columnCount()):
             widths[str(col)] = self.ui.tasks_table.columnWidth(col)
 
         settings["column_widths"] = widths
@@ -602,7 +784,7 @@ class ScraperApp(QMainWindow):
 
         for col_str, width in widths.items():
             col = int(col_str)
-            if 0 <= col < self.ui.tasks_table.columnCount():
+            if 0 <= col < self.task_model.columnCount():
                 self.ui.tasks_table.setColumnWidth(col, width)
 
             
@@ -610,26 +792,84 @@ class ScraperApp(QMainWindow):
     
     def closeEvent(self, event):
         self.save_column_widths()
+        self.auto_save_timer.stop()
+        while self.export_worker:
+            self.export_worker.wait()   # файлы экспорта, включая ждущие в очереди, дописываются до конца
+            self.start_next_export()
+        self.session_saver.shutdown(wait=True)   # дописываем поставленные сохранения
+        self.schedule_store.close()
+        from core.async_engine import shutdown_engine
+        shutdown_engine()
+        from core.run_log import close_run_log
+        close_run_log()   # после движка: дописываем последние запуски
         event.accept()
         
     # ANALYTICS QDIALOG
     
     def run_analytics_dialog(self):
-        rows = self.get_selected_rows()
-        if not rows:
+        task_ids = self.get_selected_task_ids()
+        if not task_ids:
             self.statusBar().showMessage("⚠ Выберите задачи для анализа")
             return
 
-        dialog = AnalyticsDialog(self, rows=rows, task_results=self.task_results)
+        from core.run_log import get_run_log
+        dialog = AnalyticsDialog(self, rows=task_ids, task_results=self.task_results, run_log=get_run_log())
         dialog.exec_()
 
     # OPEN CALENDAR
     # OPEN CALENDAR
     
     def open_calendar_dialog(self):
-        dialog = CalendarDialog(self, self.task_results, self.restore_session)
+        from core.run_log import get_run_log
+        dialog = CalendarDialog(self, self.task_results, self.restore_session, task_store=self.task_store,
+                                run_log=get_run_log())
         dialog.exec_()
         
+    # HOST RATES
+
+    def open_rate_dialog(self):
+        dialog = RateDialog(self)
+        dialog.exec_()
+
+    # PROXY POOL
+
+    def open_proxy_dialog(self):
+        dialog = ProxyDialog(self)
+        dialog.exec_()
+
+    # CLUSTER (DISTRIBUTED WORKERS)
+
+    def open_cluster_dialog(self):
+        dialog = ClusterDialog(
+            self,
+            collect_tasks=self.collect_cluster_tasks,
+            apply_outcomes=self.apply_cluster_outcomes
+        )
+        dialog.exec_()
+
+    def collect_cluster_tasks(self):
+        """Задачи таблицы для очереди воркеров; индекс задачи = номер строки на момент отправки"""
+        return [self.table_controller.task_data(task_id) for task_id in self.task_store.ids()]
+
+    def apply_cluster_outcomes(self, outcomes):
+        """
+        Результаты воркеров -> задачи. Индекс из пачки — номер строки при отправке;
+        если строки с тех пор сдвинулись, задача ищется по URL (если он однозначен).
+        Задачи, которые сейчас идут локально, пропускаются.
+        """
+        matched = []
+        for outcome in outcomes:
+            task_id = self.task_store.id_at(outcome["row"])
+            if task_id is None or self.task_store.get(task_id)["url"] != outcome["url"]:
+                same_url = self.task_store.by_url(outcome["url"])
+                task_id = same_url.pop() if len(same_url) == 1 else None
+            if task_id is None or self.task_manager.queue.is_pending(task_id):
+                continue
+            matched.append(dict(outcome, row=task_id))
+        if matched:
+            self.task_manager.on_tasks_finished(matched)
+        return len(matched)
+
     # LOAD PARSED DATA IN "table_data_preview"
     # LOAD PARSED DATA IN "table_data_preview"
         
@@ -639,73 +879,49 @@ class ScraperApp(QMainWindow):
         Если данных нет, отображает сообщение "No parsed data available".
         Заполняет self.ui.table_data_preview колонками:
         'Row', 'URL', 'Status', 'Last Run', 'Preview'
+        Читаются только сводки задач (число элементов и превью) — сами результаты
+        не копируются и не загружаются. Экспорт берёт задачи из self.preview_task_ids.
         """
-        from PyQt5.QtWidgets import QTableWidgetItem
-        
-        
         preview_table = self.ui.table_data_preview
-
-        
-        # Задаем колонки (приводим к общему виду)
-        preview_table.clear()   # Очистим таблицу
         headers = ["Row", "URL", "Status", "Last Run", "Preview"]
-        preview_table.setColumnCount(len(headers))
-        preview_table.setHorizontalHeaderLabels(headers)
-        # Защитная копия
-        import copy
-        self.task_results_copy = copy.deepcopy(self.task_results)
-        
-        # Проверка, есть ли вообще данные
-        if not self.task_results_copy or all(not task.get("results") for task in self.task_results_copy.values()):
-            preview_table.setRowCount(1)
-            item = QTableWidgetItem("No parsed data available")
-            preview_table.setItem(0, 0, item)
+        preview_table.clearSpans()
+
+        # Задачи с результатами — в порядке таблицы
+        self.preview_task_ids = [
+            t for t in self.task_store.ids() if self.task_results.get(t, {}).get("result_count")
+        ]
+        if not self.preview_task_ids:
+            self.preview_model.set_rows(headers, [["No parsed data available"]])
             preview_table.setSpan(0, 0, 1, len(headers))
             return
 
-        # Если данные есть, то заполняем таблицу
-        preview_table.setRowCount(0)  # сбросим количество строк
-        row_number = 0
-        for key in sorted(self.task_results_copy.keys()):
-            task = self.task_results_copy[key]
-            url = task.get("url", "")
-            status = task.get("status", "")
-            last_run = task.get("last_run", "")
-            results = task.get("results", [])
-            
-            # Формируем "Preview" — берем первый результат (если список не пустой)
-            if isinstance(results, list) and results:
-                first_result = results[0]
-                if isinstance(first_result, dict):
-                    result_preview = first_result.get("title") or str(first_result)
-                else:
-                    result_preview = str(first_result)
-            else:
-                result_preview = "No results"
-
-            # Добавляем строку в таблицу
-            preview_table.insertRow(row_number)
-            preview_table.setItem(row_number, 0, QTableWidgetItem(str(key)))
-            preview_table.setItem(row_number, 1, QTableWidgetItem(url))
-            preview_table.setItem(row_number, 2, QTableWidgetItem(status))
-            preview_table.setItem(row_number, 3, QTableWidgetItem(last_run))
-            preview_table.setItem(row_number, 4, QTableWidgetItem(result_preview))
-            row_number += 1
+        # Строки собираются списком и отдаются модели одним сбросом
+        rows = []
+        for key in self.preview_task_ids:
+            task = self.task_results[key]
+            rows.append([
+                self.task_store.row_of(key) + 1,
+                task.get("url", ""),
+                task.get("status", ""),
+                task.get("last_run", ""),
+                task.get("result_preview") or "No results",
+            ])
+        self.preview_model.set_rows(headers, rows)
             
     # CLEAR table_data_preview AFTER SWITCHING TABS
     # CLEAR table_data_preview AFTER SWITCHING TABS
     
     def on_tab_changed(self, index):
         if index == self.ui.tabWidget.indexOf(self.ui.tab_2):  # tab_2 — это Export
-            self.ui.table_data_preview.clearContents()
-            self.ui.table_data_preview.setRowCount(0)
+            self.ui.table_data_preview.clearSpans()
+            self.preview_model.set_rows([], [])
             
     # EXPORT DATA BY CLICKING ON "EXPORT"
     # EXPORT DATA BY CLICKING ON "EXPORT"
 
     def handle_export_click(self):
         # 1. Проверка: есть ли данные для экспорта
-        if not hasattr(self, 'task_results_copy') or not self.task_results_copy:
+        if not getattr(self, 'preview_task_ids', None):
             QMessageBox.warning(self, "No Data", "No data to export. Please use Data Preview first.")
             return
 
@@ -717,11 +933,13 @@ class ScraperApp(QMainWindow):
         filters = {
             'csv': "CSV Files (*.csv)",
             'json': "JSON Files (*.json)",
+            'jsonl': "JSON Lines Files (*.jsonl)",
             'xlsx': "Excel Files (*.xlsx)"
         }
         extensions = {
             'csv': '.csv',
             'json': '.json',
+            'jsonl': '.jsonl',
             'xlsx': '.xlsx'
         }
 
@@ -743,15 +961,15 @@ class ScraperApp(QMainWindow):
         if not file_path.lower().endswith(default_ext):
             file_path += default_ext
 
-        try:
-            # 6. Вызов экспорта
-            from core.exporter import export_results
-            export_results(self.task_results_copy, file_path, is_flat=is_flat)
-
-            # 7. Обновление интерфейса
-            self.ui.lbl_exported_path.setText(f"Exported to: {file_path}")
-            self.statusBar().showMessage("✅ Export successful", 5000)
-
-        except Exception as e:
-            QMessageBox.critical(self, "Export Failed", f"Error during export:\n{str(e)}")
+        # 6. Экспорт в фоне: снимок сводок задач берётся сейчас, результаты каждой задачи
+        #    читаются генератором в потоке экспорта по мере записи
+        tasks = [
+            (task_id, dict(self.task_results[task_id], row=self.task_store.row_of(task_id) + 1,
+                           results=iter_task_results(self.task_results[task_id])))
+            for task_id in self.preview_task_ids
+            if task_id in self.task_results and self.task_store.row_of(task_id) is not None
+        ]
+        self.start_export(tasks, file_path, is_flat=is_flat, total=len(tasks))
+
+        # 7. Итог — on_export_finished / on_export_failed
             
\ No newline at end of file
@@ -0,0 +1,59 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.async_engine import ScrapeEngine, STATUS_SUCCESS
+
+BODY = b"<html><body>" + b"<a href='/x'>link</a>" * 50 + b"</body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/"
+    httpd.shutdown()
+
+
+def test_outcome_reports_response_size(server):
+    engine = ScrapeEngine(use_cache=False)
+    try:
+        outcome = engine.submit({"row": "t1", "url": server, "selector": "a", "method": "CSS",
+                                 "params": {"retries": 0}}).result(timeout=10)
+    finally:
+        engine.stop()
+
+    assert outcome["status"] == STATUS_SUCCESS, outcome["message"]
+    assert len(outcome["results"]) == 50
+    assert outcome["bytes"] == len(BODY)
+
+
+def test_jobs_do_not_reread_settings(server, monkeypatch):
+    from core import proxy_pool, retry_policy
+
+    def no_reads():
+        raise AssertionError("settings file read during a job")
+
+    engine = ScrapeEngine(use_cache=False, settings={"retries": 0})
+    for module in (proxy_pool, retry_policy):
+        monkeypatch.setattr(module, "load_settings", no_reads)
+    try:
+        outcome = engine.submit({"row": "t1", "url": server, "selector": "a", "method": "CSS"}).result(timeout=10)
+    finally:
+        engine.stop()
+
+    assert outcome["status"] == STATUS_SUCCESS, outcome["message"]
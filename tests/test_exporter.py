@@ -0,0 +1,22 @@
+import csv
+
+from core.exporter import export_results
+
+
+def test_flat_export_writes_full_first_result_not_preview(tmp_path):
+    long_text = "x" * 1000
+    loaded = []
+
+    def results():
+        loaded.append(True)
+        yield {"title": long_text, "link": "https://example.com/a"}
+
+    tasks = [("t1", {"url": "https://example.com", "status": "✅ Success", "result_preview": long_text[:200],
+                     "results": results()})]
+    path = tmp_path / "flat.csv"
+    assert export_results(tasks, str(path), is_flat=True, total=1) == 1
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert loaded
+    assert long_text in rows[1][-1] and "https://example.com/a" in rows[1][-1]
@@ -0,0 +1,37 @@
+import pytest
+
+from core import http_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "CACHE_DIR", str(tmp_path / "http_cache"))
+    monkeypatch.setattr(http_cache, "_limits", (3, 0))
+    monkeypatch.setattr(http_cache, "_index", None)
+    monkeypatch.setattr(http_cache, "_index_bytes", 0)
+    return http_cache
+
+
+def store(cache, url, etag="v1", body=b"<html></html>"):
+    cache.store_response(url, {"ETag": etag}, body, "utf-8", cache.hashlib.sha1(body).hexdigest())
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for n in range(3):
+        store(cache, f"https://example.com/{n}")
+    cache.conditional_headers("https://example.com/0")   # 0 снова свежий
+    store(cache, "https://example.com/3")
+
+    assert cache.load_meta("https://example.com/1") is None
+    assert cache.load_body("https://example.com/0")[0] == b"<html></html>"
+    assert cache.cache_stats()["entries"] == 3
+
+
+def test_same_body_refreshes_validators_and_keeps_parsed(cache):
+    url = "https://example.com/page"
+    store(cache, url, etag="v1")
+    cache.put_parsed(url, "css|html|a", ["x"])
+    store(cache, url, etag="v2")
+
+    assert cache.conditional_headers(url)["If-None-Match"] == "v2"
+    assert cache.get_parsed(url, "css|html|a") == ["x"]
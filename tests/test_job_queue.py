@@ -0,0 +1,26 @@
+from core.job_queue import JobQueue, PRIORITY_MANUAL, PRIORITY_SCHEDULED, QUEUED
+
+
+def test_removed_entry_does_not_shadow_requeued_key():
+    queue = JobQueue()
+    queue.push("a", "first", PRIORITY_MANUAL)
+    queue.push("b", "other", PRIORITY_SCHEDULED)
+    assert queue.remove("a")
+    assert queue.push("a", "second", PRIORITY_SCHEDULED + 1) == QUEUED
+
+    # Старая запись "a" с ручным приоритетом не должна вытолкнуть "a" раньше "b"
+    assert queue.pop()["key"] == "b"
+    job = queue.pop()
+    assert (job["key"], job["payload"]) == ("a", "second")
+    assert queue.pop() is None
+
+
+def test_heap_is_compacted_after_removals():
+    queue = JobQueue(capacity=1000)
+    for n in range(100):
+        queue.push(n, None)
+    for n in range(90):
+        queue.remove(n)
+
+    assert len(queue._heap) <= 2 * queue.depth
+    assert [queue.pop()["key"] for _ in range(10)] == list(range(90, 100))
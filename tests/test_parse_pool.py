@@ -0,0 +1,33 @@
+from core.parse_pool import ParsePool, inline_limit, use_pool
+from core.scraper import StreamingPage
+
+PAGE = b"<html><body>" + b"<p class='x'>item</p>" * 200 + b"</body></html>"
+
+
+def test_inline_limit_by_content_length():
+    pool = ParsePool(workers=1, min_size=1000)
+    assert inline_limit(None, {"Content-Length": "5000"}) is None
+    assert inline_limit(pool, {"Content-Length": "5000"}) == 0
+    assert inline_limit(pool, {"Content-Length": "10"}) == 1000
+    # chunked / gzip: длина неизвестна — разбор на месте до min_size
+    assert inline_limit(pool, {}) == 1000
+
+
+def test_small_body_without_length_is_parsed_while_streaming():
+    pool = ParsePool(workers=1, min_size=len(PAGE) + 1)
+    page = StreamingPage(encoding="utf-8", parse_limit=inline_limit(pool, {}))
+    for start in range(0, len(PAGE), 512):
+        page.feed(PAGE[start:start + 512])
+
+    assert page.parsed and not use_pool(pool, page)
+    assert len(page.close().xpath("//p")) == 200
+
+
+def test_body_crossing_min_size_is_diverted_to_pool():
+    pool = ParsePool(workers=1, min_size=1024)
+    page = StreamingPage(encoding="utf-8", parse_limit=inline_limit(pool, {}))
+    for start in range(0, len(PAGE), 512):
+        page.feed(PAGE[start:start + 512])
+
+    assert not page.parsed and use_pool(pool, page)
+    assert page.body == PAGE
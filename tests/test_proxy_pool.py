@@ -0,0 +1,135 @@
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from core import proxy_pool
+from core.async_engine import ScrapeEngine
+from core.proxy_pool import ALIVE, DEAD, NoLiveProxiesError, ProxyPool, pick_proxy
+
+CHECK_URL = "http://check.test/ip"
+
+
+class _Proxy(BaseHTTPRequestHandler):
+    """Прокси для проверки: на запрос к check_url отвечает кодом из status"""
+    status = 200
+
+    def do_GET(self):
+        self.send_response(self.status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class _BrokenProxy(_Proxy):
+    status = 502
+
+
+def serve(handler):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+def closed_port_proxy():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def shared_pool(monkeypatch):
+    def use(*proxies):
+        pool = ProxyPool(proxies, check_interval=0)
+        monkeypatch.setattr(proxy_pool, "_pool", pool)
+        return pool
+
+    def no_reads():
+        raise AssertionError("settings file read by pick_proxy")
+
+    monkeypatch.setattr(proxy_pool, "load_settings", no_reads)
+    return use
+
+
+def test_power_of_two_choice_avoids_the_slowest_proxy(shared_pool):
+    pool = shared_pool("http://a:1", "http://b:1", "http://slow:1")
+    for url, latency in (("http://a:1", 0.1), ("http://b:1", 0.1), ("http://slow:1", 10.0)):
+        pool._proxies[url].observe_latency(latency)
+
+    chosen = set()
+    for _ in range(50):
+        proxy, pooled = pick_proxy(settings={"proxy_rotation": True})
+        pool.release(proxy, None)
+        chosen.add(proxy)
+        assert pooled
+
+    assert chosen == {"http://a:1", "http://b:1"}
+
+
+def test_dead_proxies_leave_rotation(shared_pool):
+    pool = shared_pool("http://a:1", "http://b:1")
+    for _ in range(pool.max_failures):
+        pool.release("http://a:1", False, error="refused")
+
+    assert pool.stats()["http://a:1"]["state"] == DEAD
+    assert {pick_proxy(settings={"proxy_rotation": True})[0] for _ in range(10)} == {"http://b:1"}
+
+
+def test_no_live_proxies_raises_unless_direct_fallback(shared_pool):
+    pool = shared_pool("http://a:1")
+    for _ in range(pool.max_failures):
+        pool.release("http://a:1", False)
+
+    with pytest.raises(NoLiveProxiesError):
+        pick_proxy(settings={"proxy_rotation": True})
+    assert pick_proxy(settings={"proxy_rotation": True, "proxy_direct_fallback": True}) == (None, False)
+
+
+def test_explicit_proxy_and_disabled_rotation_skip_the_pool(shared_pool):
+    shared_pool()
+
+    assert pick_proxy("http://mine:3128", settings={"proxy_rotation": True}) == ("http://mine:3128", False)
+    assert pick_proxy(settings={"proxy_rotation": False}) == (None, False)
+
+
+def test_health_check_marks_proxies(monkeypatch):
+    good_server, good = serve(_Proxy)
+    broken_server, broken = serve(_BrokenProxy)
+    refused = closed_port_proxy()
+    pool = ProxyPool([good, broken, refused], check_url=CHECK_URL, check_timeout=2, check_interval=0)
+    engine = ScrapeEngine(use_cache=False, settings={})
+    try:
+        stats = pool.check_all(engine)
+    finally:
+        engine.stop()
+        good_server.shutdown()
+        broken_server.shutdown()
+
+    assert stats[good]["state"] == ALIVE and stats[good]["latency"] is not None
+    assert stats[broken]["state"] == DEAD and stats[broken]["last_error"] == "HTTP 502"
+    assert stats[refused]["state"] == DEAD
+
+
+def test_check_all_works_from_a_thread_with_a_running_loop():
+    httpd, good = serve(_Proxy)
+    pool = ProxyPool([good], check_url=CHECK_URL, check_timeout=2, check_interval=0)
+    engine = ScrapeEngine(use_cache=False, settings={})
+
+    async def caller():
+        # Поток вызова уже крутит свой loop — раньше asyncio.run() здесь падал
+        return pool.check_all(engine)
+
+    try:
+        stats = asyncio.run(caller())
+    finally:
+        engine.stop()
+        httpd.shutdown()
+
+    assert stats[good]["state"] == ALIVE
@@ -0,0 +1,13 @@
+from core.rate_limiter import TokenBucket, RATE_WINDOW
+
+
+def test_recent_sends_stay_within_window():
+    bucket = TokenBucket(rate=1000.0, burst=1000)
+    now = 0.0
+    for _ in range(100000):
+        bucket.reserve(now)
+        now += 0.01
+
+    # Без вызова observed_rate в очереди остаются только отправки за последнее окно
+    assert len(bucket.recent) <= RATE_WINDOW / 0.01 + 1
+    assert bucket.requests == 100000
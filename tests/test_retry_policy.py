@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("lxml")
+
+from core import async_engine
+from core.proxy_pool import NoLiveProxiesError
+from core.retry_policy import CircuitBreaker, CircuitOpenError, HALF_OPEN, OPEN
+
+
+def open_breaker(host):
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure(host)
+    assert breaker.state(host)["state"] == OPEN
+    return breaker
+
+
+def test_half_open_probe_is_released_when_no_proxies(monkeypatch):
+    host = "example.com"
+    breaker = open_breaker(host)
+    monkeypatch.setattr(async_engine, "get_breaker", lambda: breaker)
+
+    engine = async_engine.ScrapeEngine()
+
+    async def no_proxies(job, settings=None):
+        raise NoLiveProxiesError()
+
+    monkeypatch.setattr(engine, "scrape", no_proxies)
+    with pytest.raises(NoLiveProxiesError):
+        asyncio.run(engine._scrape_with_retries({"url": f"https://{host}/", "params": {"retries": 0}}, host, {}))
+
+    # Пробный слот свободен: следующий запрос к хосту снова пропускается как проба
+    assert breaker.state(host)["state"] == HALF_OPEN
+    breaker.before_request(host)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(host)
+
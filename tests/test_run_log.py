@@ -0,0 +1,39 @@
+from core.run_log import RunLog
+
+
+def record(task_id, ran_at, results, results_hash):
+    return {"task_id": task_id, "url": "https://example.com", "ran_at": ran_at, "duration": 0.1,
+            "status": "✅ Success", "message": "", "results": results, "results_hash": results_hash}
+
+
+def test_dropping_segment_keeps_results_of_retained_runs(tmp_path):
+    # Сегмент ~ одна запись: каждая запись уходит в новый файл
+    log = RunLog(str(tmp_path), segment_mb=100 / (1024 * 1024), max_segments=2)
+    results = [{"title": "item"}]
+    log.write([record("t1", "2026-10-01 10:00:00", results, "h1")])   # тело — в сегменте 1
+    log.write([record("t1", "2026-10-02 10:00:00", results, "h1")])   # ссылка на хэш
+    log.write([record("t2", "2026-10-03 10:00:00", ["other"], "h2")])  # сегмент 1 удаляется
+
+    runs = log.runs(task_id="t1")
+    assert [run["ran_at"] for run in runs] == ["2026-10-02 10:00:00"]
+    assert log.results(runs[0]) == results
+    log.close()
+
+
+def test_carried_copy_is_not_reindexed_on_restart(tmp_path):
+    log = RunLog(str(tmp_path), segment_mb=100 / (1024 * 1024), max_segments=2)
+    log.write([record("t1", "2026-10-01 10:00:00", ["a"], "h1")])
+    log.write([record("t1", "2026-10-02 10:00:00", ["a"], "h1")])
+    log.write([record("t2", "2026-10-03 10:00:00", ["b"], "h2")])
+    log.close()
+
+    log = RunLog(str(tmp_path), segment_mb=100 / (1024 * 1024), max_segments=2)
+    assert len(log.runs()) == 2
+    log.close()
+
+
+def test_run_records_response_size(tmp_path):
+    log = RunLog(str(tmp_path))
+    log.write([dict(record("t1", "2026-10-01 10:00:00", ["a"], "h1"), bytes=12345)])
+    assert log.runs()[0]["bytes"] == 12345
+    log.close()
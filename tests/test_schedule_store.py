@@ -0,0 +1,36 @@
+from core.schedule_store import ScheduleStore, restore_schedules, CATCHUP_ALL
+from core.scheduler import Scheduler
+
+
+def test_catchup_all_queues_one_run_per_task_at_a_time():
+    scheduler = Scheduler()
+    now = 10000.0
+    entries = [{"key": "a", "spec": 60, "next_run": now - 300}, {"key": "b", "spec": 3600, "next_run": now - 1}]
+    summary = restore_schedules(scheduler, entries, policy=CATCHUP_ALL, rate=1.0, max_runs=3, now=now)
+
+    assert summary["catchup"] == 3 + 1
+    # Сразу созревает по одному догоняющему запуску на задачу — дублей в очереди нет
+    assert sorted(scheduler.pop_due(now + 5)) == ["a", "b"]
+
+    # Остальные запуски "a" выдаются по одному после завершения предыдущего
+    assert scheduler.next_catchup("a", now + 10)
+    assert scheduler.pop_due(now + 10) == ["a"]
+    assert scheduler.next_catchup("a", now + 20)
+    assert not scheduler.next_catchup("a", now + 30)
+    assert not scheduler.next_catchup("b", now + 30)
+
+
+def test_missed_runs_are_replaced_and_dropped_with_schedule(tmp_path):
+    store = ScheduleStore(str(tmp_path / "schedules.db"))
+    task = {"url": "https://example.com", "selector": "a", "method": "CSS", "params": {}}
+    store.save("a", task, 60, next_run=100.0)
+    store.record_missed("a", [100.0, 160.0], CATCHUP_ALL, now=200.0)
+    store.record_missed("a", [400.0], CATCHUP_ALL, now=450.0)   # следующий простой
+    assert store.missed_count("a") == 1
+
+    store.record_missed("gone", [100.0], CATCHUP_ALL)
+    assert store.prune_missed() == 1
+
+    store.delete("a")
+    assert store.missed_count("a") == 0
+    store.close()
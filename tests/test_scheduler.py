@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from core.scheduler import CronSchedule, IntervalSchedule, _parse_cron_field, describe_schedule, parse_schedule
+
+
+@pytest.mark.parametrize("field, low, high, expected", [
+    ("*", 0, 5, {0, 1, 2, 3, 4, 5}),
+    ("3", 0, 59, {3}),
+    ("1,15,30", 0, 59, {1, 15, 30}),
+    ("9-12", 0, 23, {9, 10, 11, 12}),
+    ("*/15", 0, 59, {0, 15, 30, 45}),
+    ("0-30/10", 0, 59, {0, 10, 20, 30}),
+    ("50/5", 0, 59, {50, 55}),
+    ("1-3,20-22/2", 1, 31, {1, 2, 3, 20, 22}),
+])
+def test_cron_fields_ranges_and_steps(field, low, high, expected):
+    assert _parse_cron_field(field, low, high) == expected
+
+
+def test_fields_map_to_minute_hour_day_month_weekday():
+    schedule = CronSchedule("5 */6 1,15 6-8 1-5")
+    assert schedule.minutes == {5}
+    assert schedule.hours == {0, 6, 12, 18}
+    assert schedule.days == {1, 15}
+    assert schedule.months == {6, 7, 8}
+    assert schedule.weekdays == {1, 2, 3, 4, 5}
+
+
+def test_sunday_is_zero_or_seven():
+    assert CronSchedule("0 0 * * 7").weekdays == {0}
+    assert CronSchedule("0 0 * * 5-7").weekdays == {5, 6, 0}
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",           # четыре поля
+    "60 * * * *",        # минута вне диапазона
+    "* 24 * * *",
+    "* * 0 * *",
+    "* * * 13 *",
+    "* * * * 8",
+    "10-5 * * * *",      # начало больше конца
+    "*/0 * * * *",       # нулевой шаг
+    "a * * * *",
+    "@fortnightly",
+])
+def test_bad_cron_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("*/15 * * * *", datetime(2024, 3, 5, 10, 7), datetime(2024, 3, 5, 10, 15)),
+    ("*/15 * * * *", datetime(2024, 3, 5, 10, 15), datetime(2024, 3, 5, 10, 30)),   # строго после
+    ("0 9-18/3 * * *", datetime(2024, 3, 5, 18, 1), datetime(2024, 3, 6, 9, 0)),
+    ("30 8 * * 1-5", datetime(2024, 3, 8, 9, 0), datetime(2024, 3, 11, 8, 30)),     # пятница -> понедельник
+    ("0 0 31 * *", datetime(2024, 4, 1, 0, 0), datetime(2024, 5, 31, 0, 0)),        # в апреле 31-го нет
+    ("0 0 29 2 *", datetime(2024, 3, 1, 0, 0), datetime(2028, 2, 29, 0, 0)),
+    ("0 12 1 * 0", datetime(2024, 3, 1, 12, 0), datetime(2024, 3, 3, 12, 0)),       # 1-е число ИЛИ воскресенье
+    ("@daily", datetime(2024, 12, 31, 23, 59, 30), datetime(2025, 1, 1, 0, 0)),
+    ("@weekly", datetime(2024, 3, 5, 0, 0), datetime(2024, 3, 10, 0, 0)),
+    ("@monthly", datetime(2024, 3, 5, 0, 0), datetime(2024, 4, 1, 0, 0)),
+])
+def test_next_fire_time(expression, after, expected):
+    assert CronSchedule(expression).next_time(after) == expected
+
+
+def test_never_matching_expression():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_time(datetime(2024, 1, 1))
+
+
+def test_jitter_shifts_runs_but_keeps_the_slot():
+    schedule = CronSchedule("0 * * * *", jitter=30)
+    base = datetime(2024, 3, 5, 10, 0).timestamp()
+    first = schedule.next_after(base - 60, "task-a")
+    assert base <= first < base + 30
+    # Сразу после сдвинутого запуска следующий — через час, слот не пропущен и не повторён
+    assert schedule.next_after(first, "task-a") == first + 3600
+    assert schedule.next_after(first - 1, "task-a") == first
+
+
+def test_parse_schedule():
+    assert parse_schedule(None) is None
+    assert parse_schedule("0") is None
+    assert isinstance(parse_schedule(90), IntervalSchedule)
+    assert parse_schedule(" 600 ").seconds == 600
+    assert isinstance(parse_schedule("*/5 * * * *"), CronSchedule)
+    assert describe_schedule("3600") == "⏱ 1 ч"
+    assert describe_schedule("@hourly") == "🕒 @hourly"
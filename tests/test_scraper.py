@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("lxml")
+
+from core import http_cache, scraper
+from core.scraper import OUTPUT_HTML, StreamingPage, finish_page
+
+URL = "https://example.com/page"
+BODY = b"<html><body><a href='/x'>one</a><a href='/y'>two</a></body></html>"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "CACHE_DIR", str(tmp_path / "http_cache"))
+    monkeypatch.setattr(http_cache, "_limits", (0, 0))
+    monkeypatch.setattr(http_cache, "_index", None)
+    monkeypatch.setattr(http_cache, "_index_bytes", 0)
+    return http_cache
+
+
+def fed_page(body=BODY):
+    page = StreamingPage(keep_body=True)
+    page.feed(body)
+    return page
+
+
+def test_finish_page_reuses_fed_tree(cache, monkeypatch):
+    def no_reparse(*args):
+        raise AssertionError("body parsed twice")
+
+    monkeypatch.setattr(scraper, "parse_body", no_reparse)
+    results = finish_page(fed_page(), {"ETag": "v1"}, URL, "a", "CSS", OUTPUT_HTML)
+
+    assert len(results) == 2
+    assert cache.get_parsed(URL, cache.parse_key("a", "CSS", OUTPUT_HTML)) == results
+
+
+def test_unchanged_body_skips_selectors(cache, monkeypatch):
+    first = finish_page(fed_page(), {"ETag": "v1"}, URL, "a", "CSS", OUTPUT_HTML)
+
+    def no_extract(*args):
+        raise AssertionError("selectors ran on an unchanged body")
+
+    monkeypatch.setattr(scraper, "extract_tree_for_method", no_extract)
+    again = finish_page(fed_page(), {"ETag": "v2"}, URL, "a", "CSS", OUTPUT_HTML)
+
+    assert again == first
+    assert cache.conditional_headers(URL)["If-None-Match"] == "v2"
@@ -0,0 +1,43 @@
+from core.session_store import SessionStore
+
+
+def make_task(task_id, results):
+    return {"task_id": task_id, "url": f"https://example.com/{task_id}", "selector": "a", "method": "CSS",
+            "status": "✅ Success", "last_run": "2026-10-18 12:00:00", "results": results}
+
+
+def count(store, table):
+    return store._query(f"SELECT COUNT(*) FROM {table}")[0][0]
+
+
+def test_delete_session_prunes_its_results(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    store.save_session("a", [make_task("1", ["x", "y"])])
+    assert count(store, "results") == 1
+
+    assert store.delete_session("a")
+    assert count(store, "results") == 0
+    assert store.list_sessions() == []
+    store.close()
+
+
+def test_delete_session_keeps_results_shared_with_other_sessions(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    store.save_session("a", [make_task("1", ["shared"]), make_task("2", ["only a"])])
+    store.save_session("b", [make_task("3", ["shared"])])
+
+    store.delete_session("a")
+    assert count(store, "results") == 1
+    assert store.load_session("b")["tasks"][0]["results"] == ["shared"]
+    store.close()
+
+
+def test_delete_session_keeps_results_of_loaded_session(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    store.save_session("a", [make_task("1", ["loaded"])])
+    task = store.load_session("a", lazy=True)["tasks"][0]
+    entry = {"results_hash": task["results_hash"]}   # ленивая сводка в памяти: результатов нет
+
+    store.delete_session("a", keep_hashes=[entry["results_hash"]])
+    assert store.load_results(entry["results_hash"]) == ["loaded"]
+    store.close()
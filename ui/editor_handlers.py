@@ -1,4 +1,16 @@
-from PyQt5.QtWidgets import QLineEdit, QComboBox, QDialog, QVBoxLayout, QTextEdit, QPushButton, QTableWidgetItem
+from PyQt5.QtWidgets import QLineEdit, QComboBox, QDialog, QVBoxLayout, QTextEdit, QPushButton
+
+# Таблица задач — QTableView: текст ячейки читаем из модели, правку пишем через setData,
+# а временный редактор ставим поверх ячейки через setIndexWidget
+
+def cell_text(table, row, column):
+    return table.model().index(row, column).data() or ""
+
+def set_cell_text(table, row, column, value):
+    table.model().setData(table.model().index(row, column), value)
+
+def set_cell_editor(table, row, column, widget):
+    table.setIndexWidget(table.model().index(row, column), widget)
 
 def edit_cell(parent, table, row, column):
     if column == 1:
@@ -9,39 +21,33 @@ def edit_cell(parent, table, row, column):
         edit_method_cell(parent, table, row, column)
 
 def edit_url_cell(parent, table, row, column):
-    item = table.item(row, column)
-    if not item:
-        return
     editor = QLineEdit(parent)
-    editor.setText(item.text())
-    table.setCellWidget(row, column, editor)
+    editor.setText(cell_text(table, row, column))
+    set_cell_editor(table, row, column, editor)
     editor.editingFinished.connect(lambda: finish_edit_url(table, row, column, editor))
     editor.setFocus()
 
 def finish_edit_url(table, row, column, editor):
     new_value = editor.text()
-    table.setItem(row, column, QTableWidgetItem(new_value))
-    table.setCellWidget(row, column, None)
+    set_cell_text(table, row, column, new_value)
+    set_cell_editor(table, row, column, None)
 
 def edit_method_cell(parent, table, row, column):
     combo = QComboBox(parent)
-    combo.addItems(["CSS", "XPath"])
-    current = table.item(row, column)
-    if current:
-        index = combo.findText(current.text())
-        if index >= 0:
-            combo.setCurrentIndex(index)
+    combo.addItems(["CSS", "XPath", "Multi"])
+    index = combo.findText(cell_text(table, row, column))
+    if index >= 0:
+        combo.setCurrentIndex(index)
     combo.currentIndexChanged.connect(lambda: finish_edit_method(table, row, column, combo))
-    table.setCellWidget(row, column, combo)
+    set_cell_editor(table, row, column, combo)
 
 def finish_edit_method(table, row, column, combo):
     value = combo.currentText()
-    table.setItem(row, column, QTableWidgetItem(value))
-    table.setCellWidget(row, column, None)
+    set_cell_text(table, row, column, value)
+    set_cell_editor(table, row, column, None)
 
 def edit_selector_modal(parent, table, row, column):
-    current = table.item(row, column)
-    text = current.text() if current else ""
+    text = cell_text(table, row, column)
 
     dialog = QDialog(parent)
     dialog.setWindowTitle("Edit Selector")
@@ -57,4 +63,4 @@ def edit_selector_modal(parent, table, row, column):
 
     if dialog.exec_():
         new_value = editor.toPlainText().strip()
-        table.setItem(row, column, QTableWidgetItem(new_value))
+        set_cell_text(table, row, column, new_value)
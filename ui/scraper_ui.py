@@ -64,7 +64,7 @@ class Ui_MainWindow(object):
 "}\n"
 "\n"
 "/* Таблица и списки */\n"
-"QTableWidget, QListWidget {\n"
+"QTableView, QListWidget {\n"
 "    background-color: #ffffff;\n"
 "    color: #222831;\n"
 "    gridline-color: #f0f0f0;\n"
@@ -143,33 +143,9 @@ class Ui_MainWindow(object):
         self.tabWidget.setObjectName("tabWidget")
         self.tab = QtWidgets.QWidget()
         self.tab.setObjectName("tab")
-        self.tasks_table = QtWidgets.QTableWidget(self.tab)
+        self.tasks_table = QtWidgets.QTableView(self.tab)
         self.tasks_table.setGeometry(QtCore.QRect(0, 0, 1331, 701))
         self.tasks_table.setObjectName("tasks_table")
-        self.tasks_table.setColumnCount(11)
-        self.tasks_table.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(5, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(6, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(7, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(8, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(9, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tasks_table.setHorizontalHeaderItem(10, item)
         self.tabWidget.addTab(self.tab, "")
         self.tab_scanner = QtWidgets.QWidget()
         self.tab_scanner.setObjectName("tab_scanner")
@@ -290,11 +266,10 @@ class Ui_MainWindow(object):
         self.cmb_export_format.addItem("")
         self.cmb_export_format.addItem("")
         self.cmb_export_format.addItem("")
-        self.table_data_preview = QtWidgets.QTableWidget(self.tab_2)
+        self.cmb_export_format.addItem("")
+        self.table_data_preview = QtWidgets.QTableView(self.tab_2)
         self.table_data_preview.setGeometry(QtCore.QRect(0, 150, 1231, 571))
         self.table_data_preview.setObjectName("table_data_preview")
-        self.table_data_preview.setColumnCount(0)
-        self.table_data_preview.setRowCount(0)
         self.btn_data_preview = QtWidgets.QPushButton(self.tab_2)
         self.btn_data_preview.setGeometry(QtCore.QRect(140, 120, 121, 31))
         self.btn_data_preview.setObjectName("btn_data_preview")
@@ -443,28 +418,6 @@ class Ui_MainWindow(object):
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
-        item = self.tasks_table.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "№"))
-        item = self.tasks_table.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "URL"))
-        item = self.tasks_table.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Selectors"))
-        item = self.tasks_table.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Methode"))
-        item = self.tasks_table.horizontalHeaderItem(4)
-        item.setText(_translate("MainWindow", "Status"))
-        item = self.tasks_table.horizontalHeaderItem(5)
-        item.setText(_translate("MainWindow", "Action"))
-        item = self.tasks_table.horizontalHeaderItem(6)
-        item.setText(_translate("MainWindow", "Save"))
-        item = self.tasks_table.horizontalHeaderItem(7)
-        item.setText(_translate("MainWindow", "Cookies"))
-        item = self.tasks_table.horizontalHeaderItem(8)
-        item.setText(_translate("MainWindow", "Params"))
-        item = self.tasks_table.horizontalHeaderItem(9)
-        item.setText(_translate("MainWindow", "Timer"))
-        item = self.tasks_table.horizontalHeaderItem(10)
-        item.setText(_translate("MainWindow", "Last Run"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab), _translate("MainWindow", "Scraper"))
         self.btn_scan.setText(_translate("MainWindow", "Start Scan"))
         self.btn_dns_scan.setText(_translate("MainWindow", "DNS Scan"))
@@ -490,6 +443,7 @@ class Ui_MainWindow(object):
         self.cmb_export_format.setItemText(0, _translate("MainWindow", "JSON"))
         self.cmb_export_format.setItemText(1, _translate("MainWindow", "CSV"))
         self.cmb_export_format.setItemText(2, _translate("MainWindow", "XLSX"))
+        self.cmb_export_format.setItemText(3, _translate("MainWindow", "JSONL"))
         self.btn_data_preview.setText(_translate("MainWindow", "Data Preview"))
         self.btn_browse_path.setText(_translate("MainWindow", "Browse (QFileDialog)"))
         self.lbl_data_preview.setText(_translate("MainWindow", "Export Path: "))
@@ -1,56 +1,63 @@
 # ui/table_controller.py
 
-from PyQt5.QtWidgets import QTableWidgetItem
-from PyQt5.QtCore import Qt
-from ui.table_utils import colorize_row_by_status
+from ui.task_table_model import COL_STATUS, COL_LAST_RUN
+
 
 class TableController:
-    def __init__(self, table_widget, task_params):
+    """
+    Таблица задач — QTableView над TaskTableModel, данные — в TaskStore.
+    Контроллер читает задачи по ID и меняет ячейки через модель.
+    """
+
+    def __init__(self, table_widget, task_params, task_model):
         self.table = table_widget
         self.task_params = task_params
+        self.model = task_model
+        self.task_store = task_model.task_store
 
     def get_task_data(self, row: int) -> dict:
         """Возвращает данные строки таблицы как словарь"""
-        get_text = lambda col: self.table.item(row, col).text().strip() if self.table.item(row, col) else ""
+        return self.task_data(self.task_store.id_at(row))
 
+    def task_data(self, task_id) -> dict:
+        """Данные задачи по ID (поля из TaskStore + параметры запроса)"""
+        task = self.task_store.get(task_id) or {}
         return {
-            "url": get_text(1),
-            "selector": get_text(2),
-            "method": get_text(3),
-            "status": get_text(4),
-            "params": self.task_params.get(row, {}),
-            "last_run": get_text(10)
+            "url": task.get("url", ""),
+            "selector": task.get("selector", ""),
+            "method": task.get("method", ""),
+            "status": task.get("status", ""),
+            "params": self.task_params.get(task_id, {}),
+            "last_run": task.get("last_run", "")
         }
 
     def update_row_status(self, row: int, status: str):
-        """Обновляет статус и перекрашивает строку"""
-        self.table.setItem(row, 4, QTableWidgetItem(status))
-        colorize_row_by_status(self.table, row)
+        """Обновляет статус (цвет строки модель берёт из статуса)"""
+        self.model.set_text(self.task_store.id_at(row), COL_STATUS, status)
 
     def set_last_run(self, row: int, time_str: str):
         """Устанавливает значение в колонке Last Run"""
-        self.table.setItem(row, 10, QTableWidgetItem(time_str))
+        self.model.set_text(self.task_store.id_at(row), COL_LAST_RUN, time_str)
 
     def apply_filters(self, filters: list):
         """
         Применяет список фильтров к таблице.
         Пример: [("URL", "cnn"), ("Status", "ERROR")]
         """
-        col_map = {
-            "URL": 1,
-            "Selector": 2,
-            "Status": 4,
-            "Last Run": 10
+        field_map = {
+            "URL": "url",
+            "Selector": "selector",
+            "Status": "status",
+            "Last Run": "last_run"
         }
 
-        for row in range(self.table.rowCount()):
+        for task in self.task_store:
             match = True
             for field, value in filters:
-                col = col_map.get(field)
-                if col is None:
+                key = field_map.get(field)
+                if key is None:
                     continue
-                item = self.table.item(row, col)
-                if not item or value.lower() not in item.text().lower():
+                if value.lower() not in task[key].lower():
                     match = False
                     break
-            self.table.setRowHidden(row, not match)
+            self.table.setRowHidden(self.task_store.row_of(task["id"]), not match)
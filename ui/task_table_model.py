@@ -0,0 +1,235 @@
+# ui/task_table_model.py
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from ui.table_utils import status_color
+
+# Колонки таблицы задач
+(COL_NUMBER, COL_URL, COL_SELECTOR, COL_METHOD, COL_STATUS, COL_ACTION,
+ COL_SAVE, COL_COOKIES, COL_PARAMS, COL_TIMER, COL_LAST_RUN) = range(11)
+
+TASK_HEADERS = ["№", "URL", "Selectors", "Methode", "Status", "Action", "Save", "Cookies", "Params", "Timer",
+                "Last Run"]
+
+# Колонки, чьи значения живут в TaskStore
+STORE_COLUMNS = {COL_URL: "url", COL_SELECTOR: "selector", COL_METHOD: "method", COL_STATUS: "status",
+                 COL_LAST_RUN: "last_run"}
+
+# Текст остальных колонок, пока для задачи не задано своё значение
+DEFAULT_CELLS = {COL_ACTION: "...", COL_SAVE: "💾 Save", COL_COOKIES: "🍪 Куки", COL_PARAMS: "🛠 Tune"}
+
+
+class TaskTableModel(QAbstractTableModel):
+    """
+    Модель таблицы задач поверх TaskStore. Ячейки не хранятся: data() читает задачу
+    по номеру строки только для видимых ячеек, поэтому десятки тысяч задач не создают
+    ни одного QTableWidgetItem или виджета. Массовая загрузка — один beginInsertRows.
+    Изменения задач сообщаются сигналами — по ним сессия сохраняется инкрементально.
+    """
+    tasks_changed = pyqtSignal(list)   # ID добавленных / изменённых задач
+    tasks_removed = pyqtSignal(list)   # ID удалённых задач
+    task_edited = pyqtSignal(object)   # ID задачи, чей URL / селектор / метод поправили в редакторе
+
+    def __init__(self, task_store, tooltip_provider=None, parent=None):
+        super().__init__(parent)
+        self.task_store = task_store
+        self.tooltip_provider = tooltip_provider   # (task_id, column) -> текст подсказки, считается при наведении
+        self._cells = {}       # id -> {колонка: текст} для колонок вне TaskStore
+        self._tooltips = {}    # id -> {колонка: подсказка}, заданные явно (итог последнего запуска)
+        self._locked = set()   # ID задач, чьи URL/селектор/метод сейчас нельзя править
+
+    # ========= QAbstractTableModel =========
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.task_store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(TASK_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return TASK_HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task_id = self.task_store.id_at(index.row())
+        if task_id is None:
+            return None
+        column = index.column()
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == COL_NUMBER:
+                return str(index.row() + 1)
+            return self.text(task_id, column)
+        if role == Qt.BackgroundRole:
+            return status_color(self.task_store.get(task_id)["status"])
+        if role == Qt.ToolTipRole:
+            tooltip = self._tooltips.get(task_id, {}).get(column)
+            if tooltip is None and self.tooltip_provider:
+                tooltip = self.tooltip_provider(task_id, column)
+            return tooltip
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Правка URL / селектора / метода из редакторов ячеек"""
+        if role != Qt.EditRole or not index.isValid() or index.column() not in STORE_COLUMNS:
+            return False
+        task_id = self.task_store.id_at(index.row())
+        if task_id is None:
+            return False
+        self.set_text(task_id, index.column(), str(value).strip())
+        self.task_edited.emit(task_id)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        # Редактирование идёт через editor_handlers, а не через встроенный редактор представления
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ========= Задачи =========
+
+    def add_task(self, url, selector, method, status, task_id=None):
+        """:return: ID добавленной задачи"""
+        return self.add_tasks([{"url": url, "selector": selector, "method": method, "status": status,
+                                "task_id": task_id}])[0]
+
+    def add_tasks(self, tasks):
+        """
+        Добавляет пачку задач одним beginInsertRows/endInsertRows.
+        :param tasks: словари url, selector, method, status и необязательные
+                      last_run, task_id, cells ({колонка: текст})
+        :return: список ID в том же порядке
+        """
+        if not tasks:
+            return []
+        first = len(self.task_store)
+        self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+        ids = []
+        try:
+            for task in tasks:
+                task_id = self.task_store.add(
+                    task.get("url", ""), task.get("selector", ""), task.get("method") or "CSS",
+                    task.get("status", ""), task.get("last_run", ""), task_id=task.get("task_id")
+                )
+                if task.get("cells"):
+                    self._cells[task_id] = dict(task["cells"])
+                ids.append(task_id)
+        finally:
+            self.endInsertRows()
+        self.tasks_changed.emit(ids)
+        return ids
+
+    def remove_tasks(self, task_ids):
+        """
+        Удаляет задачи. Один сплошной блок строк — beginRemoveRows,
+        разрозненные строки — сброс модели (дешевле сотен отдельных удалений).
+        :return: список удалённых ID
+        """
+        rows = sorted(row for row in (self.task_store.row_of(t) for t in task_ids) if row is not None)
+        if not rows:
+            return []
+        contiguous = rows[-1] - rows[0] + 1 == len(rows)
+        if contiguous:
+            self.beginRemoveRows(QModelIndex(), rows[0], rows[-1])
+        else:
+            self.beginResetModel()
+        try:
+            removed = self.task_store.remove(task_ids)
+            for task_id in removed:
+                self._cells.pop(task_id, None)
+                self._tooltips.pop(task_id, None)
+                self._locked.discard(task_id)
+        finally:
+            if contiguous:
+                self.endRemoveRows()
+            else:
+                self.endResetModel()
+        if removed:
+            self.tasks_removed.emit(removed)
+        return removed
+
+    def clear(self):
+        self.beginResetModel()
+        self.task_store.clear()
+        self._cells.clear()
+        self._tooltips.clear()
+        self._locked.clear()
+        self.endResetModel()
+
+    # ========= Ячейки =========
+
+    def text(self, task_id, column):
+        """Текст ячейки задачи (без номера строки)"""
+        field = STORE_COLUMNS.get(column)
+        if field:
+            task = self.task_store.get(task_id)
+            return task[field] if task else ""
+        return self._cells.get(task_id, {}).get(column, DEFAULT_CELLS.get(column, ""))
+
+    def set_text(self, task_id, column, text):
+        """Меняет ячейку; статус перекрашивает всю строку, остальное — только саму ячейку"""
+        field = STORE_COLUMNS.get(column)
+        if field:
+            if not self.task_store.update(task_id, **{field: text}):
+                return
+        else:
+            self._cells.setdefault(task_id, {})[column] = text
+        self.tasks_changed.emit([task_id])
+        if column == COL_STATUS:
+            self._emit_changed(task_id)
+        else:
+            self._emit_changed(task_id, column, column)
+
+    def set_tooltip(self, task_id, column, text):
+        self._tooltips.setdefault(task_id, {})[column] = text
+        self._emit_changed(task_id, column, column)
+
+    def set_locked(self, task_id, locked=True):
+        if locked:
+            self._locked.add(task_id)
+        else:
+            self._locked.discard(task_id)
+
+    def is_locked(self, task_id):
+        return task_id in self._locked
+
+    def _emit_changed(self, task_id, first=0, last=None):
+        row = self.task_store.row_of(task_id)
+        if row is None:
+            return
+        last = self.columnCount() - 1 if last is None else last
+        self.dataChanged.emit(self.index(row, first), self.index(row, last))
+
+
+class RowsTableModel(QAbstractTableModel):
+    """Простая модель только для чтения: заголовки + список строк (предпросмотр данных)"""
+
+    def __init__(self, headers=None, rows=None, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers or [])
+        self.rows = list(rows or [])
+
+    def set_rows(self, headers, rows):
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.rows = list(rows)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self.headers):
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = self.rows[index.row()]
+        return str(row[index.column()]) if index.column() < len(row) else ""
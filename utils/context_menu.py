@@ -1,12 +1,11 @@
 from PyQt5.QtWidgets import QMenu
-from ui import table_utils
 
 def show_context_menu(parent, table, position, lcd_callback, run_task_callback, add_task_callback):
     menu = QMenu()
     menu.addAction("Add empty task", lambda: handle_add_empty(add_task_callback, lcd_callback))
     menu.addAction("Add Example", lambda: handle_add_template(add_task_callback, lcd_callback))
     menu.addSeparator()
-    menu.addAction("Delete row", lambda: handle_delete(table, lcd_callback))
+    menu.addAction("Delete row", lambda: handle_delete(parent, lcd_callback))
     menu.addAction("Start Task", lambda: run_task_callback())
     menu.exec_(table.viewport().mapToGlobal(position))
     menu.addSeparator()
@@ -28,14 +27,14 @@ def handle_add_template(add_task_callback, lcd_callback):
 
 # DELETE ROW
 
-def handle_delete(table, lcd_callback):
-    table_utils.delete_selected_row(table)
+def handle_delete(parent, lcd_callback):
+    parent.delete_task()  # строка уходит вместе с задачей из хранилища и словарей по ID
     lcd_callback()
 
 # RUN CHOOSEN ROW
 
 def handle_run_stub(table, lcd_callback):
-    row = table.currentRow()
-    if row >= 0:
-        table.setItem(row, 4, table_utils.QTableWidgetItem("⏳ Running"))
+    index = table.currentIndex()
+    if index.isValid():
+        table.model().setData(table.model().index(index.row(), 4), "⏳ Running")
     lcd_callback()
@@ -1,4 +1,4 @@
-import requests
+from core import http_client
 from bs4 import BeautifulSoup
 
 def parse_page(domain: str, timeout: int = 5) -> dict:
@@ -11,7 +11,7 @@ def parse_page(domain: str, timeout: int = 5) -> dict:
 
     for url in urls_to_try:
         try:
-            response = requests.get(url, timeout=timeout)
+            response = http_client.get(url, timeout=timeout)
             result["URL"] = url
             result["Status"] = response.status_code
 
@@ -1,4 +1,5 @@
 import requests
+from core import http_client
 
 def scan_http_headers(domain: str, timeout: int = 5) -> dict:
     """
@@ -10,7 +11,7 @@ def scan_http_headers(domain: str, timeout: int = 5) -> dict:
 
     for url in urls_to_try:
         try:
-            response = requests.head(url, timeout=timeout, allow_redirects=True)
+            response = http_client.head(url, timeout=timeout, allow_redirects=True)
             headers_result["URL"] = url
             headers_result["Status Code"] = response.status_code
             headers_result.update(response.headers)
@@ -1,11 +1,11 @@
 import os, re
-import requests
+from core import http_client
 from urllib.parse import urlparse, urljoin
 
 def download_js_file(js_url, save_dir, base_url):
     try:
         full_url = urljoin(base_url, js_url)
-        response = requests.get(full_url, timeout=10)
+        response = http_client.get(full_url, timeout=10)
 
         if not response.ok:
             print(f"[Download Error] {js_url} → {response.status_code}")
@@ -5,12 +5,27 @@ from bs4 import BeautifulSoup
 from PyQt5.QtWidgets import QTreeWidgetItem,QFileDialog
 from PyQt5.QtGui import QColor
 from utils.scanner_utils.async_worker import AsyncWorker
+from core.rate_limiter import get_limiter, host_of
 
 CRT_SH_SEARCH_URL = "https://crt.sh/?q=%.{domain}"
 CRT_SH_CERT_URL = "https://crt.sh/?id={cert_id}"
 
 stop_event = threading.Event()
 
+
+async def wait_for_rate_limit(url):
+    """Ждёт свой слот в общем лимите частоты для хоста (crt.sh банит за пачки запросов)"""
+    limiter, host = get_limiter(), host_of(url)
+    delay = limiter.reserve(host)
+    while delay > 0:
+        await asyncio.sleep(delay)
+        delay = limiter.blocked_for(host)
+
+
+def observe_response(url, response):
+    """Сообщает лимитеру статус ответа: 429/503 и Retry-After замедляют следующие запросы"""
+    get_limiter().observe(host_of(url), response.status, response.headers.get("Retry-After"))
+
 ###### PARSER FOR GETTING CERTIFICATES ID FROM DOMAIN/SUBDOMAIN CRT.SH  #############
 ###### PARSER FOR GETTING CERTIFICATES ID FROM DOMAIN/SUBDOMAIN CRT.SH  #############
 
@@ -26,8 +41,10 @@ async def fetch_certificate_ids(domain, log_callback=None):
         if log_callback:
             log_callback(f"URL to request certificates: {url}", "blue")
 
+        await wait_for_rate_limit(url)
         async with aiohttp.ClientSession() as session:
             async with session.get(url, timeout=10) as response:
+                observe_response(url, response)
                 if response.status != 200:
                     raise Exception(f"Failed to request crt.sh: {response.status}")
 
@@ -82,8 +99,10 @@ async def fetch_certificate_details(cert_id, log_callback=None):
         if log_callback:
             log_callback(f"URL to request certificate details: {url}", "blue")
 
+        await wait_for_rate_limit(url)
         async with aiohttp.ClientSession() as session:
             async with session.get(url, timeout=10) as response:
+                observe_response(url, response)
                 if response.status != 200:
                     raise Exception(f"Error getting certificates {response.status}")
 
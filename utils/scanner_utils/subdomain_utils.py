@@ -6,6 +6,7 @@ import random
 import json
 from bs4 import BeautifulSoup
 from functools import lru_cache
+from core import http_client
 
 def validate_inputs(domain, request_count, timeout, interval, output_folder):
     """Проверяет корректность входных данных."""
@@ -76,12 +77,12 @@ def save_logs_to_file(structured_data, file_name, format_type):
 def resolve_subdomain(subdomain, timeout=5):
     """Проверяет активность поддомена и возвращает IP и HTTP/HTTPS-статус."""
     try:
-        response = requests.get(f"https://{subdomain}", timeout=timeout)
+        response = http_client.get(f"https://{subdomain}", timeout=timeout)
         ip = socket.gethostbyname(subdomain)
         return ip, response.status_code
     except:
         try:
-            response = requests.get(f"http://{subdomain}", timeout=timeout)
+            response = http_client.get(f"http://{subdomain}", timeout=timeout)
             ip = socket.gethostbyname(subdomain)
             return ip, response.status_code
         except:
@@ -113,7 +114,7 @@ def find_and_check_subdomains(domain, request_count, timeout, interval, show_req
                     yield (f"Запрос: GET {url}", "blue")
 
                 try:
-                    response = requests.get(url, timeout=timeout)
+                    response = http_client.get(url, timeout=timeout)
                     if response.status_code == 200:
                         # Парсинг HTML-ответа с помощью parse_common_names
                         common_names = parse_common_names(response.text)